@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+
+# Allow direct execution
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+import argparse
+import time
+
+from yt_dlp.aes import _cbc_decrypt, _ctr_crypt, _gcm_decrypt_and_verify
+from yt_dlp.dependencies import Cryptodome
+
+
+def gcm_decrypt(data, key, iv):
+    # The tag is not valid, but it is only checked after all the work is done
+    try:
+        _gcm_decrypt_and_verify(data, key, bytes(16), iv[:12])
+    except ValueError:
+        pass
+
+
+def cryptodome_gcm_decrypt(data, key, iv):
+    try:
+        Cryptodome.AES.new(key, Cryptodome.AES.MODE_GCM, iv[:12]).decrypt_and_verify(data, bytes(16))
+    except ValueError:
+        pass
+
+
+IMPLEMENTATIONS = {
+    'native': {
+        'cbc': _cbc_decrypt,
+        'ctr': _ctr_crypt,
+        'gcm': gcm_decrypt,
+    },
+    'cryptodome': {
+        'cbc': lambda data, key, iv: Cryptodome.AES.new(key, Cryptodome.AES.MODE_CBC, iv).decrypt(data),
+        'ctr': lambda data, key, iv: Cryptodome.AES.new(
+            key, Cryptodome.AES.MODE_CTR, nonce=b'', initial_value=iv).decrypt(data),
+        'gcm': cryptodome_gcm_decrypt,
+    },
+}
+
+
+def benchmark(func, data, key, iv, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(data, key, iv)
+        best = min(best, time.perf_counter() - start)
+    return len(data) / best / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the throughput of the AES implementations')
+    parser.add_argument('--size', type=int, default=1024, help='size of the data in KiB (default: %(default)s)')
+    parser.add_argument('--key-size', type=int, choices=(16, 24, 32), default=16, help='key size in bytes')
+    parser.add_argument('--repeat', type=int, default=3, help='number of runs, the best one is kept')
+    args = parser.parse_args()
+
+    data, key, iv = os.urandom(args.size * 1024), os.urandom(args.key_size), os.urandom(16)
+    for name, modes in IMPLEMENTATIONS.items():
+        if name == 'cryptodome' and not Cryptodome.AES:
+            print(f'{name}: not available')
+            continue
+        for mode, func in modes.items():
+            print(f'{name} {mode}: {benchmark(func, data, key, iv, args.repeat):.2f} MB/s')
+
+
+if __name__ == '__main__':
+    main()
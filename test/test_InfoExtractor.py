@@ -1225,6 +1225,7 @@ def test_parse_mpd_formats(self):
                 [{
                     'url': 'https://v.redd.it/hw1x7rcg7zl21/audio',
                     'manifest_url': 'https://v.redd.it/hw1x7rcg7zl21/DASHPlaylist.mpd',
+                    '_index_range': {'start': 832, 'end': 1008},
                     'ext': 'm4a',
                     'format_id': 'AUDIO-1',
                     'format_note': 'DASH audio',
@@ -1237,6 +1238,7 @@ def test_parse_mpd_formats(self):
                 }, {
                     'url': 'https://v.redd.it/hw1x7rcg7zl21/DASH_240',
                     'manifest_url': 'https://v.redd.it/hw1x7rcg7zl21/DASHPlaylist.mpd',
+                    '_index_range': {'start': 913, 'end': 1113},
                     'ext': 'mp4',
                     'format_id': 'VIDEO-2',
                     'format_note': 'DASH video',
@@ -1250,6 +1252,7 @@ def test_parse_mpd_formats(self):
                 }, {
                     'url': 'https://v.redd.it/hw1x7rcg7zl21/DASH_360',
                     'manifest_url': 'https://v.redd.it/hw1x7rcg7zl21/DASHPlaylist.mpd',
+                    '_index_range': {'start': 915, 'end': 1115},
                     'ext': 'mp4',
                     'format_id': 'VIDEO-1',
                     'format_note': 'DASH video',
@@ -8,19 +8,26 @@
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 
+import concurrent.futures
 import copy
 import json
+import threading
+import time
+from unittest import mock
 
 from test.helper import FakeYDL, assertRegexpMatches
 from yt_dlp import YoutubeDL
 from yt_dlp.compat import compat_os_name
+from yt_dlp.downloader import FileDownloader
 from yt_dlp.extractor import YoutubeIE
 from yt_dlp.extractor.common import InfoExtractor
 from yt_dlp.postprocessor.common import PostProcessor
 from yt_dlp.utils import (
+    DownloadCancelled,
     ExtractorError,
     LazyList,
     OnDemandPagedList,
+    PostProcessingError,
     int_or_none,
     match_filter_func,
 )
@@ -902,6 +909,151 @@ def run(self, info):
         self.assertTrue(os.path.exists(filename), '%s doesn\'t exist' % filename)
         os.unlink(filename)
 
+    def test_dl_concurrently(self):
+        barrier = threading.Barrier(2, timeout=10)
+
+        class _YDL(YoutubeDL):
+            def dl(self, name, info, subtitle=False, test=False, *, progress=None):
+                # Both downloads must be running at the same time to get past the barrier
+                barrier.wait()
+                status, idx = progress
+                ratelimit = status.params['ratelimit']
+                barrier.wait()
+                return name == 'video', (idx, ratelimit)
+
+        ydl = _YDL({'quiet': True, 'noprogress': True, 'ratelimit': 1000})
+        self.assertEqual(
+            ydl._dl_concurrently([('video', {}), ('audio', {})]),
+            [(True, (0, 500)), (False, (1, 500))])
+
+    def test_dl_concurrently_rate_limit(self):
+        video_done = threading.Event()
+
+        class _YDL(YoutubeDL):
+            def dl(self, name, info, subtitle=False, test=False, *, progress=None):
+                status, _ = progress
+                if name == 'video':
+                    return True, status.params['ratelimit']
+                # The limit of a finished download is given to the remaining ones
+                while status.params['ratelimit'] != 1000:
+                    video_done.wait(0.01)
+                return True, status.params['ratelimit']
+
+        ydl = _YDL({'quiet': True, 'noprogress': True, 'ratelimit': 1000})
+        self.assertEqual(ydl._dl_concurrently([('video', {}), ('audio', {})]), [(True, 500), (True, 1000)])
+
+    def test_shared_progress_line(self):
+        ydl = YoutubeDL({'quiet': True})
+        status = FileDownloader(ydl, ydl.params)
+        status._prepare_multiline_status(2)
+        fd = FileDownloader(ydl, ydl.params)
+        fd._share_status(status, 1)
+        lines = []
+        with mock.patch.object(status._multiline, 'print_at_line', lambda text, idx: lines.append(idx)):
+            for progress_idx in (None, 0):
+                fd._report_progress_status({'info_dict': {}, 'progress_idx': progress_idx}, 'progress')
+        # Without its own index, the progress is reported on the line of the downloader
+        self.assertEqual(lines, [1, 0])
+
+    def test_dl_concurrently_interrupted(self):
+        started, stopped = threading.Barrier(3, timeout=10), []
+
+        class _YDL(YoutubeDL):
+            def dl(self, name, info, subtitle=False, test=False, *, progress=None):
+                fd = FileDownloader(self, progress[0].params)
+                fd._share_status(*progress)
+                fd._progress_hooks = []
+                started.wait()
+                try:
+                    while True:
+                        fd._hook_progress({'status': 'downloading'}, info)
+                        time.sleep(0.01)
+                except DownloadCancelled:
+                    stopped.append(name)
+                    raise
+
+        join, joins = threading.Thread.join, []
+
+        def interrupted_join(thread, timeout=None):
+            joins.append(thread)
+            if len(joins) == 1:
+                started.wait()
+                raise KeyboardInterrupt
+            return join(thread, timeout)
+
+        ydl = _YDL({'quiet': True, 'noprogress': True})
+        with mock.patch.object(threading.Thread, 'join', interrupted_join):
+            with self.assertRaises(KeyboardInterrupt):
+                ydl._dl_concurrently([('video', {}), ('audio', {})])
+        # The downloads are stopped and waited for
+        self.assertEqual(sorted(stopped), ['audio', 'video'])
+
+    def test_post_processing_workers(self):
+        ydl = YoutubeDL({'quiet': True, 'postprocess_workers': 2})
+        event, order = threading.Event(), []
+
+        def post_process(name, wait=False):
+            if wait:
+                event.wait(10)
+            order.append(name)
+            return name
+
+        def move_files(name):
+            # The files are moved by the main thread
+            self.assertIs(threading.current_thread(), threading.main_thread())
+            order.append(f'move {name}')
+
+        ydl._run_post_processing(lambda: post_process('A', wait=True), move_files)
+        ydl._after_post_processing(lambda: order.append('archive A'))
+        ydl._run_post_processing(lambda: post_process('B'), move_files)
+        ydl._after_post_processing(lambda: order.append('archive B'))
+        ydl._pp_jobs[-1][0].result(10)
+        # The jobs are finished in order
+        ydl._collect_post_processing(max_pending=2)
+        self.assertEqual(order, ['B'])
+
+        event.set()
+        ydl._collect_post_processing()
+        self.assertEqual(order, ['B', 'A', 'move A', 'archive A', 'move B', 'archive B'])
+        self.assertFalse(ydl._pp_jobs)
+
+    def test_cancel_post_processing(self):
+        ydl = YoutubeDL({'quiet': True, 'postprocess_workers': 2})
+        event, order = threading.Event(), []
+
+        def post_process():
+            event.wait(10)
+            order.append('A')
+
+        def fail():
+            raise PostProcessingError('failed')
+
+        ydl._run_post_processing(post_process, lambda _: None)
+        ydl._after_post_processing(lambda: order.append('archive A'))
+        ydl._run_post_processing(fail, lambda _: None)
+        ydl._after_post_processing(lambda: order.append('archive B'))
+        ydl._pp_jobs.append((concurrent.futures.Future(), [lambda: order.append('archive C')]))
+        event.set()
+        # The videos that were post-processed successfully are still recorded
+        ydl._cancel_post_processing()
+        self.assertEqual(order, ['A', 'archive A'])
+        self.assertFalse(ydl._pp_jobs)
+
+    def test_extract_info_post_processing(self):
+        ydl = YoutubeDL({'quiet': True, 'postprocess_workers': 2})
+        order = []
+
+        def extract_info(*args):
+            ydl._run_post_processing(lambda: order.append('A'), lambda _: None)
+            ydl._after_post_processing(lambda: order.append('archive A'))
+            return {}
+
+        ydl._YoutubeDL__extract_info = extract_info
+        # The jobs are finished when extract_info is called directly
+        ydl.extract_info(TEST_URL, ie_key='Generic')
+        self.assertEqual(order, ['A', 'archive A'])
+        self.assertFalse(ydl._pp_jobs)
+
     def test_match_filter(self):
         first = {
             'id': '1',
@@ -9,9 +9,12 @@
 
 
 import shutil
+import time
+import unittest.mock
 
 from test.helper import FakeYDL
-from yt_dlp.cache import Cache
+from yt_dlp.cache import Cache, _JsonCacheBackend
+from yt_dlp.dependencies import sqlite3
 
 
 def _is_empty(d):
@@ -48,10 +51,112 @@ def test_cache(self):
         self.assertEqual(c.load('test_cache', 'k.'), obj)
         self.assertEqual(c.load('test_cache', 'y'), None)
         self.assertEqual(c.load('test_cache2', 'k.'), None)
+        c.store('test_cache', 'k2', obj)
+        c.delete('test_cache', 'k2')
+        self.assertEqual(c.load('test_cache', 'k2'), None)
+        c.delete('test_cache', 'k2')
+        self.assertEqual(c.load('test_cache', 'k.'), obj)
+        c.remove()
+        self.assertFalse(os.path.exists(self.test_dir))
+        self.assertEqual(c.load('test_cache', 'k.'), None)
+
+    @unittest.skipUnless(sqlite3, 'sqlite3 is not available')
+    def test_sqlite_cache(self):
+        ydl = FakeYDL({
+            'cachedir': self.test_dir,
+            'cache_backend': 'sqlite',
+        })
+        c = Cache(ydl)
+        obj = {'x': 1, 'y': ['ä', '\\a', True]}
+        c.store('test_cache', 'k.', obj)
+        c.store('test_cache', 'k2', obj)
+        c.delete('test_cache', 'k2')
+        self.assertEqual(os.listdir(self.test_dir), ['cache.sqlite3'])
+        # A new instance does not use the entries in memory
+        c = Cache(ydl)
+        self.assertEqual(c.load('test_cache', 'k.'), obj)
+        self.assertEqual(c.load('test_cache', 'k2'), None)
+        self.assertEqual(c.load('test_cache2', 'k.'), None)
         c.remove()
         self.assertFalse(os.path.exists(self.test_dir))
         self.assertEqual(c.load('test_cache', 'k.'), None)
 
+    def test_cache_memory(self):
+        c = Cache(FakeYDL({'cachedir': self.test_dir}))
+        c.store('test_cache', 'k', {'x': [1]})
+        obj = c.load('test_cache', 'k')
+        obj['x'].append(2)
+        self.assertEqual(c.load('test_cache', 'k'), {'x': [1]})
+        # The entries in memory are used without reading the files
+        shutil.rmtree(self.test_dir)
+        self.assertEqual(c.load('test_cache', 'k'), {'x': [1]})
+        c.delete('test_cache', 'k')
+        self.assertEqual(c.load('test_cache', 'k'), None)
+
+    def test_cache_ttl(self):
+        for backend in ('json', 'sqlite') if sqlite3 else ('json', ):
+            with self.subTest(backend=backend):
+                c = Cache(FakeYDL({
+                    'cachedir': self.test_dir,
+                    'cache_backend': backend,
+                    'cache_ttl': {'test_cache': -1},
+                }))
+                c.store('test_cache', 'k', 1)
+                c.store('test_cache', 'k2', 2, ttl=60)
+                c.store('test_cache2', 'k', 3)
+                self.assertEqual(c.load('test_cache', 'k'), None)
+                self.assertEqual(c.load('test_cache', 'k2'), 2)
+                self.assertEqual(c.load('test_cache2', 'k'), 3)
+                c.remove()
+
+    def test_cache_max_size(self):
+        for backend in ('json', 'sqlite') if sqlite3 else ('json', ):
+            with self.subTest(backend=backend):
+                ydl = FakeYDL({
+                    'cachedir': self.test_dir,
+                    'cache_backend': backend,
+                    'cache_max_size': 3500,
+                })
+                c = Cache(ydl)
+                for key in ('a', 'b', 'c'):
+                    c.store('test_cache', key, key * 1000)
+                    time.sleep(0.01)
+                self.assertEqual(Cache(ydl).load('test_cache', 'a'), 'a' * 1000)
+                time.sleep(0.01)
+                # The least recently used entry is evicted
+                c.store('test_cache', 'd', 'd' * 1000)
+                c = Cache(ydl)
+                self.assertEqual([c.load('test_cache', key) for key in 'abcd'], ['a' * 1000, None, 'c' * 1000, 'd' * 1000])
+                c.remove()
+
+    def test_cache_max_size_json(self):
+        ydl = FakeYDL({
+            'cachedir': self.test_dir,
+            'cache_max_size': 1500,
+        })
+        c = Cache(ydl)
+        _mkdir(self.test_dir)
+        other_file = os.path.join(self.test_dir, 'cache.sqlite3')
+        with open(other_file, 'w') as f:
+            f.write('x' * 10000)
+        with unittest.mock.patch.object(
+                _JsonCacheBackend, 'evict', autospec=True, side_effect=_JsonCacheBackend.evict) as evict:
+            for key in 'abc':
+                c.store('test_cache', key, key * 10)
+            # The cache is measured only once, until it may be larger than the max size
+            self.assertEqual(evict.call_count, 1)
+            time.sleep(0.01)
+            c.store('test_cache', 'd', 'd' * 1000)
+            self.assertEqual(evict.call_count, 1)
+            time.sleep(0.01)
+            c.store('test_cache', 'e', 'e' * 1000)
+            self.assertEqual(evict.call_count, 2)
+        # Only the entries are evicted
+        self.assertTrue(os.path.exists(other_file))
+        c = Cache(ydl)
+        self.assertEqual([c.load('test_cache', key) for key in 'de'], [None, 'e' * 1000])
+        c.remove()
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,509 @@
+#!/usr/bin/env python3
+
+# Allow direct execution
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+import http.server
+import json
+import re
+import struct
+import threading
+import time
+from unittest import mock
+
+from test.helper import http_server_port, try_rm
+from yt_dlp import YoutubeDL
+from yt_dlp.downloader import get_suitable_downloader
+from yt_dlp.aes import aes_cbc_encrypt_bytes
+from yt_dlp.downloader.dash import DashSegmentsFD
+from yt_dlp.downloader.external import FFmpegFD
+from yt_dlp.downloader.fragment import FragmentFD, FragmentProgress
+from yt_dlp.downloader.hls import HlsFD
+from yt_dlp.downloader.http import HttpFD
+from yt_dlp.postprocessor.mp4mux import iter_boxes
+from yt_dlp.utils import encodeFilename
+
+TEST_FRAGMENT_COUNT = 20
+TEST_FRAGMENT_SIZE = 1024
+TEST_KEY = bytes(range(16))
+
+
+def fragment_content(index):
+    return bytes([index]) * TEST_FRAGMENT_SIZE
+
+
+def sidx_file():
+    # An initialization segment, a segment index and the segments of a single-file DASH representation
+    init = b'I' * 100
+    references = b''.join(struct.pack('>III', TEST_FRAGMENT_SIZE, 1000, 1 << 31) for _ in range(TEST_FRAGMENT_COUNT))
+    payload = struct.pack('>B3xIIIIHH', 0, 1, 1000, 0, 0, 0, TEST_FRAGMENT_COUNT) + references
+    sidx = struct.pack('>I4s', 8 + len(payload), b'sidx') + payload
+    return init, sidx, init + sidx + b''.join(map(fragment_content, range(1, TEST_FRAGMENT_COUNT + 1)))
+
+
+def live_playlist(request_count):
+    # Every refresh adds 3 segments to a window of 5, and the stream ends at TEST_FRAGMENT_COUNT
+    last = min(3 + request_count * 3, TEST_FRAGMENT_COUNT)
+    first = max(1, last - 4)
+    lines = ['#EXTM3U', '#EXT-X-TARGETDURATION:0.1', f'#EXT-X-MEDIA-SEQUENCE:{first}']
+    for i in range(first, last + 1):
+        lines.extend(['#EXTINF:0.1,', f'frag{i}'])
+    if last == TEST_FRAGMENT_COUNT:
+        lines.append('#EXT-X-ENDLIST')
+    return '\n'.join(lines).encode()
+
+
+def live_mpd(start_time):
+    # Segments of 0.5s that are published from start_time, and the stream ends after 4s
+    is_live = time.time() - start_time < 4
+    availability_start_time = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(start_time))
+    return (
+        '<?xml version="1.0"?>'
+        '<MPD xmlns="urn:mpeg:dash:schema:mpd:2011" '
+        + (f'type="dynamic" availabilityStartTime="{availability_start_time}" minimumUpdatePeriod="PT1S"' if is_live
+           else 'type="static" mediaPresentationDuration="PT4S"')
+        + '><Period id="0" start="PT0S"><AdaptationSet mimeType="video/mp4">'
+        '<SegmentTemplate timescale="10" duration="5" startNumber="1" media="frag$Number$" initialization="init"/>'
+        '<Representation id="video-1" codecs="avc1.4d401f" bandwidth="100000"/>'
+        # A representation whose format_id is a suffix of that of the recorded one
+        '</AdaptationSet><AdaptationSet mimeType="video/mp4">'
+        '<SegmentTemplate timescale="10" duration="5" startNumber="100" media="frag$Number$" initialization="init"/>'
+        '<Representation id="1" codecs="avc1.4d401f" bandwidth="50000"/>'
+        '</AdaptationSet></Period></MPD>').encode()
+
+
+def ts_packets(pid, payload):
+    # The last packet is padded with the stuffing bytes of an adaptation field
+    packets = b''
+    for i, pos in enumerate(range(0, len(payload), 184)):
+        chunk = payload[pos:pos + 184]
+        stuffing = 183 - len(chunk)
+        adaptation_field = b'' if stuffing < 0 else bytes([stuffing]) + (b'\x00' + b'\xff' * (stuffing - 1) if stuffing else b'')
+        packets += struct.pack('>BHB', 0x47, (0x4000 if i == 0 else 0) | pid, (0x30 if adaptation_field else 0x10) | (i & 0xf))
+        packets += adaptation_field + chunk
+    return packets
+
+
+def pes_timestamp(prefix, timestamp):
+    return bytes([
+        (prefix << 4) | (((timestamp >> 30) & 0x7) << 1) | 1, (timestamp >> 22) & 0xff,
+        (((timestamp >> 15) & 0x7f) << 1) | 1, (timestamp >> 7) & 0xff, ((timestamp & 0x7f) << 1) | 1])
+
+
+# H.264 constrained baseline 320x240, and AAC-LC 44100Hz stereo
+TEST_SPS = b'\x67\x42\xc0\x1e' + int('11110100000010100000111111001'.ljust(32, '0'), 2).to_bytes(4, 'big')
+TEST_PPS = b'\x68\xce\x3c\x80'
+
+
+def mpegts_segment(index):
+    # 3 video frames (the first one is a keyframe) and 4 audio frames per segment of 0.1s
+    pat = struct.pack('>BBHHBBBHH4x', 0, 0, 0xb00d, 1, 0xc1, 0, 0, 1, 0xf000)
+    pmt = struct.pack('>BBHHBBBHHBHHBHH4x', 0, 2, 0xb017, 1, 0xc1, 0, 0, 0xe100, 0xf000,
+                      0x1b, 0xe100, 0xf000, 0x0f, 0xe101, 0xf000)
+    segment = ts_packets(0, pat) + ts_packets(0x1000, pmt)
+    for i in range(3):
+        dts = 1000 + index * 9000 + i * 3000
+        access_unit = b'\x00\x00\x00\x01\x09\xf0'
+        if i == 0:
+            access_unit += b''.join(b'\x00\x00\x00\x01' + nal_unit for nal_unit in (TEST_SPS, TEST_PPS, b'\x65' + bytes(100)))
+        else:
+            access_unit += b'\x00\x00\x00\x01\x41' + bytes([index, i]) * 50
+        segment += ts_packets(0x100, b'\x00\x00\x01\xe0\x00\x00\x80\xc0\x0a'
+                              + pes_timestamp(3, dts + 3000) + pes_timestamp(1, dts) + access_unit)
+    frames = b''.join(
+        struct.pack('>BBBBBBB', 0xff, 0xf1, 0x50, 0x80 | (27 >> 11), (27 >> 3) & 0xff, ((27 & 0x7) << 5) | 0x1f, 0xfc)
+        + bytes([index]) * 20 for _ in range(4))
+    segment += ts_packets(0x101, b'\x00\x00\x01\xc0' + struct.pack('>H', len(frames) + 8) + b'\x80\x80\x05'
+                          + pes_timestamp(2, 1000 + index * 9000) + frames)
+    return segment
+
+
+class HTTPTestRequestHandler(http.server.BaseHTTPRequestHandler):
+    requested = []
+    playlist_requests = 0
+    key_requests = 0
+    mpd_started = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == '/live.m3u8':
+            playlist = live_playlist(HTTPTestRequestHandler.playlist_requests)
+            HTTPTestRequestHandler.playlist_requests += 1
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/vnd.apple.mpegurl')
+            self.send_header('Content-Length', len(playlist))
+            self.end_headers()
+            self.wfile.write(playlist)
+            return
+        if self.path == '/live.mpd':
+            if HTTPTestRequestHandler.mpd_started is None:
+                HTTPTestRequestHandler.mpd_started = int(time.time())
+            mpd = live_mpd(HTTPTestRequestHandler.mpd_started)
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/dash+xml')
+            self.send_header('Content-Length', len(mpd))
+            self.end_headers()
+            self.wfile.write(mpd)
+            return
+        if self.path in ('/media', '/sidx.mp4'):
+            # All fragments in a single file, served by byte range
+            start, end = map(int, re.match(r'bytes=(\d+)-(\d+)', self.headers['Range']).groups())
+            self.requested.append((start, end))
+            content = (sidx_file()[2] if self.path == '/sidx.mp4'
+                       else b''.join(map(fragment_content, range(1, TEST_FRAGMENT_COUNT + 1))))[start:end + 1]
+            self.send_response(206)
+            self.send_header('Content-Type', 'video/mp4')
+            self.send_header('Content-Length', len(content))
+            self.end_headers()
+            self.wfile.write(content)
+            return
+        if self.path.split('?')[0] == '/key':
+            HTTPTestRequestHandler.key_requests += 1
+            self.send_response(200)
+            self.send_header('Content-Length', len(TEST_KEY))
+            self.end_headers()
+            self.wfile.write(TEST_KEY)
+            return
+        if self.path == '/enc.m3u8' or self.path.startswith('/enc'):
+            # The segments are padded with PKCS#7, and their IV is their media sequence number
+            content = ('\n'.join(['#EXTM3U', '#EXT-X-TARGETDURATION:1', '#EXT-X-KEY:METHOD=AES-128,URI="key"', *(
+                f'#EXTINF:0.1,\nenc{i}' for i in range(1, TEST_FRAGMENT_COUNT + 1)), '#EXT-X-ENDLIST']).encode()
+                if self.path == '/enc.m3u8' else aes_cbc_encrypt_bytes(
+                    fragment_content(int(self.path[4:])) + b'\x10' * 16, TEST_KEY, struct.pack('>8xq', int(self.path[4:]) - 1)))
+            self.send_response(200)
+            self.send_header('Content-Length', len(content))
+            self.end_headers()
+            self.wfile.write(content)
+            return
+        if self.path.startswith('/ts'):
+            # The last segment of /ts_corrupt.m3u8 is not MPEG-TS, and that of /ts_discontinuity.m3u8 follows a discontinuity
+            last = {
+                '/ts_corrupt.m3u8': '#EXTINF:0.1,\nts{}?corrupt',
+                '/ts_discontinuity.m3u8': '#EXT-X-DISCONTINUITY\n#EXTINF:0.1,\nts{}',
+            }.get(self.path, '#EXTINF:0.1,\nts{}')
+            index, _, query = self.path[3:].partition('?')
+            content = ('\n'.join(['#EXTM3U', '#EXT-X-TARGETDURATION:1', *(
+                f'#EXTINF:0.1,\nts{i}' for i in range(TEST_FRAGMENT_COUNT - 1)),
+                last.format(TEST_FRAGMENT_COUNT - 1), '#EXT-X-ENDLIST']).encode()
+                if self.path.endswith('.m3u8') else b'corrupt' * 100 if query else mpegts_segment(int(index)))
+            self.send_response(200)
+            self.send_header('Content-Length', len(content))
+            self.end_headers()
+            self.wfile.write(content)
+            return
+        index = 0 if self.path == '/init' else int(self.path[5:])
+        self.requested.append(index)
+        self.send_response(200)
+        self.send_header('Content-Type', 'video/mp4')
+        self.send_header('Content-Length', TEST_FRAGMENT_SIZE)
+        self.end_headers()
+        self.wfile.write(fragment_content(index))
+
+
+class FakeLogger:
+    def debug(self, msg):
+        pass
+
+    def warning(self, msg):
+        pass
+
+    def error(self, msg):
+        pass
+
+
+class TestFragmentFD(unittest.TestCase):
+    def setUp(self):
+        self.httpd = http.server.HTTPServer(
+            ('127.0.0.1', 0), HTTPTestRequestHandler)
+        self.port = http_server_port(self.httpd)
+        self.server_thread = threading.Thread(target=self.httpd.serve_forever)
+        self.server_thread.daemon = True
+        self.server_thread.start()
+        HTTPTestRequestHandler.requested = []
+        HTTPTestRequestHandler.playlist_requests = 0
+        HTTPTestRequestHandler.key_requests = 0
+        HTTPTestRequestHandler.mpd_started = None
+        self.filename = 'testfile.mp4'
+        self.tearDown()
+
+    def tearDown(self):
+        try_rm(encodeFilename(self.filename))
+        try_rm(encodeFilename(self.filename + '.part'))
+        try_rm(encodeFilename(self.filename + '.ytdl'))
+        for i in range(1, TEST_FRAGMENT_COUNT + 1):
+            try_rm(encodeFilename(f'{self.filename}.part-Frag{i}'))
+
+    def download(self, params, progress_hook=None):
+        params['logger'] = FakeLogger()
+        downloader = DashSegmentsFD(YoutubeDL(params), params)
+        if progress_hook:
+            downloader.add_progress_hook(progress_hook)
+        self.assertTrue(downloader.real_download(self.filename, {
+            'url': f'http://127.0.0.1:{self.port}/',
+            'protocol': 'http_dash_segments',
+            'fragment_base_url': f'http://127.0.0.1:{self.port}/',
+            'fragments': [{'path': f'frag{i}'} for i in range(1, TEST_FRAGMENT_COUNT + 1)],
+        }))
+        with open(encodeFilename(self.filename), 'rb') as f:
+            self.assertEqual(f.read(), b''.join(map(fragment_content, range(1, TEST_FRAGMENT_COUNT + 1))))
+
+    def download_byte_ranges(self, params):
+        params['logger'] = FakeLogger()
+        downloader = DashSegmentsFD(YoutubeDL(params), params)
+        self.assertTrue(downloader.real_download(self.filename, {
+            'url': f'http://127.0.0.1:{self.port}/media',
+            'protocol': 'http_dash_segments',
+            'fragments': [{
+                'url': f'http://127.0.0.1:{self.port}/media',
+                'byte_range': {'start': i * TEST_FRAGMENT_SIZE, 'end': (i + 1) * TEST_FRAGMENT_SIZE},
+            } for i in range(TEST_FRAGMENT_COUNT)],
+        }))
+        with open(encodeFilename(self.filename), 'rb') as f:
+            self.assertEqual(f.read(), b''.join(map(fragment_content, range(1, TEST_FRAGMENT_COUNT + 1))))
+        return sorted(HTTPTestRequestHandler.requested)
+
+    def test_coalesce_byte_ranges(self):
+        requested = self.download_byte_ranges({'fragment_coalesce_size': 8 * TEST_FRAGMENT_SIZE})
+        self.assertEqual(requested, [
+            (i * TEST_FRAGMENT_SIZE, min(i + 8, TEST_FRAGMENT_COUNT) * TEST_FRAGMENT_SIZE - 1)
+            for i in range(0, TEST_FRAGMENT_COUNT, 8)])
+
+    def test_concurrent_coalesce_byte_ranges(self):
+        requested = self.download_byte_ranges({
+            'fragment_coalesce_size': 8 * TEST_FRAGMENT_SIZE, 'concurrent_fragment_downloads': 2})
+        self.assertEqual(len(requested), 3)
+
+    def test_no_coalesce_byte_ranges(self):
+        requested = self.download_byte_ranges({'fragment_coalesce_size': 0})
+        self.assertEqual(len(requested), TEST_FRAGMENT_COUNT)
+
+    def test_sidx_download(self):
+        init, sidx, content = sidx_file()
+        info_dict = {
+            'url': f'http://127.0.0.1:{self.port}/sidx.mp4',
+            'protocol': 'http',
+            '_index_range': {'start': len(init), 'end': len(init) + len(sidx)},
+        }
+        params = {'logger': FakeLogger(), 'concurrent_fragment_downloads': 4, 'fragment_coalesce_size': 0}
+        self.assertEqual(get_suitable_downloader(info_dict, {}), HttpFD)
+        self.assertEqual(get_suitable_downloader(info_dict, params), DashSegmentsFD)
+
+        downloader = DashSegmentsFD(YoutubeDL(params), params)
+        self.assertTrue(downloader.real_download(self.filename, info_dict))
+        with open(encodeFilename(self.filename), 'rb') as f:
+            self.assertEqual(f.read(), content)
+        self.assertEqual(HTTPTestRequestHandler.requested[0], (len(init), len(init) + len(sidx) - 1))
+        self.assertIn((0, len(init) + len(sidx) - 1), HTTPTestRequestHandler.requested)
+        self.assertEqual(len(HTTPTestRequestHandler.requested), 2 + TEST_FRAGMENT_COUNT)
+
+    def test_fragment_bitmap(self):
+        indices = {6, 7, 13, 30}
+        encoded = FragmentFD._encode_fragment_bitmap(indices | {2, 5}, 5)
+        self.assertEqual(FragmentFD._decode_fragment_bitmap(encoded, 5), indices)
+        self.assertEqual(FragmentFD._encode_fragment_bitmap(set(), 5), '')
+
+    def test_download(self):
+        self.download({})
+        self.assertEqual(HTTPTestRequestHandler.requested, list(range(1, TEST_FRAGMENT_COUNT + 1)))
+
+    def test_concurrent_download(self):
+        self.download({'concurrent_fragment_downloads': 4})
+        self.assertEqual(sorted(HTTPTestRequestHandler.requested), list(range(1, TEST_FRAGMENT_COUNT + 1)))
+
+    def test_concurrent_progress(self):
+        statuses = []
+        self.download(
+            {'concurrent_fragment_downloads': 4},
+            lambda s: statuses.append((s['status'], s.get('downloaded_bytes'), s.get('fragment_index'))))
+        downloading = [s for s in statuses if s[0] == 'downloading']
+        self.assertEqual(downloading, sorted(downloading, key=lambda s: s[1]))
+        self.assertEqual(downloading[-1][1:], (TEST_FRAGMENT_COUNT * TEST_FRAGMENT_SIZE, TEST_FRAGMENT_COUNT))
+        self.assertEqual(statuses[-1][:2], ('finished', TEST_FRAGMENT_COUNT * TEST_FRAGMENT_SIZE))
+
+    def test_fragment_progress(self):
+        progress = FragmentProgress(resume_len=100, fragment_index=1)
+        barrier = threading.Barrier(4)
+
+        def worker():
+            for _ in range(5):
+                progress.update('downloading', 10, 50)
+                progress.update('downloading', 40, 50)
+                progress.update('finished', total_bytes=50)
+            # Keep the threads alive so that their identifiers are not reused
+            barrier.wait()
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(progress.downloaded_bytes, 100 + 4 * 5 * 50)
+        self.assertEqual(progress.completed_bytes, 100 + 4 * 5 * 50)
+        self.assertEqual(progress.fragment_index, 1 + 4 * 5)
+        self.assertEqual(len(progress.workers()), 4)
+        self.assertEqual(sum(w['fragments'] for w in progress.workers()), 4 * 5)
+
+    def test_resume_out_of_order(self):
+        appended, completed = 5, {7, 8, 15}
+        with open(encodeFilename(self.filename + '.part'), 'wb') as f:
+            f.write(b''.join(map(fragment_content, range(1, appended + 1))))
+            # Data of a fragment that was written but not recorded in the state file
+            f.write(fragment_content(appended + 1)[:100])
+        for i in completed:
+            with open(encodeFilename(f'{self.filename}.part-Frag{i}'), 'wb') as f:
+                f.write(fragment_content(i))
+        with open(encodeFilename(self.filename + '.ytdl'), 'w') as f:
+            json.dump({'downloader': {
+                'current_fragment': {'index': appended, 'offset': appended * TEST_FRAGMENT_SIZE},
+                'completed_fragments': FragmentFD._encode_fragment_bitmap(completed, appended),
+            }}, f)
+
+        self.download({'concurrent_fragment_downloads': 4})
+        self.assertEqual(
+            sorted(HTTPTestRequestHandler.requested),
+            [i for i in range(appended + 1, TEST_FRAGMENT_COUNT + 1) if i not in completed])
+        self.assertFalse(os.path.exists(encodeFilename(self.filename + '.ytdl')))
+
+    def test_resume_extra_state(self):
+        params = {'logger': FakeLogger()}
+        downloader = FragmentFD(YoutubeDL(params), params)
+        ctx = {'filename': self.filename, 'total_frags': TEST_FRAGMENT_COUNT, 'fragment_workers': 2}
+        downloader._prepare_frag_download(ctx)
+        ctx.update({'extra_state': {'packed': 1}, 'fragment_index': 1})
+        downloader._append_fragment(ctx, fragment_content(1))
+        # The state is changed by pack_func before the next fragment is appended
+        ctx['extra_state']['packed'] = 2
+        downloader._mark_fragment_completed(ctx, 3)
+        ctx['dest_stream'].close()
+        with open(encodeFilename(self.filename + '.ytdl')) as f:
+            state = json.load(f)['downloader']
+        self.assertEqual(state['current_fragment'], {'index': 1, 'offset': TEST_FRAGMENT_SIZE})
+        self.assertEqual(state['extra_state'], {'packed': 1})
+
+    def download_live_hls(self, params):
+        params['logger'] = FakeLogger()
+        downloader = HlsFD(YoutubeDL(params), params)
+        self.assertTrue(downloader.real_download(self.filename, {
+            'url': f'http://127.0.0.1:{self.port}/live.m3u8',
+            'protocol': 'm3u8_native',
+            'ext': 'mp4',
+            'is_live': True,
+        }))
+        with open(encodeFilename(self.filename), 'rb') as f:
+            self.assertEqual(f.read(), b''.join(map(fragment_content, range(1, TEST_FRAGMENT_COUNT + 1))))
+        self.assertEqual(sorted(HTTPTestRequestHandler.requested), list(range(1, TEST_FRAGMENT_COUNT + 1)))
+        self.assertEqual(HTTPTestRequestHandler.playlist_requests, 7)
+
+    def test_live_hls(self):
+        self.download_live_hls({})
+
+    def test_concurrent_live_hls(self):
+        self.download_live_hls({'concurrent_fragment_downloads': 4})
+
+    def test_hls_mpegts_remux(self):
+        params = {'logger': FakeLogger(), 'concurrent_fragment_downloads': 2}
+        downloader = HlsFD(YoutubeDL(params), params)
+        self.assertTrue(downloader.real_download(self.filename, {
+            'url': f'http://127.0.0.1:{self.port}/ts.m3u8',
+            'protocol': 'm3u8_native',
+            'ext': 'mp4',
+        }))
+        with open(encodeFilename(self.filename), 'rb') as f:
+            boxes = list(iter_boxes(f.read()))
+        self.assertEqual([box_type for box_type, _ in boxes[:2]], [b'ftyp', b'moov'])
+        self.assertEqual([box_type for box_type, _ in boxes[2:]], [b'moof', b'mdat'] * TEST_FRAGMENT_COUNT)
+
+        avc1 = boxes[1][1][boxes[1][1].index(b'avc1') + 4:]
+        self.assertEqual(struct.unpack_from('>HH', avc1, 24), (320, 240))
+        self.assertIn(TEST_SPS, avc1)
+        self.assertIn(b'\x05\x02\x12\x10', boxes[1][1])  # AudioSpecificConfig of AAC-LC 44100Hz stereo
+
+        for index in range(TEST_FRAGMENT_COUNT):
+            moof, mdat = boxes[2 + 2 * index][1], boxes[3 + 2 * index][1]
+            video, audio = [traf for box_type, traf in iter_boxes(moof) if box_type == b'traf']
+            self.assertEqual(struct.unpack_from('>Q', video, video.index(b'tfdt') + 8)[0], index * 9000)
+            self.assertEqual(struct.unpack_from('>Q', audio, audio.index(b'tfdt') + 8)[0], index * 4410)
+            trun = video[video.index(b'trun') + 4:]
+            self.assertEqual(struct.unpack_from('>I', trun, 4)[0], 3)
+            duration, size, flags, composition_offset = struct.unpack_from('>IIII', trun, 12)
+            self.assertEqual((duration, flags, composition_offset), (3000, 0x02000000, 3000))
+            self.assertEqual(mdat[:4 + len(b'\x09\xf0')], struct.pack('>I', 2) + b'\x09\xf0')
+            self.assertEqual(len(mdat), size + 2 * (4 + 2 + 4 + 101) + 4 * 20)
+
+    def test_hls_mpegts_remux_fallback(self):
+        expected = b''.join(map(mpegts_segment, range(TEST_FRAGMENT_COUNT - 1)))
+        for path, last_segment in (
+            ('ts_discontinuity.m3u8', mpegts_segment(TEST_FRAGMENT_COUNT - 1)),
+            # The stream is downloaded again without remuxing it
+            ('ts_corrupt.m3u8', b'corrupt' * 100),
+        ):
+            with self.subTest(path=path):
+                params = {'logger': FakeLogger(), 'concurrent_fragment_downloads': 2}
+                downloader = HlsFD(YoutubeDL(params), params)
+                self.assertTrue(downloader.real_download(self.filename, {
+                    'url': f'http://127.0.0.1:{self.port}/{path}',
+                    'protocol': 'm3u8_native',
+                    'ext': 'mp4',
+                }))
+                with open(encodeFilename(self.filename), 'rb') as f:
+                    self.assertEqual(f.read(), expected + last_segment)
+                self.tearDown()
+
+    def test_encrypted_hls(self):
+        params = {'logger': FakeLogger(), 'concurrent_fragment_downloads': 4}
+        ydl = YoutubeDL(params)
+        # The formats are downloaded natively even without pycryptodomex
+        with mock.patch.object(FFmpegFD, 'available', lambda *_: False):
+            for video_id, format_id in (('a', 'v1'), ('a', 'v2'), ('b', 'v1')):
+                self.assertTrue(HlsFD(ydl, params).real_download(self.filename, {
+                    'id': video_id,
+                    'format_id': format_id,
+                    'url': f'http://127.0.0.1:{self.port}/enc.m3u8',
+                    'protocol': 'm3u8_native',
+                    'ext': 'ts',
+                }))
+                with open(encodeFilename(self.filename), 'rb') as f:
+                    self.assertEqual(f.read(), b''.join(map(fragment_content, range(1, TEST_FRAGMENT_COUNT + 1))))
+                self.tearDown()
+        # The key is shared by the formats of the same video, but not with another video
+        self.assertEqual(HTTPTestRequestHandler.key_requests, 2)
+
+    def test_key_cache_size(self):
+        params = {'logger': FakeLogger()}
+        ydl = YoutubeDL(params)
+        downloader = HlsFD(ydl, params)
+        with mock.patch.object(HlsFD, '_KEY_CACHE_SIZE', 2):
+            for path in ('key', 'key?1', 'key?2', 'key'):
+                self.assertEqual(downloader._get_key({'id': 'video'}, f'http://127.0.0.1:{self.port}/{path}'), TEST_KEY)
+        self.assertEqual(len(FragmentFD._key_cache[ydl]), 2)
+        # The least recently used key was evicted
+        self.assertEqual(HTTPTestRequestHandler.key_requests, 4)
+
+    def test_live_dash(self):
+        params = {'logger': FakeLogger(), 'concurrent_fragment_downloads': 2}
+        downloader = DashSegmentsFD(YoutubeDL(params), params)
+        self.assertTrue(downloader.real_download(self.filename, {
+            'format_id': 'dash-video-1',
+            '_representation_id': 'video-1',
+            'url': f'http://127.0.0.1:{self.port}/live.mpd',
+            'manifest_url': f'http://127.0.0.1:{self.port}/live.mpd',
+            'protocol': 'http_dash_segments',
+            'ext': 'mp4',
+            'is_live': True,
+            'fragments': [],
+        }))
+        requested = sorted(HTTPTestRequestHandler.requested)
+        self.assertEqual(requested, [0, *range(requested[1], 9)])
+        with open(encodeFilename(self.filename), 'rb') as f:
+            self.assertEqual(f.read(), b''.join(map(fragment_content, requested)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -179,6 +179,11 @@ def test_switch_default(self):
         self.assertEqual(jsi.call_function('f', 5), 11)
         self.assertEqual(jsi.call_function('f', 9), 14)
 
+    def test_switch_return(self):
+        jsi = JSInterpreter('function f(x) { switch(x){ case 1: return 10; default: x+=5 } return x }')
+        self.assertEqual(jsi.call_function('f', 1), 10)
+        self.assertEqual(jsi.call_function('f', 2), 7)
+
     def test_try(self):
         self._test('function f() { try{return 10} catch(e){return 5} }', 10)
 
@@ -217,6 +222,9 @@ def test_comma(self):
         self._test('function f() { a=5; return (a -= 1, a+=3, a); }', 7)
         self._test('function f() { return (l=[0,1,2,3], function(a, b){return a+b})((l[1], l[2]), l[3]) }', 5)
 
+    def test_increment(self):
+        self._test('function f() { var a = 1, b = 5; return [a++ + --b, a, b] }', [5, 2, 4])
+
     def test_void(self):
         self._test('function f() { return void 42; }', None)
 
@@ -328,6 +336,14 @@ def test_negative(self):
         self._test('function f(){return 2    -    + + - -2;}', 0)
         self._test('function f(){return 2    +    - + - -2;}', 0)
 
+    def test_repeated_calls(self):
+        # The code is compiled once, but the state of the calls must not be kept
+        jsi = JSInterpreter('''function f(a){var b = "abc".split(""), c = [1, 2]; for (var i = 0; i < a; i++) {
+            b.push(b[i]); c[0] = c[0] * 2} return [b.join(""), c]}''')
+        for _ in range(2):
+            self.assertEqual(jsi.call_function('f', 3), ['abcabc', [8, 2]])
+        self.assertEqual(jsi.call_function('f', 1), ['abca', [2, 2]])
+
     @unittest.skip('Not implemented')
     def test_packed(self):
         jsi = JSInterpreter('''function f(p,a,c,k,e,d){while(c--)if(k[c])p=p.replace(new RegExp('\\b'+c.toString(a)+'\\b','g'),k[c]);return p}''')
@@ -8,16 +8,33 @@
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 
+import io
+import json
+import stat
+import struct
+import tempfile
+import time
+
 from yt_dlp import YoutubeDL
-from yt_dlp.compat import compat_shlex_quote
+from yt_dlp.compat import compat_os_name, compat_shlex_quote
+from yt_dlp.downloader.ism import box, full_box, write_piff_header
 from yt_dlp.postprocessor import (
     ExecPP,
+    FFmpegEmbedSubtitlePP,
+    FFmpegFixupStretchedPP,
+    FFmpegMergerPP,
+    FFmpegMetadataPP,
+    FFmpegPostProcessor,
+    FFmpegSplitChaptersPP,
     FFmpegThumbnailsConvertorPP,
     MetadataFromFieldPP,
     MetadataParserPP,
     ModifyChaptersPP,
+    PostProcessor,
     SponsorBlockPP,
 )
+from yt_dlp.postprocessor.mp4mux import iter_boxes, mux_fragmented_mp4
+from yt_dlp.utils import prepend_extension
 
 
 class TestMetadataFromField(unittest.TestCase):
@@ -61,6 +78,321 @@ def test_escaping(self):
             os.remove(file.format(out))
 
 
+# Stand-in for ffmpeg that concatenates its "pipe:N" inputs into its output
+FAKE_FFMPEG = f'''#!{sys.executable}
+import os, sys
+args = sys.argv[1:]
+if '-i' not in args:
+    sys.exit(print('ffmpeg version 6.0'))
+with open(args[-1][len('file:'):], 'wb') as out:
+    for i, arg in enumerate(args):
+        if arg == '-i':
+            with os.fdopen(int(args[i + 1][len('pipe:'):]), 'rb') as f:
+                out.write(f.read())
+'''
+
+
+@unittest.skipIf(compat_os_name == 'nt', 'Streaming merge is not supported on Windows')
+class TestFFmpegMergerPP(unittest.TestCase):
+    def test_stream_merge(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            ffmpeg = os.path.join(tmpdir, 'ffmpeg')
+            with open(ffmpeg, 'w') as f:
+                f.write(FAKE_FFMPEG)
+            os.chmod(ffmpeg, os.stat(ffmpeg).st_mode | stat.S_IEXEC)
+            pp = FFmpegMergerPP(YoutubeDL({'ffmpeg_location': ffmpeg, 'quiet': True}))
+
+            filename = os.path.join(tmpdir, 'video.mp4')
+            parts = [os.path.join(tmpdir, f'video.f{i}.mp4') for i in range(2)]
+            info = {'requested_formats': [
+                {'filepath': parts[0], 'protocol': 'https', 'vcodec': 'avc1', 'acodec': 'none'},
+                {'filepath': parts[1], 'protocol': 'https', 'vcodec': 'none', 'acodec': 'mp4a.40.2'},
+            ]}
+            self.assertTrue(pp.start_streaming(info, filename))
+            contents = [os.urandom(100000), os.urandom(50000)]
+            for part, content in zip(parts, contents):
+                with open(part + '.part', 'wb') as f:
+                    for i in range(0, len(content), 10000):
+                        f.write(content[i:i + 10000])
+                        f.flush()
+                        time.sleep(0.01)
+                os.rename(part + '.part', part)
+            self.assertTrue(pp.finish_streaming(True))
+
+            pp.run({**info, 'filepath': filename, '__files_to_merge': parts})
+            with open(filename, 'rb') as f:
+                self.assertEqual(f.read(), b''.join(contents))
+
+    def test_stream_merge_restarted_download(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            ffmpeg = os.path.join(tmpdir, 'ffmpeg')
+            with open(ffmpeg, 'w') as f:
+                f.write(FAKE_FFMPEG)
+            os.chmod(ffmpeg, os.stat(ffmpeg).st_mode | stat.S_IEXEC)
+            pp = FFmpegMergerPP(YoutubeDL({'ffmpeg_location': ffmpeg, 'quiet': True, 'no_warnings': True}))
+
+            filename = os.path.join(tmpdir, 'video.mp4')
+            part = os.path.join(tmpdir, 'video.f0.mp4')
+            info = {'requested_formats': [
+                {'filepath': part, 'protocol': 'https', 'vcodec': 'avc1', 'acodec': 'mp4a.40.2'},
+            ]}
+            self.assertTrue(pp.start_streaming(info, filename))
+            with open(part + '.part', 'wb') as f:
+                f.write(os.urandom(10000))
+            time.sleep(0.5)
+            # The download is restarted from scratch with other data
+            with open(part + '.part', 'wb') as f:
+                f.write(os.urandom(20000))
+            os.rename(part + '.part', part)
+            self.assertFalse(pp.finish_streaming(True))
+            self.assertFalse(os.path.exists(prepend_extension(filename, 'temp')))
+
+
+# Stand-in for ffmpeg that logs its arguments and copies its first input to its output
+FAKE_COPY_FFMPEG = f'''#!{sys.executable}
+import json, os, shutil, sys
+args = sys.argv[1:]
+if '-i' not in args:
+    sys.exit(print('ffmpeg version 6.0'))
+with open(os.path.join(os.path.dirname(sys.argv[0]), 'log'), 'a') as f:
+    f.write(json.dumps(args) + '\\n')
+shutil.copyfile(args[args.index('-i') + 1][len('file:'):], args[-1][len('file:'):])
+'''
+
+
+# Stand-in for ffmpeg that logs the detections of its version
+FAKE_VERSION_FFMPEG = f'''#!{sys.executable}
+import os
+with open(os.path.join(os.path.dirname(__file__), 'log'), 'a') as f:
+    f.write('ffmpeg\\n')
+print('ffmpeg version 6.0')
+'''
+
+
+# Stand-in for ffprobe that logs its runs
+FAKE_FFPROBE = f'''#!{sys.executable}
+import json, os, sys
+args = sys.argv[1:]
+if '-print_format' not in args:
+    sys.exit(print('ffprobe version 6.0'))
+with open(os.path.join(os.path.dirname(sys.argv[0]), 'probe_log'), 'a') as f:
+    f.write(args[-1] + '\\n')
+print(json.dumps({{'streams': [{{'codec_type': 'audio', 'codec_name': 'aac'}}], 'format': {{'duration': '10.0'}}}}))
+'''
+
+
+class TestFFmpegPostProcessor(unittest.TestCase):
+    def test_probe_cache(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for name, script in (('ffmpeg', FAKE_COPY_FFMPEG), ('ffprobe', FAKE_FFPROBE)):
+                path = os.path.join(tmpdir, name)
+                with open(path, 'w') as f:
+                    f.write(script)
+                os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+            pp = FFmpegPostProcessor(YoutubeDL({'ffmpeg_location': tmpdir, 'quiet': True}))
+
+            def probe_count():
+                with open(os.path.join(tmpdir, 'probe_log')) as f:
+                    return len(f.readlines())
+
+            filename = os.path.join(tmpdir, 'video.mp4')
+            with open(filename, 'wb') as f:
+                f.write(b'content')
+            self.assertEqual(pp._get_real_video_duration(filename), 10.0)
+            self.assertEqual(pp.get_audio_codec(filename), 'aac')
+            self.assertEqual(pp.get_stream_number(filename, ('codec_type', ), 'audio'), (0, 1))
+            self.assertEqual(probe_count(), 1)
+
+            # Rewriting the file invalidates the cache, even if its size and mtime are kept
+            mtime = os.stat(filename).st_mtime
+            pp.run_ffmpeg(filename, filename + '.temp', [])
+            os.replace(filename + '.temp', filename)
+            os.utime(filename, (mtime, mtime))
+            self.assertEqual(pp.get_audio_codec(filename), 'aac')
+            self.assertEqual(probe_count(), 2)
+
+    def test_version_cache(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            ffmpeg = os.path.join(tmpdir, 'ffmpeg')
+            with open(ffmpeg, 'w') as f:
+                f.write(FAKE_VERSION_FFMPEG)
+            os.chmod(ffmpeg, os.stat(ffmpeg).st_mode | stat.S_IEXEC)
+            ydl = YoutubeDL({'ffmpeg_location': ffmpeg, 'cachedir': tmpdir, 'quiet': True})
+
+            def get_version():
+                FFmpegPostProcessor._version_cache.pop(ffmpeg, None)
+                FFmpegPostProcessor._features_cache.pop(ffmpeg, None)
+                version = FFmpegPostProcessor(ydl)._version
+                with open(os.path.join(tmpdir, 'log')) as f:
+                    return version, len(f.readlines())
+
+            self.assertEqual(get_version(), ('6.0', 1))
+            self.assertEqual(get_version(), ('6.0', 1))
+            # The cache is invalidated when the executable changes
+            with open(ffmpeg, 'a') as f:
+                f.write('# updated\n')
+            self.assertEqual(get_version(), ('6.0', 2))
+
+
+class TestFFmpegSplitChaptersPP(unittest.TestCase):
+    def test_split_chapters(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            ffmpeg = os.path.join(tmpdir, 'ffmpeg')
+            with open(ffmpeg, 'w') as f:
+                f.write(FAKE_COPY_FFMPEG)
+            os.chmod(ffmpeg, os.stat(ffmpeg).st_mode | stat.S_IEXEC)
+            ydl = YoutubeDL({
+                'ffmpeg_location': ffmpeg, 'quiet': True,
+                'outtmpl': {'chapter': os.path.join(tmpdir, '%(section_number)d.%(ext)s')},
+            })
+            filename = os.path.join(tmpdir, 'video.mp4')
+            with open(filename, 'wb') as f:
+                f.write(b'content')
+            chapters = [{'start_time': i * 10, 'end_time': i * 10 + 10, 'title': str(i)} for i in range(5)]
+            info = {'id': 'video', 'ext': 'mp4', 'filepath': filename, 'vcodec': 'avc1', 'chapters': chapters}
+            FFmpegSplitChaptersPP(ydl).run(info)
+
+            with open(os.path.join(tmpdir, 'log')) as f:
+                runs = sorted(json.loads(line) for line in f)
+            self.assertEqual([run[run.index('-ss') + 1] for run in runs], ['0', '10', '20', '30', '40'])
+            for i, chapter in enumerate(chapters, 1):
+                self.assertEqual(chapter['filepath'], os.path.join(tmpdir, f'{i}.mp4'))
+                self.assertTrue(os.path.exists(chapter['filepath']))
+
+
+class TestFFmpegStreamCopyChain(unittest.TestCase):
+    def test_combined_stream_copies(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            ffmpeg = os.path.join(tmpdir, 'ffmpeg')
+            with open(ffmpeg, 'w') as f:
+                f.write(FAKE_COPY_FFMPEG)
+            os.chmod(ffmpeg, os.stat(ffmpeg).st_mode | stat.S_IEXEC)
+            ydl = YoutubeDL({'ffmpeg_location': ffmpeg, 'quiet': True})
+            ydl.add_post_processor(FFmpegEmbedSubtitlePP(ydl))
+            ydl.add_post_processor(FFmpegMetadataPP(ydl, add_chapters=False, add_infojson=False))
+
+            filename, sub_filename = os.path.join(tmpdir, 'video.mkv'), os.path.join(tmpdir, 'video.en.vtt')
+            for path in (filename, sub_filename):
+                with open(path, 'wb') as f:
+                    f.write(b'content')
+            info = {
+                'id': 'video', 'title': 'Title', 'ext': 'mkv', 'filepath': filename, 'stretched_ratio': 2,
+                'vcodec': 'avc1', 'acodec': 'opus', '__files_to_move': {},
+                'requested_subtitles': {'en': {'ext': 'vtt', 'filepath': sub_filename}},
+            }
+            ydl.run_all_pps('post_process', info, additional_pps=[FFmpegFixupStretchedPP(ydl)])
+
+            with open(os.path.join(tmpdir, 'log')) as f:
+                runs = [json.loads(line) for line in f]
+            self.assertEqual(len(runs), 1)
+            args = runs[0]
+            self.assertEqual([args[i + 1] for i, arg in enumerate(args) if arg == '-i'],
+                             [f'file:{filename}', f'file:{sub_filename}'])
+            self.assertEqual(args[args.index('-aspect') + 1], '2.000000')
+            self.assertIn('-map 1:0', ' '.join(args))
+            self.assertIn('title=Title', args)
+            self.assertTrue(os.path.exists(filename))
+            self.assertFalse(os.path.exists(sub_filename))
+
+    def test_failed_stream_copies(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            ffmpeg = os.path.join(tmpdir, 'ffmpeg')
+            with open(ffmpeg, 'w') as f:
+                f.write(FAKE_COPY_FFMPEG.replace('shutil.copyfile', 'sys.exit("Conversion failed!") or shutil.copyfile'))
+            os.chmod(ffmpeg, os.stat(ffmpeg).st_mode | stat.S_IEXEC)
+            ydl = YoutubeDL({'ffmpeg_location': ffmpeg, 'quiet': True, 'ignoreerrors': True})
+            errors, runs = [], []
+            ydl.report_error = lambda msg, *args, **kwargs: errors.append(str(msg))
+
+            class SimplePP(PostProcessor):
+                def run(self, info):
+                    runs.append(info['id'])
+                    return [], info
+
+            ydl.add_post_processor(SimplePP(ydl))
+            filename = os.path.join(tmpdir, 'video.mkv')
+            with open(filename, 'wb') as f:
+                f.write(b'content')
+            info = {
+                'id': 'video', 'title': 'Title', 'ext': 'mkv', 'filepath': filename, 'stretched_ratio': 2,
+                'vcodec': 'avc1', 'acodec': 'opus', '__files_to_move': {},
+            }
+            ydl.run_all_pps('post_process', info, additional_pps=[FFmpegFixupStretchedPP(ydl)])
+            self.assertEqual(runs, ['video'])
+            self.assertEqual(len(errors), 1)
+            self.assertIn('FixupStretched', errors[0])
+
+            errors.clear()
+            ydl.run_all_pps('post_process', info, additional_pps=[SimplePP(ydl), FFmpegFixupStretchedPP(ydl)])
+            self.assertEqual(runs, ['video'] * 3)
+            self.assertEqual(len(errors), 1)
+            self.assertTrue(os.path.exists(filename))
+
+
+def fragmented_mp4(track_params, sample_duration, fragments):
+    """Build a fragmented MP4 file whose fragments each contain 2 samples of the given payload"""
+    stream = io.BytesIO()
+    write_piff_header(stream, track_params)
+    for i, payload in enumerate(fragments):
+        sizes = [len(payload) // 2, len(payload) - len(payload) // 2]
+        tfhd = full_box(b'tfhd', 0, 0x020000, struct.pack('>I', track_params['track_id']))
+        tfdt = full_box(b'tfdt', 1, 0, struct.pack('>Q', 2 * i * sample_duration))
+
+        def moof(data_offset):
+            trun = full_box(b'trun', 0, 0x301, struct.pack(
+                '>Ii', len(sizes), data_offset) + b''.join(struct.pack('>II', sample_duration, size) for size in sizes))
+            return box(b'moof', full_box(b'mfhd', 0, 0, struct.pack('>I', i + 1)) + box(b'traf', tfhd + tfdt + trun))
+        stream.write(moof(len(moof(0)) + 8))
+        stream.write(box(b'mdat', payload))
+    return stream.getvalue()
+
+
+class TestMp4Mux(unittest.TestCase):
+    def test_mux_fragmented_mp4(self):
+        video = [b'video%d' % i * 100 for i in range(4)]
+        audio = [b'audio%d' % i * 10 for i in range(6)]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            paths = [os.path.join(tmpdir, name) for name in ('video.mp4', 'audio.m4a', 'merged.mp4')]
+            with open(paths[0], 'wb') as f:
+                # Fragments of 2s
+                f.write(fragmented_mp4({
+                    'track_id': 1, 'fourcc': 'H264', 'duration': 80, 'timescale': 10, 'stream_type': 'video',
+                    'width': 640, 'height': 360, 'codec_private_data': '00000001674d401f0000000168ee3c80',
+                }, 10, video))
+            with open(paths[1], 'wb') as f:
+                # Fragments of 1.2s, with the track ID of the video
+                f.write(fragmented_mp4({
+                    'track_id': 1, 'fourcc': 'AACL', 'duration': 72000, 'timescale': 10000,
+                    'stream_type': 'audio', 'sampling_rate': 48000, 'codec_private_data': '1190',
+                }, 6000, audio))
+            mux_fragmented_mp4(paths[:2], paths[2])
+            with open(paths[2], 'rb') as f:
+                merged = f.read()
+
+        boxes = list(iter_boxes(merged))
+        self.assertEqual([box_type for box_type, _ in boxes[:2]], [b'ftyp', b'moov'])
+        moov = dict(iter_boxes(boxes[1][1]))
+        traks = [payload for box_type, payload in iter_boxes(boxes[1][1]) if box_type == b'trak']
+        self.assertEqual([struct.unpack_from('>I', dict(iter_boxes(trak))[b'tkhd'], 20)[0] for trak in traks], [1, 2])
+        self.assertEqual([struct.unpack_from('>I', trex, 4)[0] for _, trex in iter_boxes(moov[b'mvex'])], [1, 2])
+        # The duration of the audio is in the timescale of the video
+        self.assertEqual(struct.unpack_from('>Q', dict(iter_boxes(traks[1]))[b'tkhd'], 28)[0], 72)
+
+        # The fragments are interleaved by time and renumbered
+        fragments, pos = [], len(box(b'ftyp', boxes[0][1])) + len(box(b'moov', boxes[1][1]))
+        for (_, moof), (_, mdat) in zip(boxes[2::2], boxes[3::2]):
+            moof_boxes = dict(iter_boxes(moof))
+            traf = dict(iter_boxes(moof_boxes[b'traf']))
+            data_offset = struct.unpack_from('>i', traf[b'trun'], 8)[0]
+            self.assertEqual(merged[pos + data_offset:pos + data_offset + len(mdat)], mdat)
+            fragments.append((struct.unpack_from('>I', moof_boxes[b'mfhd'], 4)[0],
+                              struct.unpack_from('>I', traf[b'tfhd'], 4)[0], mdat))
+            pos += len(box(b'moof', moof)) + len(box(b'mdat', mdat))
+        self.assertEqual(fragments, [
+            (1, 1, video[0]), (2, 2, audio[0]), (3, 2, audio[1]), (4, 1, video[1]), (5, 2, audio[2]),
+            (6, 2, audio[3]), (7, 1, video[2]), (8, 2, audio[4]), (9, 1, video[3]), (10, 2, audio[5])])
+
+
 class TestExec(unittest.TestCase):
     def test_parse_cmd(self):
         pp = ExecPP(YoutubeDL(), '')
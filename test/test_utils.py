@@ -14,6 +14,8 @@
 import io
 import itertools
 import json
+import threading
+import time
 import xml.etree.ElementTree
 
 from yt_dlp.compat import (
@@ -692,6 +694,12 @@ def get_page(pagenum):
             got = iapl.getslice(*sliceargs)
             self.assertEqual(got, expected)
 
+            for prefetch in (1, 3):
+                pl = OnDemandPagedList(get_page, pagesize, prefetch=prefetch)
+                self.assertEqual(pl.getslice(*sliceargs), expected)
+                iapl = InAdvancePagedList(get_page, size // pagesize + 1, pagesize, prefetch=prefetch)
+                self.assertEqual(iapl.getslice(*sliceargs), expected)
+
         testPL(5, 2, (), [0, 1, 2, 3, 4])
         testPL(5, 2, (1,), [1, 2, 3, 4])
         testPL(5, 2, (2,), [2, 3, 4])
@@ -701,6 +709,46 @@ def get_page(pagenum):
         testPL(5, 2, (2, 99), [2, 3, 4])
         testPL(5, 2, (20, 99), [])
 
+    def test_paged_list_prefetch(self):
+        lock, active, max_active, fetched = threading.Lock(), [0], [0], []
+
+        def get_page(pagenum):
+            with lock:
+                active[0] += 1
+                max_active[0] = max(max_active[0], active[0])
+                fetched.append(pagenum)
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+            if pagenum == 3:
+                raise ValueError('page 3')
+            yield from range(pagenum * 2, pagenum * 2 + 2)
+
+        # A single page does not start the prefetch
+        iapl = InAdvancePagedList(get_page, 3, 2, prefetch=2)
+        self.assertEqual(iapl[0], 0)
+        self.assertEqual(fetched, [0])
+        self.assertIsNone(iapl._executor)
+
+        self.assertEqual(iapl.getslice(), [0, 1, 2, 3, 4, 5])
+        self.assertEqual(sorted(fetched), [0, 1, 2])
+        self.assertEqual(max_active[0], 2)
+        self.assertEqual(iapl[3], 3)
+        self.assertEqual(len(fetched), 3)
+        # The pool is shut down once the last page is reached
+        self.assertIsNone(iapl._executor)
+
+        # The errors are raised when the page is reached
+        fetched.clear()
+        pl = OnDemandPagedList(get_page, 2, use_cache=False, prefetch=2)
+        entries = []
+        with self.assertRaisesRegex(ValueError, 'page 3'):
+            for entry in pl._getslice(0, None):
+                entries.append(entry)
+        self.assertEqual(entries, [0, 1, 2, 3, 4, 5])
+        self.assertLessEqual(max(fetched), 5)
+        self.assertIsNone(pl._executor)
+
     def test_read_batch_urls(self):
         f = io.StringIO('''\xef\xbb\xbf foo
             bar\r
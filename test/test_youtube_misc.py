@@ -2,13 +2,22 @@
 
 # Allow direct execution
 import os
+import shutil
 import sys
+import threading
+import time
 import unittest
+import unittest.mock
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 
-from yt_dlp.extractor import YoutubeIE
+from test.helper import FakeYDL
+from yt_dlp.extractor import YoutubeIE, YoutubeTabIE
+from yt_dlp.jsinterp import JSInterpreter
+from yt_dlp.utils import ExtractorError
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
 
 
 class TestYoutubeMisc(unittest.TestCase):
@@ -21,6 +30,218 @@ def test_youtube_extract(self):
         assertExtractId('http://www.youtube.com/watch?v=BaW_jenozKcsharePLED17F32AD9753930', 'BaW_jenozKc')
         assertExtractId('BaW_jenozKc', 'BaW_jenozKc')
 
+    def test_nsig_results_cache(self):
+        cache_dir = os.path.join(TEST_DIR, 'testdata', 'nsig_cache_test')
+        self.addCleanup(shutil.rmtree, cache_dir, ignore_errors=True)
+        player_url = 'https://www.youtube.com/s/player/0123abcd/player_ias.vflset/en_US/base.js'
+        calls = []
+
+        def extract_n_function_code(video_id, player_url):
+            calls.append(player_url)
+            return JSInterpreter(''), '0123abcd', (['a'], 'return a.split("").reverse().join("")')
+
+        ie = YoutubeIE(FakeYDL({'cachedir': cache_dir}))
+        ie._extract_n_function_code = extract_n_function_code
+        self.assertEqual(ie._decrypt_nsig('abcd', 'id', player_url), 'dcba')
+        self.assertEqual(ie._decrypt_nsig('abcd', 'id', player_url), 'dcba')
+        self.assertEqual(len(calls), 1)
+
+        # The results are shared with other processes through the cache dir
+        ie = YoutubeIE(FakeYDL({'cachedir': cache_dir}))
+        ie._extract_n_function_code = extract_n_function_code
+        self.assertEqual(ie._decrypt_nsig('abcd', 'id', player_url), 'dcba')
+        self.assertEqual(len(calls), 1)
+
+        ie._NSIG_RESULTS_SIZE = 2
+        for n in ('efgh', 'ijkl', 'abcd'):
+            ie._decrypt_nsig(n, 'id', player_url)
+        self.assertEqual(len(calls), 4)
+        self.assertEqual(ie.cache.load('youtube-nsig-results', '0123abcd'), {'ijkl': 'lkji', 'abcd': 'dcba'})
+
+        # The results of the other versions are discarded
+        with unittest.mock.patch('yt_dlp.cache.__version__', '2000.01.01'):
+            ie.cache.store('youtube-nsig-results', '0123abcd', {'abcd': 'wrong'})
+        ie = YoutubeIE(FakeYDL({'cachedir': cache_dir}))
+        ie._extract_n_function_code = extract_n_function_code
+        self.assertEqual(ie._decrypt_nsig('abcd', 'id', player_url), 'dcba')
+        self.assertEqual(len(calls), 5)
+
+        # Invalid results are not kept
+        ie._extract_n_function_code = lambda video_id, player_url: (
+            JSInterpreter(''), '4567abcd', (['a'], 'return ""'))
+        player_url = player_url.replace('0123abcd', '4567abcd')
+        self.assertEqual(ie._decrypt_nsig('abcd', 'id', player_url), '')
+        self.assertIsNone(ie.cache.load('youtube-nsig-results', '4567abcd'))
+
+    def test_player_cache(self):
+        cache_dir = os.path.join(TEST_DIR, 'testdata', 'player_cache_test')
+        self.addCleanup(shutil.rmtree, cache_dir, ignore_errors=True)
+        downloads = []
+
+        def download_webpage(url, *args, **kwargs):
+            downloads.append(url)
+            return f'var player = {url!r};'
+
+        def load_player(player_id):
+            ie = YoutubeIE(FakeYDL({'cachedir': cache_dir}))
+            ie._download_webpage = download_webpage
+            ie._PLAYER_CACHE_SIZE = 2
+            player_url = f'https://www.youtube.com/s/player/{player_id}/player_ias.vflset/en_US/base.js'
+            self.assertEqual(ie._load_player('id', player_url), f'var player = {player_url!r};')
+
+        load_player('0123abcd')
+        load_player('0123abcd')
+        self.assertEqual(len(downloads), 1)
+
+        load_player('4567abcd')
+        load_player('0123abcd')
+        load_player('89abcdef')
+        self.assertEqual(len(downloads), 3)
+        # The least recently used player is evicted
+        load_player('0123abcd')
+        self.assertEqual(len(downloads), 3)
+        load_player('4567abcd')
+        self.assertEqual(len(downloads), 4)
+
+        # Corrupted players are downloaded again
+        cache_fn = os.path.join(cache_dir, 'youtube-player', '4567abcd.json')
+        with open(cache_fn, encoding='utf-8') as f:
+            data = f.read()
+        with open(cache_fn, 'w', encoding='utf-8') as f:
+            f.write(data.replace('var player', 'var layer'))
+        load_player('4567abcd')
+        self.assertEqual(len(downloads), 5)
+
+    def test_concurrent_player_responses(self):
+        ie = YoutubeIE(FakeYDL({'extractor_args': {'youtube': {'player_skip': ['configs', 'js']}}}))
+        lock, active, calls = threading.Lock(), [], []
+
+        def extract_player_response(client, *args):
+            with lock:
+                active.append(client)
+                calls.append(list(active))
+            time.sleep(0.1 if client == 'ios' else 0.2)
+            with lock:
+                active.remove(client)
+            pr = {'videoDetails': {'videoId': 'id'}, 'streamingData': {'formats': []}}
+            if client == 'android':
+                pr['playabilityStatus'] = {'reason': 'Sign in to confirm your age'}
+            return pr
+
+        ie._extract_player_response = extract_player_response
+        prs, _ = ie._extract_player_responses(['ios', 'android', 'web'], 'id', None, {}, {})
+        # The responses keep the order of the clients, and the age-gate fallback follows its client
+        self.assertEqual([pr['streamingData']['__yt_dlp_client'] for pr in prs],
+                         ['IOS', 'ANDR', 'TV-E', 'WEB'])
+        self.assertEqual(len(calls[2]), 3)
+        self.assertEqual(calls[3], ['tv_embedded'])
+
+    def test_index_range(self):
+        ie = YoutubeIE(FakeYDL())
+        *formats, _ = ie._extract_formats_and_subtitles([{'adaptiveFormats': [{
+            'itag': itag,
+            'url': f'https://rr1---sn-abc.googlevideo.com/videoplayback?itag={itag}',
+            'mimeType': mime_type,
+            'quality': 'hd720',
+            'indexRange': {'start': '740', 'end': '1235'},
+        } for itag, mime_type in ((136, 'video/mp4; codecs="avc1.4d401f"'), (247, 'video/webm; codecs="vp9"'))]}],
+            'id', None, 'not_live', 100)
+        index_ranges = {f['format_id']: f.get('_index_range') for f in formats}
+        self.assertEqual(index_ranges['136'], {'start': 740, 'end': 1236})
+        self.assertIsNone(index_ranges['247'])
+
+    def test_prefetch_pages(self):
+        ie = YoutubeTabIE(FakeYDL())
+        fetched, closed, fetched_ahead = [], threading.Event(), threading.Event()
+
+        def pages(count, error=None):
+            try:
+                for i in range(count):
+                    fetched.append(i)
+                    if len(fetched) > 1:
+                        fetched_ahead.set()
+                    yield [f'{i}-{j}' for j in range(3)]
+                if error:
+                    raise error
+            finally:
+                closed.set()
+
+        self.assertEqual(list(ie._prefetch_pages(pages(3))), [f'{i}-{j}' for i in range(3) for j in range(3)])
+
+        # Only _CONTINUATION_LOOKAHEAD pages are fetched ahead of the consumer
+        fetched.clear()
+        closed.clear()
+        fetched_ahead.clear()
+        entries = ie._prefetch_pages(pages(100))
+        self.assertEqual(next(entries), '0-0')
+        self.assertTrue(fetched_ahead.wait(5))
+        entries.close()
+        self.assertTrue(closed.wait(5))
+        self.assertEqual(fetched, [0, 1])
+
+        # The thread stops as soon as the consumer is garbage collected
+        closed.clear()
+        entries = ie._prefetch_pages(pages(100))
+        next(entries)
+        thread, = (thread for thread in threading.enumerate() if thread.name == f'{ie.IE_NAME}-prefetch')
+        del entries
+        thread.join(0.5)
+        self.assertFalse(thread.is_alive())
+        self.assertTrue(closed.wait(5))
+
+        with self.assertRaises(ExtractorError):
+            list(ie._prefetch_pages(pages(2, ExtractorError('page error'))))
+
+        # The pages are fetched by the consumer when the requests are spaced out
+        fetched.clear()
+        ie = YoutubeTabIE(FakeYDL({'sleep_interval_requests': 1}))
+        entries = ie._prefetch_pages(pages(100))
+        self.assertEqual(next(entries), '0-0')
+        self.assertEqual(fetched, [0])
+        self.assertFalse(any(thread.name == f'{ie.IE_NAME}-prefetch' for thread in threading.enumerate()))
+        entries.close()
+
+    def test_concurrent_comment_replies(self):
+        continuation = lambda token: {'continuationItemRenderer': {
+            'continuationEndpoint': {'continuationCommand': {'token': token}}}}
+        responses = {
+            'root': [{'commentsHeaderRenderer': {'sortMenu': {'sortFilterSubMenuRenderer': {'subMenuItems': [
+                {}, {'title': 'Newest first', 'serviceEndpoint': {'continuationCommand': {'token': 'sorted'}}}]}}}}],
+            'sorted': [{'commentThreadRenderer': {
+                'comment': {'commentRenderer': {'commentId': f'c{i}'}},
+                'replies': {'commentRepliesRenderer': {'contents': [continuation(f'r{i}')]}},
+            }} for i in range(3)] + [{'commentThreadRenderer': {'comment': {'commentRenderer': {'commentId': 'c3'}}}}],
+            **{f'r{i}': [{'commentRenderer': {'commentId': f'c{i}.{j}'}} for j in range(2)] for i in range(3)},
+        }
+        lock, active, max_active = threading.Lock(), set(), []
+
+        def extract_response(item_id, query, **kwargs):
+            token = query['continuation']
+            with lock:
+                active.add(token)
+                max_active.append(len(active))
+            time.sleep(0.1)
+            with lock:
+                active.remove(token)
+            return {'onResponseReceivedEndpoints': [{'appendContinuationItemsAction': {'continuationItems': responses[token]}}]}
+
+        def get_comments(max_comments=None):
+            ie = YoutubeIE(FakeYDL({'extractor_args': {'youtube': {'max_comments': max_comments}}} if max_comments else {}))
+            ie._extract_response = extract_response
+            comments = ie._get_comments({}, 'id', [{'itemSectionRenderer': {
+                'sectionIdentifier': 'comment-item-section', 'contents': [continuation('root')]}}], None)
+            return [comment['id'] for comment in comments]
+
+        self.assertEqual(get_comments(), ['c0', 'c0.0', 'c0.1', 'c1', 'c1.0', 'c1.1', 'c2', 'c2.0', 'c2.1', 'c3'])
+        self.assertEqual(max(max_active), 3)
+        self.assertEqual(get_comments(['all', 'all', '3', '1']), ['c0', 'c0.0', 'c1', 'c1.0', 'c2', 'c2.0', 'c3'])
+        self.assertEqual(get_comments(['all', 'all', '3']), ['c0', 'c0.0', 'c0.1', 'c1', 'c1.0', 'c2', 'c3'])
+        self.assertEqual(get_comments(['5', '2']), ['c0', 'c0.0', 'c0.1', 'c1', 'c1.0'])
+
+        # The whole extraction is stopped when the replies loop
+        responses['r1'][0]['commentRenderer']['commentId'] = 'c0.0'
+        self.assertEqual(get_comments(), ['c0', 'c0.0', 'c0.1', 'c1'])
+
 
 if __name__ == '__main__':
     unittest.main()
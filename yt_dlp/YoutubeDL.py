@@ -1,4 +1,5 @@
 import collections
+import concurrent.futures
 import contextlib
 import datetime
 import errno
@@ -17,6 +18,7 @@
 import subprocess
 import sys
 import tempfile
+import threading
 import time
 import tokenize
 import traceback
@@ -26,7 +28,8 @@
 from .compat import urllib  # isort: split
 from .compat import compat_os_name, compat_shlex_quote
 from .cookies import load_cookies
-from .downloader import FFmpegFD, get_suitable_downloader, shorten_protocol_name
+from .downloader import FFmpegFD, FileDownloader, get_suitable_downloader, shorten_protocol_name
+from .downloader.mpegts import is_mp4_file
 from .downloader.rtmp import rtmpdump_version
 from .extractor import gen_extractor_classes, get_info_extractor
 from .extractor.common import UnsupportedURLIE
@@ -48,6 +51,7 @@
     MoveFilesAfterDownloadPP,
     get_postprocessor,
 )
+from .postprocessor.ffmpeg import FFmpegStreamCopyChain
 from .postprocessor.ffmpeg import resolve_mapping as resolve_recode_mapping
 from .update import REPOSITORY, current_git_head, detect_variant
 from .utils import (
@@ -224,6 +228,12 @@ class YoutubeDL:
                        into a single file
     allow_multiple_audio_streams:   Allow multiple audio streams to be merged
                        into a single file
+    concurrent_formats: Download the formats that are to be merged at the same
+                       time instead of one after the other (default: True)
+    stream_merge:      Merge the formats with ffmpeg while they are being
+                       downloaded, instead of after the downloads (POSIX only)
+    native_merge:      Whether to merge fragmented MP4 formats into mp4 without
+                       ffmpeg. By default, this is done only if ffmpeg is not available
     check_formats      Whether to test if the formats are downloadable.
                        Can be True (check all), False (check none),
                        'selected' (check selected formats),
@@ -284,6 +294,12 @@ class YoutubeDL:
     skip_download:     Skip the actual download of the video file
     cachedir:          Location of the cache files in the filesystem.
                        False to disable filesystem cache.
+    cache_backend:     How the cache is stored in cachedir. One of "json" (default;
+                       a file for each entry) or "sqlite" (a single database file)
+    cache_max_size:    Maximum size of the cache in bytes. The least recently
+                       used entries are removed when it is exceeded
+    cache_ttl:         Dictionary of section names and the number of seconds after
+                       which their cache entries expire
     noplaylist:        Download single video instead of a playlist if in doubt.
     age_limit:         An integer representing the user's age in years.
                        Unsuitable videos for the given age are skipped.
@@ -345,6 +361,10 @@ class YoutubeDL:
                        * when: When to run the postprocessor. Allowed values are
                                the entries of utils.POSTPROCESS_WHEN
                                Assumed to be 'post_process' if not given
+    postprocess_workers: Number of videos that are post-processed at the same
+                       time, while the next ones are downloaded (default: 1).
+                       The post-processing of the last videos is only waited
+                       for at the end of download()
     progress_hooks:    A list of functions that get called on download
                        progress, with a dictionary with the entries
                        * status: One of "downloading", "error", or "finished".
@@ -367,9 +387,14 @@ class YoutubeDL:
                                          downloaded video fragment.
                        * fragment_count: The number of fragments (= individual
                                          files that will be merged)
+                       * fragment_workers: For concurrent fragment downloads, a
+                                         list with the downloaded_bytes, number of
+                                         fragments and speed of each worker
 
                        Progress hooks are guaranteed to be called at least once
                        (with status "finished") if the download is successful.
+                       With concurrent_formats, they may be called from several
+                       threads at the same time.
     postprocessor_hooks:  A list of functions that get called on postprocessing
                        progress, with a dictionary with the entries
                        * status: One of "started", "processing", or "finished".
@@ -462,8 +487,8 @@ class YoutubeDL:
     the downloader (see yt_dlp/downloader/common.py):
     nopart, updatetime, buffersize, ratelimit, throttledratelimit, min_filesize,
     max_filesize, test, noresizebuffer, retries, file_access_retries, fragment_retries,
-    continuedl, xattr_set_filesize, hls_use_mpegts, http_chunk_size,
-    external_downloader_args, concurrent_fragment_downloads.
+    continuedl, xattr_set_filesize, hls_use_mpegts, hls_native_remux, http_chunk_size,
+    external_downloader_args, concurrent_fragment_downloads, fragment_coalesce_size.
 
     The following options are used by the post processors:
     ffmpeg_location:   Location of the ffmpeg/avconv binary; either the path
@@ -584,6 +609,8 @@ def __init__(self, params=None, auto_init=True):
         self._ies_instances = {}
         self._pps = {k: [] for k in POSTPROCESS_WHEN}
         self._printed_messages = set()
+        # The postprocessors may print the messages from the post-processing workers
+        self._printed_messages_lock = threading.Lock()
         self._first_webpage_request = True
         self._post_hooks = []
         self._progress_hooks = []
@@ -591,6 +618,9 @@ def __init__(self, params=None, auto_init=True):
         self._download_retcode = 0
         self._num_downloads = 0
         self._num_videos = 0
+        self._pp_executor, self._pp_jobs = None, collections.deque()
+        # Number of calls that finish the post-processing jobs that are started in them
+        self._pp_scopes = 0
         self._playlist_level = 0
         self._playlist_urls = set()
         self.cache = Cache(self)
@@ -870,9 +900,10 @@ def _bidi_workaround(self, message):
 
     def _write_string(self, message, out=None, only_once=False):
         if only_once:
-            if message in self._printed_messages:
-                return
-            self._printed_messages.add(message)
+            with self._printed_messages_lock:
+                if message in self._printed_messages:
+                    return
+                self._printed_messages.add(message)
         write_string(message, out=out, encoding=self.params.get('encoding'))
 
     def to_stdout(self, message, skip_eol=False, quiet=None):
@@ -1513,6 +1544,17 @@ def extract_info(self, url, download=True, ie_key=None, extra_info=None,
         @force_generic_extractor  Force using the generic extractor (Deprecated; use ie_key='Generic')
         """
 
+        if download and not self._pp_scopes:
+            # Called directly instead of by download(), so the post-processing jobs are finished here
+            self._pp_scopes += 1
+            try:
+                res = self.extract_info(url, download, ie_key, extra_info, process, force_generic_extractor)
+                self._collect_post_processing()
+                return res
+            finally:
+                self._pp_scopes -= 1
+                self._cancel_post_processing()
+
         if extra_info is None:
             extra_info = {}
 
@@ -2816,20 +2858,31 @@ def to_screen(*msg):
                 except MaxDownloadsReached:
                     max_downloads_reached = True
                 self._raise_pending_errors(new_info)
-                # Remove copied info
-                for key, val in tuple(new_info.items()):
-                    if info_dict.get(key) == val:
-                        new_info.pop(key)
                 if max_downloads_reached:
                     break
 
-            write_archive = {f.get('__write_download_archive', False) for f in downloaded_formats}
-            assert write_archive.issubset({True, False, 'ignore'})
-            if True in write_archive and False not in write_archive:
-                self.record_download_archive(info_dict)
-
-            info_dict['requested_downloads'] = downloaded_formats
-            info_dict = self.run_all_pps('after_video', info_dict)
+            def finish_video(info_dict, copied_info):
+                for new_info in downloaded_formats:
+                    # Remove copied info
+                    for key, val in tuple(new_info.items()):
+                        if copied_info.get(key) == val:
+                            new_info.pop(key)
+
+                write_archive = {f.get('__write_download_archive', False) for f in downloaded_formats}
+                assert write_archive.issubset({True, False, 'ignore'})
+                if True in write_archive and False not in write_archive:
+                    self.record_download_archive(info_dict)
+
+                info_dict['requested_downloads'] = downloaded_formats
+                return self.run_all_pps('after_video', info_dict)
+
+            if self._pp_jobs:
+                # The archive is recorded and the after_video postprocessors are run
+                # once the formats (and the videos before them) have been post-processed
+                info_dict['requested_downloads'] = downloaded_formats
+                self._after_post_processing(functools.partial(finish_video, info_dict, dict(info_dict)))
+            else:
+                info_dict = finish_video(info_dict, info_dict)
             if max_downloads_reached:
                 raise MaxDownloadsReached()
 
@@ -2967,7 +3020,12 @@ def print_field(field, actual_field=None, optional=False):
         if self.params.get('forcejson'):
             self.to_stdout(json.dumps(self.sanitize_info(info_dict)))
 
-    def dl(self, name, info, subtitle=False, test=False):
+    def dl(self, name, info, subtitle=False, test=False, *, progress=None):
+        """
+        Download the info to name
+        @param progress  A (FileDownloader, line) tuple whose params and progress status are shared,
+                         for concurrent downloads
+        """
         if not info.get('url'):
             self.raise_no_formats(info, True)
 
@@ -2985,8 +3043,10 @@ def dl(self, name, info, subtitle=False, test=False):
                 '_no_ytdl_file': True,
             }
         else:
-            params = self.params
+            params = self.params if progress is None else progress[0].params
         fd = get_suitable_downloader(info, params, to_stdout=(name == '-'))(self, params)
+        if progress is not None:
+            fd._share_status(*progress)
         if not test:
             for ph in self._progress_hooks:
                 fd.add_progress_hook(ph)
@@ -3002,6 +3062,55 @@ def dl(self, name, info, subtitle=False, test=False):
             new_info['http_headers'] = self._calc_headers(new_info)
         return fd.download(name, new_info, subtitle)
 
+    def _dl_concurrently(self, downloads):
+        """Download the (name, info) pairs at the same time and return the results of dl in order"""
+        params = dict(self.params)
+        limits = {key: params[key] for key in ('ratelimit', 'throttledratelimit') if params.get(key)}
+        remaining, lock = [len(downloads)], threading.Lock()
+
+        def share_limits():
+            # The limits are for all the running downloads together
+            for key, limit in limits.items():
+                params[key] = limit / remaining[0]
+
+        share_limits()
+        status = FileDownloader(self, params)
+        status._prepare_multiline_status(len(downloads))
+        results = [None] * len(downloads)
+
+        def download(idx, name, info):
+            try:
+                results[idx] = True, self.dl(name, info, progress=(status, idx))
+            except BaseException as e:
+                results[idx] = False, e
+            finally:
+                with lock:
+                    remaining[0] -= 1
+                    if remaining[0]:
+                        share_limits()
+
+        # Daemon threads do not keep yt-dlp running if joining them is interrupted again
+        threads = [threading.Thread(target=download, args=(idx, *args), daemon=True)
+                   for idx, args in enumerate(downloads)]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                # A timeout keeps the join interruptible on Windows
+                while thread.is_alive():
+                    thread.join(0.1)
+        finally:
+            # The downloads stop at their next progress report when the main thread is interrupted
+            status._stop_event.set()
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(0.1)
+            status._finish_multiline_status()
+        for ok, result in results:
+            if not ok:
+                raise result
+        return [result for _, result in results]
+
     def existing_file(self, filepaths, *, default_overwrite=True):
         existing_files = list(filter(os.path.exists, orderedSet(filepaths)))
         if existing_files and not self.params.get('overwrites', default_overwrite):
@@ -3232,7 +3341,7 @@ def correct_ext(filename, ext=new_ext):
                                 'You have requested merging of multiple formats '
                                 'while also allowing unplayable formats to be downloaded. '
                                 'The formats won\'t be merged to prevent data corruption.')
-                        elif not merger.available:
+                        elif not (merger.available or merger.can_merge_natively(info_dict)):
                             msg = 'You have requested merging of multiple formats but ffmpeg is not installed'
                             if not self.params.get('ignoreerrors'):
                                 self.report_error(f'{msg}. Aborting due to --abort-on-error')
@@ -3247,6 +3356,7 @@ def correct_ext(filename, ext=new_ext):
                                 f'You have requested downloading multiple formats to stdout {reason}. '
                                 'The formats will be streamed one after the other')
                             fname = temp_filename
+                        downloads = []
                         for f in requested_formats:
                             new_info = dict(info_dict)
                             del new_info['requested_formats']
@@ -3259,11 +3369,28 @@ def correct_ext(filename, ext=new_ext):
                                     return
                                 f['filepath'] = fname
                                 downloaded.append(fname)
-                            partial_success, real_download = self.dl(fname, new_info)
-                            info_dict['__real_download'] = info_dict['__real_download'] or real_download
-                            success = success and partial_success
-
-                    if downloaded and merger.available and not self.params.get('allow_unplayable_formats'):
+                            downloads.append((fname, new_info))
+                        streaming = (
+                            self.params.get('stream_merge') and temp_filename != '-' and merger.available
+                            and not self.params.get('allow_unplayable_formats')
+                            and merger.start_streaming(info_dict, temp_filename))
+                        streamed = False
+                        try:
+                            if (temp_filename != '-' and len(downloads) > 1
+                                    and self.params.get('concurrent_formats', True)):
+                                results = self._dl_concurrently(downloads)
+                            else:
+                                results = (self.dl(*args) for args in downloads)
+                            for partial_success, real_download in results:
+                                info_dict['__real_download'] = info_dict['__real_download'] or real_download
+                                success = success and partial_success
+                            streamed = success
+                        finally:
+                            if streaming:
+                                merger.finish_streaming(streamed)
+
+                    if (downloaded and (merger.available or merger.can_merge_natively(info_dict))
+                            and not self.params.get('allow_unplayable_formats')):
                         info_dict['__postprocessors'].append(merger)
                         info_dict['__files_to_merge'] = downloaded
                         # Even if there were no downloads, it is being merged only now
@@ -3341,7 +3468,9 @@ def ffmpeg_fixup(cndn, msg, cls):
                         ffmpeg_fixup(ext == 'm4a' and info_dict.get('container') == 'm4a_dash',
                                      'writing DASH m4a. Only some players support this container',
                                      FFmpegFixupM4aPP)
+                        # The MPEG-TS streams that are remuxed natively do not need to be fixed up
                         ffmpeg_fixup(downloader == 'hlsnative' and not self.params.get('hls_use_mpegts')
+                                     and not is_mp4_file(encodeFilename(dl_filename))
                                      or info_dict.get('is_live') and self.params.get('hls_use_mpegts') is None,
                                      'Possible MPEG-TS in MP4 container or malformed AAC timestamps',
                                      FFmpegFixupM3u8PP)
@@ -3352,32 +3481,109 @@ def ffmpeg_fixup(cndn, msg, cls):
                     ffmpeg_fixup(downloader == 'web_socket_fragment', 'Malformed duration detected', FFmpegFixupDurationPP)
 
                 fixup()
-                try:
-                    replace_info_dict(self.post_process(dl_filename, info_dict, files_to_move))
-                except PostProcessingError as err:
-                    self.report_error('Postprocessing: %s' % str(err))
-                    return
-                try:
-                    for ph in self._post_hooks:
-                        ph(info_dict['filepath'])
-                except Exception as err:
-                    self.report_error('post hooks: %s' % str(err))
+
+                # Only the post_process postprocessors are run by the workers
+                def post_process():
+                    try:
+                        return self._run_pps('post_process', info_dict, additional_pps=info_dict.get('__postprocessors'))
+                    except PostProcessingError as err:
+                        return err
+
+                def finish_post_processing(info):
+                    try:
+                        if isinstance(info, PostProcessingError):
+                            raise info
+                        replace_info_dict(self._run_after_move_pps(info))
+                    except PostProcessingError as err:
+                        self.report_error('Postprocessing: %s' % str(err))
+                        return False
+                    try:
+                        for ph in self._post_hooks:
+                            ph(info_dict['filepath'])
+                    except Exception as err:
+                        self.report_error('post hooks: %s' % str(err))
+                        return False
+                    info_dict['__write_download_archive'] = True
+
+                self._start_post_process(dl_filename, info_dict, files_to_move)
+                if self._run_post_processing(post_process, finish_post_processing) is False:
                     return
-                info_dict['__write_download_archive'] = True
 
         assert info_dict is original_infodict  # Make sure the info_dict was modified in-place
         if self.params.get('force_write_download_archive'):
             info_dict['__write_download_archive'] = True
         check_max_downloads()
 
+    def _run_post_processing(self, func, finish_func):
+        """
+        Run func, which post-processes a downloaded video, in the post-processing workers if there are any,
+        then finish_func with its result
+
+        Returns the result of finish_func, or None if the workers are used. finish_func is then called
+        in order by _collect_post_processing, so that the files are moved and the archive is recorded in order
+        """
+        workers = self.params.get('postprocess_workers') or 1
+        if workers <= 1:
+            return finish_func(func())
+        if not self._pp_executor:
+            self._pp_executor = concurrent.futures.ThreadPoolExecutor(workers, thread_name_prefix='postprocess')
+        # The next download waits when all the workers are busy
+        self._collect_post_processing(max_pending=workers - 1)
+        future = self._pp_executor.submit(func)
+        self._pp_jobs.append((future, [lambda: finish_func(future.result())]))
+
+    def _after_post_processing(self, func):
+        """Call func once the pending post-processing jobs have finished"""
+        if self._pp_jobs:
+            self._pp_jobs[-1][1].append(func)
+        else:
+            func()
+
+    def _collect_post_processing(self, max_pending=0):
+        """Finish the post-processing jobs in order, until at most max_pending of them are left"""
+        while self._pp_jobs:
+            future, callbacks = self._pp_jobs[0]
+            if len(self._pp_jobs) <= max_pending and not future.done():
+                break
+            while not future.done():
+                # A timeout keeps the wait interruptible on Windows
+                concurrent.futures.wait([future], 0.1)
+            self._pp_jobs.popleft()
+            future.result()
+            for callback in callbacks:
+                callback()
+
+    def _cancel_post_processing(self):
+        """
+        Cancel the queued post-processing jobs and wait for the running ones. The videos that were
+        post-processed successfully are still finished in order, so that they are recorded in the archive
+        """
+        jobs, self._pp_jobs = self._pp_jobs, collections.deque()
+        for future, _ in jobs:
+            future.cancel()
+        for future, callbacks in jobs:
+            while not future.done():
+                concurrent.futures.wait([future], 0.1)
+            if future.cancelled() or future.exception():
+                continue
+            for callback in callbacks:
+                try:
+                    callback()
+                except Exception as e:
+                    self.report_warning(f'Unable to finish the post-processing of a video: {e}')
+
     def __download_wrapper(self, func):
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
+            self._pp_scopes += 1
             try:
                 res = func(*args, **kwargs)
+                self._collect_post_processing()
             except UnavailableVideoError as e:
+                self._collect_post_processing()
                 self.report_error(e)
             except DownloadCancelled as e:
+                self._collect_post_processing()
                 self.to_screen(f'[info] {e}')
                 if not self.params.get('break_per_url'):
                     raise
@@ -3386,6 +3592,9 @@ def wrapper(*args, **kwargs):
                 if self.params.get('dump_single_json', False):
                     self.post_extract(res)
                     self.to_stdout(json.dumps(self.sanitize_info(res)))
+            finally:
+                self._pp_scopes -= 1
+                self._cancel_post_processing()
         return wrapper
 
     def download(self, url_list):
@@ -3488,10 +3697,24 @@ def actual_post_extract(info_dict):
 
         actual_post_extract(info_dict or {})
 
+    def _flush_stream_copies(self, chain):
+        """Run the deferred stream copies, whose errors are handled like those of the postprocessors"""
+        try:
+            chain.flush()
+        except PostProcessingError as e:
+            # Must be True and not 'only_download'
+            if self.params.get('ignoreerrors') is True:
+                self.report_error(e)
+                return
+            raise
+
     def run_pp(self, pp, infodict):
         files_to_delete = []
         if '__files_to_move' not in infodict:
             infodict['__files_to_move'] = {}
+        chain = FFmpegStreamCopyChain.current()
+        if chain and not pp._STREAM_COPY_CHAINABLE:
+            self._flush_stream_copies(chain)
         try:
             files_to_delete, infodict = pp.run(infodict)
         except PostProcessingError as e:
@@ -3503,19 +3726,33 @@ def run_pp(self, pp, infodict):
 
         if not files_to_delete:
             return infodict
-        if self.params.get('keepvideo', False):
-            for f in files_to_delete:
-                infodict['__files_to_move'].setdefault(f, '')
+
+        def delete_files():
+            if self.params.get('keepvideo', False):
+                for f in files_to_delete:
+                    infodict['__files_to_move'].setdefault(f, '')
+            else:
+                self._delete_downloaded_files(
+                    *files_to_delete, info=infodict, msg='Deleting original file %s (pass -k to keep)')
+
+        # The files may still be needed by the deferred stream copies
+        if chain:
+            chain.after_flush(delete_files)
         else:
-            self._delete_downloaded_files(
-                *files_to_delete, info=infodict, msg='Deleting original file %s (pass -k to keep)')
+            delete_files()
         return infodict
 
     def run_all_pps(self, key, info, *, additional_pps=None):
         if key != 'video':
             self._forceprint(key, info)
-        for pp in (additional_pps or []) + self._pps[key]:
-            info = self.run_pp(pp, info)
+        return self._run_pps(key, info, additional_pps=additional_pps)
+
+    def _run_pps(self, key, info, *, additional_pps=None):
+        # Consecutive stream copies of the same file are combined into a single ffmpeg run
+        with FFmpegStreamCopyChain() as chain:
+            for pp in (additional_pps or []) + self._pps[key]:
+                info = self.run_pp(pp, info)
+            self._flush_stream_copies(chain)
         return info
 
     def pre_process(self, ie_info, key='pre_process', files_to_move=None):
@@ -3531,9 +3768,17 @@ def pre_process(self, ie_info, key='pre_process', files_to_move=None):
 
     def post_process(self, filename, info, files_to_move=None):
         """Run all the postprocessors on the given file."""
+        self._start_post_process(filename, info, files_to_move)
+        info = self._run_pps('post_process', info, additional_pps=info.get('__postprocessors'))
+        return self._run_after_move_pps(info)
+
+    def _start_post_process(self, filename, info, files_to_move=None):
         info['filepath'] = filename
         info['__files_to_move'] = files_to_move or {}
-        info = self.run_all_pps('post_process', info, additional_pps=info.get('__postprocessors'))
+        self._forceprint('post_process', info)
+
+    def _run_after_move_pps(self, info):
+        """Move the files and run the after_move postprocessors, in the order of the videos"""
         info = self.run_pp(MoveFilesAfterDownloadPP(self), info)
         del info['__files_to_move']
         return self.run_all_pps('after_move', info)
@@ -1,4 +1,6 @@
 import base64
+import functools
+import struct
 from math import ceil
 
 from .compat import compat_ord
@@ -17,11 +19,11 @@ def aes_gcm_decrypt_and_verify_bytes(data, key, tag, nonce):
 else:
     def aes_cbc_decrypt_bytes(data, key, iv):
         """ Decrypt bytes with AES-CBC using native implementation since pycryptodome is unavailable """
-        return intlist_to_bytes(aes_cbc_decrypt(*map(bytes_to_intlist, (data, key, iv))))
+        return _cbc_decrypt(bytes(data), bytes(key), bytes(iv))
 
     def aes_gcm_decrypt_and_verify_bytes(data, key, tag, nonce):
         """ Decrypt bytes with AES-GCM using native implementation since pycryptodome is unavailable """
-        return intlist_to_bytes(aes_gcm_decrypt_and_verify(*map(bytes_to_intlist, (data, key, tag, nonce))))
+        return _gcm_decrypt_and_verify(bytes(data), bytes(key), bytes(tag), bytes(nonce))
 
 
 def aes_cbc_encrypt_bytes(data, key, iv, **kwargs):
@@ -136,21 +138,7 @@ def aes_ctr_encrypt(data, key, iv):
     @param {int[]} iv          16-Byte initialization vector
     @returns {int[]}           encrypted data
     """
-    expanded_key = key_expansion(key)
-    block_count = int(ceil(float(len(data)) / BLOCK_SIZE_BYTES))
-    counter = iter_vector(iv)
-
-    encrypted_data = []
-    for i in range(block_count):
-        counter_block = next(counter)
-        block = data[i * BLOCK_SIZE_BYTES: (i + 1) * BLOCK_SIZE_BYTES]
-        block += [0] * (BLOCK_SIZE_BYTES - len(block))
-
-        cipher_counter_block = aes_encrypt(counter_block, expanded_key)
-        encrypted_data += xor(block, cipher_counter_block)
-    encrypted_data = encrypted_data[:len(data)]
-
-    return encrypted_data
+    return bytes_to_intlist(_ctr_crypt(intlist_to_bytes(data), intlist_to_bytes(key), intlist_to_bytes(iv)))
 
 
 def aes_cbc_decrypt(data, key, iv):
@@ -162,21 +150,7 @@ def aes_cbc_decrypt(data, key, iv):
     @param {int[]} iv          16-Byte IV
     @returns {int[]}           decrypted data
     """
-    expanded_key = key_expansion(key)
-    block_count = int(ceil(float(len(data)) / BLOCK_SIZE_BYTES))
-
-    decrypted_data = []
-    previous_cipher_block = iv
-    for i in range(block_count):
-        block = data[i * BLOCK_SIZE_BYTES: (i + 1) * BLOCK_SIZE_BYTES]
-        block += [0] * (BLOCK_SIZE_BYTES - len(block))
-
-        decrypted_block = aes_decrypt(block, expanded_key)
-        decrypted_data += xor(decrypted_block, previous_cipher_block)
-        previous_cipher_block = block
-    decrypted_data = decrypted_data[:len(data)]
-
-    return decrypted_data
+    return bytes_to_intlist(_cbc_decrypt(intlist_to_bytes(data), intlist_to_bytes(key), intlist_to_bytes(iv)))
 
 
 def aes_cbc_encrypt(data, key, iv, *, padding_mode='pkcs7'):
@@ -219,36 +193,7 @@ def aes_gcm_decrypt_and_verify(data, key, tag, nonce):
     @returns {int[]}           decrypted data
     """
 
-    # XXX: check aes, gcm param
-
-    hash_subkey = aes_encrypt([0] * BLOCK_SIZE_BYTES, key_expansion(key))
-
-    if len(nonce) == 12:
-        j0 = nonce + [0, 0, 0, 1]
-    else:
-        fill = (BLOCK_SIZE_BYTES - (len(nonce) % BLOCK_SIZE_BYTES)) % BLOCK_SIZE_BYTES + 8
-        ghash_in = nonce + [0] * fill + bytes_to_intlist((8 * len(nonce)).to_bytes(8, 'big'))
-        j0 = ghash(hash_subkey, ghash_in)
-
-    # TODO: add nonce support to aes_ctr_decrypt
-
-    # nonce_ctr = j0[:12]
-    iv_ctr = inc(j0)
-
-    decrypted_data = aes_ctr_decrypt(data, key, iv_ctr + [0] * (BLOCK_SIZE_BYTES - len(iv_ctr)))
-    pad_len = len(data) // 16 * 16
-    s_tag = ghash(
-        hash_subkey,
-        data
-        + [0] * (BLOCK_SIZE_BYTES - len(data) + pad_len)        # pad
-        + bytes_to_intlist((0 * 8).to_bytes(8, 'big')           # length of associated data
-                           + ((len(data) * 8).to_bytes(8, 'big')))  # length of data
-    )
-
-    if tag != aes_ctr_encrypt(s_tag, key, j0):
-        raise ValueError("Mismatching authentication tag")
-
-    return decrypted_data
+    return bytes_to_intlist(_gcm_decrypt_and_verify(*map(intlist_to_bytes, (data, key, tag, nonce))))
 
 
 def aes_encrypt(data, expanded_key):
@@ -259,6 +204,10 @@ def aes_encrypt(data, expanded_key):
     @param {int[]} expanded_key  176/208/240-Byte expanded key
     @returns {int[]}             16-Byte cipher
     """
+    if len(data) == BLOCK_SIZE_BYTES and len(expanded_key) in (176, 208, 240):
+        return bytes_to_intlist(struct.pack(
+            '>4I', *_encrypt_block(*struct.unpack('>4I', bytes(data)), _encryption_round_keys(bytes(expanded_key)))))
+
     rounds = len(expanded_key) // BLOCK_SIZE_BYTES - 1
 
     data = xor(data, expanded_key[:BLOCK_SIZE_BYTES])
@@ -280,6 +229,10 @@ def aes_decrypt(data, expanded_key):
     @param {int[]} expanded_key  176/208/240-Byte expanded key
     @returns {int[]}             16-Byte state
     """
+    if len(data) == BLOCK_SIZE_BYTES and len(expanded_key) in (176, 208, 240):
+        return bytes_to_intlist(struct.pack(
+            '>4I', *_decrypt_block(*struct.unpack('>4I', bytes(data)), _decryption_round_keys(bytes(expanded_key)))))
+
     rounds = len(expanded_key) // BLOCK_SIZE_BYTES - 1
 
     for i in range(rounds, 0, -1):
@@ -398,6 +351,180 @@ def aes_decrypt_text(data, password, key_size_bytes):
                       0x67, 0x4a, 0xed, 0xde, 0xc5, 0x31, 0xfe, 0x18, 0x0d, 0x63, 0x8c, 0x80, 0xc0, 0xf7, 0x70, 0x07)
 
 
+def _gf_mul(a, b):
+    """ Multiply two bytes in the Rijndael finite field """
+    if a == 0 or b == 0:
+        return 0
+    return RIJNDAEL_EXP_TABLE[(RIJNDAEL_LOG_TABLE[a] + RIJNDAEL_LOG_TABLE[b]) % 0xFF]
+
+
+def _make_round_tables(sbox, matrix_column):
+    """
+    Make the lookup tables that combine SubBytes and MixColumns of a round
+
+    The table for byte j of a column is the first one rotated by 8 * j bits
+    """
+    table = tuple(
+        int.from_bytes(bytes(_gf_mul(sbox[x], m) for m in matrix_column), 'big') for x in range(256))
+    return (table, *(tuple((w >> 8 * j) | (w << 32 - 8 * j) & 0xFFFFFFFF for w in table) for j in (1, 2, 3)))
+
+
+TE0, TE1, TE2, TE3 = _make_round_tables(SBOX, (0x2, 0x1, 0x1, 0x3))
+TD0, TD1, TD2, TD3 = _make_round_tables(SBOX_INV, (0xE, 0x9, 0xD, 0xB))
+
+
+@functools.lru_cache(maxsize=16)
+def _encryption_round_keys(expanded_key):
+    return struct.unpack(f'>{len(expanded_key) // 4}I', expanded_key)
+
+
+@functools.lru_cache(maxsize=16)
+def _decryption_round_keys(expanded_key):
+    """ Round keys for the equivalent inverse cipher (FIPS-197, 5.3.5) in decryption order """
+    words = _encryption_round_keys(expanded_key)
+    round_keys = []
+    for i in range(len(words) - 4, -1, -4):
+        round_key = words[i:i + 4]
+        if 0 < i < len(words) - 4:
+            # InvMixColumns of the round key; TD* include InvSubBytes, so SBOX is applied first
+            round_key = [TD0[SBOX[w >> 24]] ^ TD1[SBOX[w >> 16 & 0xFF]] ^ TD2[SBOX[w >> 8 & 0xFF]] ^ TD3[SBOX[w & 0xFF]]
+                         for w in round_key]
+        round_keys.extend(round_key)
+    return tuple(round_keys)
+
+
+@functools.lru_cache(maxsize=16)
+def _expand_key(key):
+    return bytes(key_expansion(list(key)))
+
+
+def _encrypt_block(s0, s1, s2, s3, round_keys):
+    """ Encrypt one block, given as four big-endian 32-bit words """
+    s0 ^= round_keys[0]
+    s1 ^= round_keys[1]
+    s2 ^= round_keys[2]
+    s3 ^= round_keys[3]
+    for i in range(4, len(round_keys) - 4, 4):
+        s0, s1, s2, s3 = (
+            TE0[s0 >> 24] ^ TE1[s1 >> 16 & 0xFF] ^ TE2[s2 >> 8 & 0xFF] ^ TE3[s3 & 0xFF] ^ round_keys[i],
+            TE0[s1 >> 24] ^ TE1[s2 >> 16 & 0xFF] ^ TE2[s3 >> 8 & 0xFF] ^ TE3[s0 & 0xFF] ^ round_keys[i + 1],
+            TE0[s2 >> 24] ^ TE1[s3 >> 16 & 0xFF] ^ TE2[s0 >> 8 & 0xFF] ^ TE3[s1 & 0xFF] ^ round_keys[i + 2],
+            TE0[s3 >> 24] ^ TE1[s0 >> 16 & 0xFF] ^ TE2[s1 >> 8 & 0xFF] ^ TE3[s2 & 0xFF] ^ round_keys[i + 3])
+    # The last round has no MixColumns
+    return (
+        (SBOX[s0 >> 24] << 24 | SBOX[s1 >> 16 & 0xFF] << 16 | SBOX[s2 >> 8 & 0xFF] << 8 | SBOX[s3 & 0xFF]) ^ round_keys[-4],
+        (SBOX[s1 >> 24] << 24 | SBOX[s2 >> 16 & 0xFF] << 16 | SBOX[s3 >> 8 & 0xFF] << 8 | SBOX[s0 & 0xFF]) ^ round_keys[-3],
+        (SBOX[s2 >> 24] << 24 | SBOX[s3 >> 16 & 0xFF] << 16 | SBOX[s0 >> 8 & 0xFF] << 8 | SBOX[s1 & 0xFF]) ^ round_keys[-2],
+        (SBOX[s3 >> 24] << 24 | SBOX[s0 >> 16 & 0xFF] << 16 | SBOX[s1 >> 8 & 0xFF] << 8 | SBOX[s2 & 0xFF]) ^ round_keys[-1])
+
+
+def _decrypt_block(s0, s1, s2, s3, round_keys):
+    """ Decrypt one block, given as four big-endian 32-bit words """
+    s0 ^= round_keys[0]
+    s1 ^= round_keys[1]
+    s2 ^= round_keys[2]
+    s3 ^= round_keys[3]
+    for i in range(4, len(round_keys) - 4, 4):
+        s0, s1, s2, s3 = (
+            TD0[s0 >> 24] ^ TD1[s3 >> 16 & 0xFF] ^ TD2[s2 >> 8 & 0xFF] ^ TD3[s1 & 0xFF] ^ round_keys[i],
+            TD0[s1 >> 24] ^ TD1[s0 >> 16 & 0xFF] ^ TD2[s3 >> 8 & 0xFF] ^ TD3[s2 & 0xFF] ^ round_keys[i + 1],
+            TD0[s2 >> 24] ^ TD1[s1 >> 16 & 0xFF] ^ TD2[s0 >> 8 & 0xFF] ^ TD3[s3 & 0xFF] ^ round_keys[i + 2],
+            TD0[s3 >> 24] ^ TD1[s2 >> 16 & 0xFF] ^ TD2[s1 >> 8 & 0xFF] ^ TD3[s0 & 0xFF] ^ round_keys[i + 3])
+    return (
+        (SBOX_INV[s0 >> 24] << 24 | SBOX_INV[s3 >> 16 & 0xFF] << 16 | SBOX_INV[s2 >> 8 & 0xFF] << 8 | SBOX_INV[s1 & 0xFF]) ^ round_keys[-4],
+        (SBOX_INV[s1 >> 24] << 24 | SBOX_INV[s0 >> 16 & 0xFF] << 16 | SBOX_INV[s3 >> 8 & 0xFF] << 8 | SBOX_INV[s2 & 0xFF]) ^ round_keys[-3],
+        (SBOX_INV[s2 >> 24] << 24 | SBOX_INV[s1 >> 16 & 0xFF] << 16 | SBOX_INV[s0 >> 8 & 0xFF] << 8 | SBOX_INV[s3 & 0xFF]) ^ round_keys[-2],
+        (SBOX_INV[s3 >> 24] << 24 | SBOX_INV[s2 >> 16 & 0xFF] << 16 | SBOX_INV[s1 >> 8 & 0xFF] << 8 | SBOX_INV[s0 & 0xFF]) ^ round_keys[-1])
+
+
+def _xor_bytes(data1, data2):
+    """ XOR two byte strings of the same length as big integers """
+    return (int.from_bytes(data1, 'big') ^ int.from_bytes(data2, 'big')).to_bytes(len(data1), 'big')
+
+
+def _cbc_decrypt(data, key, iv):
+    round_keys = _decryption_round_keys(_expand_key(key))
+    size = len(data)
+    data += bytes(-size % BLOCK_SIZE_BYTES)
+    words = struct.unpack(f'>{len(data) // 4}I', data)
+
+    decrypted = []
+    for i in range(0, len(words), 4):
+        decrypted.extend(_decrypt_block(*words[i:i + 4], round_keys))
+    # The previous cipher blocks are XORed all at once
+    return _xor_bytes(struct.pack(f'>{len(decrypted)}I', *decrypted), (iv + data)[:len(data)])[:size]
+
+
+def _ctr_keystream(key, iv, size):
+    round_keys = _encryption_round_keys(_expand_key(key))
+    counter = int.from_bytes(iv, 'big')
+    keystream = []
+    for _ in range(-(-size // BLOCK_SIZE_BYTES)):
+        keystream.extend(_encrypt_block(
+            counter >> 96, counter >> 64 & 0xFFFFFFFF, counter >> 32 & 0xFFFFFFFF, counter & 0xFFFFFFFF, round_keys))
+        counter = (counter + 1) & ((1 << 128) - 1)
+    return struct.pack(f'>{len(keystream)}I', *keystream)[:size]
+
+
+def _ctr_crypt(data, key, iv):
+    return _xor_bytes(data, _ctr_keystream(key, iv, len(data)))
+
+
+def _ghash_tables(subkey):
+    """
+    Tables of the products with the hash subkey of every byte value at each position of a block
+
+    The product is linear, so the product of a block is the XOR of the ones of its bytes
+    """
+    v, powers = int.from_bytes(subkey, 'big'), []
+    for _ in range(128):
+        powers.append(v)
+        v = (v >> 1) ^ (0xE1 << 120) if v & 1 else v >> 1
+
+    tables = []
+    for i in range(0, 128, 8):
+        table = [0]
+        for bit in range(7, -1, -1):
+            table += [product ^ powers[i + bit] for product in table]
+        tables.append(table)
+    return tables
+
+
+def _ghash(tables, data):
+    # NIST SP 800-38D, Algorithm 2
+    last_y = 0
+    for i in range(0, len(data), BLOCK_SIZE_BYTES):
+        x = (last_y ^ int.from_bytes(data[i:i + BLOCK_SIZE_BYTES], 'big')).to_bytes(BLOCK_SIZE_BYTES, 'big')
+        last_y = 0
+        for table, byte in zip(tables, x):
+            last_y ^= table[byte]
+    return last_y.to_bytes(BLOCK_SIZE_BYTES, 'big')
+
+
+def _gcm_decrypt_and_verify(data, key, tag, nonce):
+    round_keys = _encryption_round_keys(_expand_key(key))
+    tables = _ghash_tables(struct.pack('>4I', *_encrypt_block(0, 0, 0, 0, round_keys)))
+
+    if len(nonce) == 12:
+        j0 = nonce + b'\x00\x00\x00\x01'
+    else:
+        j0 = _ghash(tables, nonce + bytes(-len(nonce) % BLOCK_SIZE_BYTES + 8) + (8 * len(nonce)).to_bytes(8, 'big'))
+
+    iv_ctr = ((int.from_bytes(j0, 'big') + 1) & ((1 << 128) - 1)).to_bytes(BLOCK_SIZE_BYTES, 'big')
+    decrypted_data = _ctr_crypt(data, key, iv_ctr)
+    s_tag = _ghash(
+        tables,
+        data
+        + bytes(-len(data) % BLOCK_SIZE_BYTES)  # pad
+        + (0 * 8).to_bytes(8, 'big')            # length of associated data
+        + (len(data) * 8).to_bytes(8, 'big'))   # length of data
+
+    if tag != _ctr_crypt(s_tag, key, j0):
+        raise ValueError("Mismatching authentication tag")
+
+    return decrypted_data
+
+
 def key_expansion(data):
     """
     Generate key schedule
@@ -1,18 +1,182 @@
+import collections
 import contextlib
+import copy
 import json
 import os
 import re
 import shutil
+import threading
+import time
 import traceback
 import urllib.parse
 
+from .dependencies import sqlite3
 from .utils import expand_path, traverse_obj, version_tuple, write_json_file
 from .version import __version__
 
 
+class _JsonCacheBackend:
+    """Each entry is a JSON file in a directory of its section"""
+
+    def __init__(self, root_dir):
+        self.root_dir = root_dir
+
+    def location(self, section, key):
+        key = urllib.parse.quote(key, safe='').replace('%', ',')  # encode non-ascii characters
+        return os.path.join(self.root_dir, section, f'{key}.json')
+
+    def read(self, section, key, touch=False):
+        fn = self.location(section, key)
+        try:
+            with open(fn, encoding='utf-8') as cachef:
+                entry = json.load(cachef)
+        except FileNotFoundError:
+            return None
+        if touch:
+            # The modification time is the last use of the entry for the eviction
+            with contextlib.suppress(OSError):
+                os.utime(fn)
+        return entry
+
+    def write(self, section, key, entry):
+        """Write the entry, and get its size"""
+        fn = self.location(section, key)
+        os.makedirs(os.path.dirname(fn), exist_ok=True)
+        write_json_file(entry, fn)
+        return os.path.getsize(fn)
+
+    def delete(self, section, key):
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self.location(section, key))
+
+    def _entry_files(self):
+        """Get the files of the entries, which are the JSON files in the directories of the sections"""
+        with contextlib.suppress(OSError), os.scandir(self.root_dir) as sections:
+            for section in sections:
+                if not section.is_dir():
+                    continue
+                with contextlib.suppress(OSError), os.scandir(section.path) as entries:
+                    for entry in entries:
+                        if entry.name.endswith('.json') and entry.is_file():
+                            yield entry
+
+    def evict(self, max_size):
+        """
+        Remove the least recently used entries until the cache is not larger than max_size,
+        and get (the size of the cache, if any entry was removed)
+        """
+        files = []
+        for entry in self._entry_files():
+            with contextlib.suppress(OSError):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        size, evicted = sum(file_size for _, file_size, _ in files), False
+        for _, file_size, fn in sorted(files):
+            if size <= max_size:
+                break
+            with contextlib.suppress(OSError):
+                os.remove(fn)
+                size -= file_size
+                evicted = True
+        return size, evicted
+
+    def close(self):
+        pass
+
+
+class _SqliteCacheBackend:
+    """
+    All the entries are in a single SQLite database, which can be shared by several processes.
+    It relies on the file locking of the filesystem, so it must not be on a network filesystem
+    """
+
+    FILENAME = 'cache.sqlite3'
+
+    def __init__(self, root_dir):
+        self.root_dir = root_dir
+        self._path = os.path.join(root_dir, self.FILENAME)
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def location(self, section, key):
+        return f'{self._path}:{section}/{key}'
+
+    def _execute(self, *queries):
+        """Run the queries in a single transaction, and get the rows of the first one"""
+        with self._lock:
+            try:
+                if self._connection is None:
+                    os.makedirs(self.root_dir, exist_ok=True)
+                    # The writes of every process are serialized by the locks of the database
+                    self._connection = sqlite3.connect(self._path, timeout=30, check_same_thread=False)
+                    self._connection.execute('''CREATE TABLE IF NOT EXISTS entries (
+                        section TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, size INTEGER NOT NULL,
+                        accessed REAL NOT NULL, expires REAL, PRIMARY KEY (section, key))''')
+                with self._connection:
+                    return [self._connection.execute(*query).fetchall() for query in queries][0]
+            except sqlite3.Error as e:
+                raise OSError(f'{self._path}: {e}') from e
+
+    def read(self, section, key, touch=False):
+        queries = [('SELECT value FROM entries WHERE section = ? AND key = ?', (section, key))]
+        if touch:
+            queries.append(('UPDATE entries SET accessed = ? WHERE section = ? AND key = ?', (time.time(), section, key)))
+        rows = self._execute(*queries)
+        return json.loads(rows[0][0]) if rows else None
+
+    def write(self, section, key, entry):
+        """Write the entry, and get its size"""
+        value = json.dumps(entry, ensure_ascii=False)
+        size = len(value.encode())
+        self._execute(('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)', (
+            section, key, value, size, time.time(), entry.get('expires'))))
+        return size
+
+    def delete(self, section, key):
+        self._execute(('DELETE FROM entries WHERE section = ? AND key = ?', (section, key)))
+
+    def evict(self, max_size):
+        """
+        Remove the expired entries, then the least recently used ones until the cache is not larger than max_size,
+        and get (the size of the cache, if any of the latter was removed)
+        """
+        self._execute(('DELETE FROM entries WHERE expires < ?', (time.time(), )))
+        size, evicted = 0, []
+        for rowid, entry_size in self._execute(('SELECT rowid, size FROM entries ORDER BY accessed DESC', )):
+            if evicted or size + entry_size > max_size:
+                evicted.append(rowid)
+            else:
+                size += entry_size
+        for i in range(0, len(evicted), 500):
+            chunk = evicted[i:i + 500]
+            self._execute((f'DELETE FROM entries WHERE rowid IN ({", ".join("?" * len(chunk))})', chunk))
+        return size, bool(evicted)
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
 class Cache:
+    _BACKENDS = {
+        'json': _JsonCacheBackend,
+        'sqlite': _SqliteCacheBackend,
+    }
+    # Number of the most recently used entries that are also kept in memory
+    _MEMORY_CACHE_SIZE = 64
+
     def __init__(self, ydl):
         self._ydl = ydl
+        self._backend = None
+        # The entries of the other processes may be newer, but they are not
+        # expected to change while this one is running
+        self._memory_cache = collections.OrderedDict()
+        self._lock = threading.Lock()
+        # Estimate of the size of the cache, which is measured again by the eviction once it exceeds the max size.
+        # It does not include the entries of the other processes
+        self._size = None
 
     def _get_root_dir(self):
         res = self._ydl.params.get('cachedir')
@@ -21,29 +185,88 @@ def _get_root_dir(self):
             res = os.path.join(cache_root, 'yt-dlp')
         return expand_path(res)
 
-    def _get_cache_fn(self, section, key, dtype):
+    def _get_backend(self):
+        root_dir = self._get_root_dir()
+        name = self._ydl.params.get('cache_backend') or 'json'
+        if name == 'sqlite' and not sqlite3:
+            self._ydl.report_warning(
+                'Cannot use the sqlite cache backend without sqlite3 support; Using json instead', only_once=True)
+            name = 'json'
+        backend_class = self._BACKENDS[name]
+        with self._lock:
+            if not isinstance(self._backend, backend_class) or self._backend.root_dir != root_dir:
+                if self._backend:
+                    self._backend.close()
+                self._backend = backend_class(root_dir)
+                self._memory_cache.clear()
+                self._size = None
+            return self._backend
+
+    @staticmethod
+    def _check_section(section):
         assert re.match(r'^[\w.-]+$', section), f'invalid section {section!r}'
-        key = urllib.parse.quote(key, safe='').replace('%', ',')  # encode non-ascii characters
-        return os.path.join(self._get_root_dir(), section, f'{key}.{dtype}')
+
+    def _get_cache_fn(self, section, key, dtype):
+        self._check_section(section)
+        return self._get_backend().location(section, key)
+
+    def _remember(self, section, key, entry):
+        with self._lock:
+            if entry is None:
+                self._memory_cache.pop((section, key), None)
+                return
+            self._memory_cache[(section, key)] = entry
+            self._memory_cache.move_to_end((section, key))
+            while len(self._memory_cache) > self._MEMORY_CACHE_SIZE:
+                self._memory_cache.popitem(last=False)
 
     @property
     def enabled(self):
         return self._ydl.params.get('cachedir') is not False
 
-    def store(self, section, key, data, dtype='json'):
+    def store(self, section, key, data, dtype='json', *, ttl=None):
+        """
+        Store data in the cache
+
+        @param ttl  Number of seconds after which the entry expires.
+                    By default, the TTL of the section in the cache_ttl param, if any
+        """
         assert dtype in ('json',)
 
         if not self.enabled:
             return
 
         fn = self._get_cache_fn(section, key, dtype)
+        ttl = ttl if ttl is not None else traverse_obj(self._ydl.params, ('cache_ttl', section))
+        entry = {'yt-dlp_version': __version__, 'data': data}
+        if ttl is not None:
+            entry['expires'] = time.time() + ttl
         try:
-            os.makedirs(os.path.dirname(fn), exist_ok=True)
             self._ydl.write_debug(f'Saving {section}.{key} to cache')
-            write_json_file({'yt-dlp_version': __version__, 'data': data}, fn)
+            size = self._get_backend().write(section, key, entry)
         except Exception:
             tb = traceback.format_exc()
             self._ydl.report_warning(f'Writing cache to {fn!r} failed: {tb}')
+            return
+        self._remember(section, key, copy.deepcopy(entry))
+
+        max_size = self._ydl.params.get('cache_max_size')
+        if max_size is None:
+            return
+        with self._lock:
+            if self._size is not None and self._size + size <= max_size:
+                self._size += size
+                return
+        try:
+            size, evicted = self._get_backend().evict(max_size)
+        except Exception as e:
+            self._ydl.report_warning(f'Unable to evict cache entries: {e}')
+            return
+        with self._lock:
+            self._size = size
+            if evicted:
+                # The entries that are in memory may have been evicted
+                self._memory_cache.clear()
 
     def _validate(self, data, min_ver):
         version = traverse_obj(data, 'yt-dlp_version')
@@ -62,10 +285,22 @@ def load(self, section, key, dtype='json', default=None, *, min_ver=None):
         cache_fn = self._get_cache_fn(section, key, dtype)
         with contextlib.suppress(OSError):
             try:
-                with open(cache_fn, encoding='utf-8') as cachef:
-                    self._ydl.write_debug(f'Loading {section}.{key} from cache')
-                    return self._validate(json.load(cachef), min_ver)
-            except (ValueError, KeyError):
+                entry = self._memory_cache.get((section, key))
+                if entry is None:
+                    entry = self._get_backend().read(
+                        section, key, touch=self._ydl.params.get('cache_max_size') is not None)
+                    if entry is None:
+                        return default
+                    self._remember(section, key, entry)
+                if traverse_obj(entry, ('expires', {float})) and entry['expires'] < time.time():
+                    self._ydl.write_debug(f'Discarding expired cache of {section}.{key}')
+                    self.delete(section, key, dtype)
+                    return default
+                self._ydl.write_debug(f'Loading {section}.{key} from cache')
+                # The entries in memory must not be modified by the caller
+                return copy.deepcopy(self._validate(entry, min_ver))
+            except (ValueError, KeyError, TypeError):
+                self._remember(section, key, None)
                 try:
                     file_size = os.path.getsize(cache_fn)
                 except OSError as oe:
@@ -74,6 +309,18 @@ def load(self, section, key, dtype='json', default=None, *, min_ver=None):
 
         return default
 
+    def delete(self, section, key, dtype='json'):
+        assert dtype in ('json',)
+
+        if not self.enabled:
+            return
+
+        self._check_section(section)
+        self._remember(section, key, None)
+        with contextlib.suppress(OSError):
+            self._ydl.write_debug(f'Removing {section}.{key} from cache')
+            self._get_backend().delete(section, key)
+
     def remove(self):
         if not self.enabled:
             self._ydl.to_screen('Cache is disabled (Did you combine --no-cache-dir and --rm-cache-dir?)')
@@ -83,6 +330,12 @@ def remove(self):
         if not any((term in cachedir) for term in ('cache', 'tmp')):
             raise Exception('Not removing directory %s - this does not look like a cache dir' % cachedir)
 
+        with self._lock:
+            if self._backend:
+                self._backend.close()
+            self._memory_cache.clear()
+            self._size = None
+
         self._ydl.to_screen(
             'Removing cache dir %s .' % cachedir, skip_eol=True)
         if os.path.exists(cachedir):
@@ -13,7 +13,8 @@ def get_suitable_downloader(info_dict, params={}, default=NO_DEFAULT, protocol=N
         return FFmpegFD
     elif (set(downloaders) == {DashSegmentsFD}
           and not (to_stdout and len(protocols) > 1)
-          and set(protocols) == {'http_dash_segments_generator'}):
+          and (set(protocols) == {'http_dash_segments_generator'}
+               or info_copy.get('is_live') and set(protocols) == {'http_dash_segments'})):
         return DashSegmentsFD
     elif len(downloaders) == 1:
         return downloaders[0]
@@ -104,12 +105,17 @@ def _get_suitable_downloader(info_dict, protocol, params, default):
         if ed.can_download(info_dict, external_downloader):
             return ed
 
+    if protocol in ('http', 'https') and info_dict.get('_index_range'):
+        # Single-file DASH representations can be downloaded in segments from the segment index
+        if params.get('concurrent_fragment_downloads', 1) > 1 and not info_dict.get('to_stdout'):
+            return DashSegmentsFD
+
     if protocol == 'http_dash_segments':
         if info_dict.get('is_live') and (external_downloader or '').lower() != 'native':
             return FFmpegFD
 
     if protocol in ('m3u8', 'm3u8_native'):
-        if info_dict.get('is_live'):
+        if info_dict.get('is_live') and (external_downloader or '').lower() != 'native':
             return FFmpegFD
         elif (external_downloader or '').lower() == 'native':
             return HlsFD
@@ -4,6 +4,7 @@
 import os
 import random
 import re
+import threading
 import time
 
 from ..minicurses import (
@@ -15,6 +16,7 @@
 from ..utils import (
     IDENTITY,
     NO_DEFAULT,
+    DownloadCancelled,
     LockingUnsupportedError,
     Namespace,
     RetryManager,
@@ -70,6 +72,9 @@ class FileDownloader:
                         passed to all downloaders. For compatibility with youtube-dl,
                         a single list of args can also be used
     hls_use_mpegts:     Use the mpegts container for HLS videos.
+    hls_native_remux:   Remux H.264/AAC MPEG-TS streams into fragmented MP4
+                        while they are downloaded by the native HLS
+                        downloader (default: True)
     http_chunk_size:    Size of a chunk for chunk-based HTTP downloading. May be
                         useful for bypassing bandwidth throttling imposed by
                         a webserver (experimental)
@@ -87,6 +92,9 @@ def __init__(self, ydl, params):
         self._set_ydl(ydl)
         self._progress_hooks = []
         self.params = params
+        self._progress_idx, self._shared_multiline = 0, False
+        # Set to stop the download at its next progress report
+        self._stop_event = threading.Event()
         self._prepare_multiline_status()
         self.add_progress_hook(self.report_progress)
 
@@ -288,6 +296,8 @@ def report_destination(self, filename):
         self.to_screen('[download] Destination: ' + filename)
 
     def _prepare_multiline_status(self, lines=1):
+        if self._shared_multiline:
+            return
         if self.params.get('noprogress'):
             self._multiline = QuietMultilinePrinter()
         elif self.ydl.params.get('logger'):
@@ -300,7 +310,16 @@ def _prepare_multiline_status(self, lines=1):
         self._multiline._HAVE_FULLCAP = self.ydl._allow_colors.out
 
     def _finish_multiline_status(self):
-        self._multiline.end()
+        if not self._shared_multiline:
+            self._multiline.end()
+
+    def _share_status(self, downloader, idx):
+        """
+        Report the progress on line idx of the status of another downloader,
+        and stop when it is stopped, e.g. for concurrent downloads
+        """
+        self._multiline, self._progress_idx, self._shared_multiline = downloader._multiline, idx, True
+        self._stop_event = downloader._stop_event
 
     ProgressStyles = Namespace(
         downloaded_bytes='light blue',
@@ -325,9 +344,10 @@ def _report_progress_status(self, s, default_template):
         progress_dict = {'info': s['info_dict'], 'progress': progress_dict}
 
         progress_template = self.params.get('progress_template', {})
+        progress_idx = s.get('progress_idx')
         self._multiline.print_at_line(self.ydl.evaluate_outtmpl(
             progress_template.get('download') or '[download] %(progress._default_template)s',
-            progress_dict), s.get('progress_idx') or 0)
+            progress_dict), self._progress_idx if progress_idx is None else progress_idx)
         self.to_console_title(self.ydl.evaluate_outtmpl(
             progress_template.get('download-title') or 'yt-dlp %(progress._default_template)s',
             progress_dict))
@@ -462,6 +482,8 @@ def real_download(self, filename, info_dict):
         raise NotImplementedError('This method must be implemented by subclasses')
 
     def _hook_progress(self, status, info_dict):
+        if self._stop_event.is_set():
+            raise DownloadCancelled('The download was stopped')
         # Ideally we want to make a copy of the dict, but that is too slow
         status['info_dict'] = info_dict
         # youtube-dl passes the same status object to all the hooks.
@@ -1,30 +1,65 @@
+import collections
+import functools
+import struct
+import threading
 import time
 import urllib.parse
 
 from . import get_suitable_downloader
 from .fragment import FragmentFD
-from ..utils import update_url_query, urljoin
+from .http import HttpFD
+from ..utils import (
+    RetryManager,
+    base_url,
+    network_exceptions,
+    parse_duration,
+    sanitized_Request,
+    traverse_obj,
+    update_url_query,
+    urljoin,
+)
 
 
 class DashSegmentsFD(FragmentFD):
     """
     Download segments in a DASH manifest. External downloaders can take over
     the fragment downloads by supporting the 'dash_frag_urls' protocol
+
+    Dynamic MPDs are refreshed according to their minimumUpdatePeriod, and
+    the segments of every requested representation are downloaded as they
+    become available
+
+    Single-file representations with a segment index (SegmentBase@indexRange)
+    are split into the byte ranges of the segments listed in their sidx box
     """
 
     FD_NAME = 'dashsegments'
+    # Number of segments before the live edge to start a live download from
+    _LIVE_EDGE_SEGMENTS = 3
 
     def real_download(self, filename, info_dict):
-        if info_dict.get('is_live') and set(info_dict['protocol'].split('+')) != {'http_dash_segments_generator'}:
-            self.report_error('Live DASH videos are not supported')
+        is_live = info_dict.get('is_live') and set(info_dict['protocol'].split('+')) != {'http_dash_segments_generator'}
+        if is_live and not all(fmt.get('manifest_url') for fmt in info_dict.get('requested_formats') or [info_dict]):
+            self.report_error('Live DASH videos without a manifest URL are not supported')
+            return False
 
         real_start = time.time()
-        real_downloader = get_suitable_downloader(
+        real_downloader = None if is_live else get_suitable_downloader(
             info_dict, self.params, None, protocol='dash_frag_urls', to_stdout=(filename == '-'))
 
+        # The manifest is shared between the representations so that it is fetched once per refresh
+        live_manifest = {'lock': threading.Lock()}
         requested_formats = [{**info_dict, **fmt} for fmt in info_dict.get('requested_formats', [])]
         args = []
         for fmt in requested_formats or [info_dict]:
+            if is_live:
+                fmt['fragments'] = functools.partial(self._live_fragments, fmt, live_manifest)
+            elif fmt.get('fragments') is None and fmt.get('_index_range'):
+                fmt['fragments'] = self._sidx_fragments(fmt)
+                if not fmt['fragments']:
+                    fd = HttpFD(self.ydl, self.params)
+                    self.report_warning(f'Unable to use the segment index; the download will be delegated to {fd.get_basename()}')
+                    return fd.real_download(filename, info_dict)
             try:
                 fragment_count = 1 if self.params.get('test') else len(fmt['fragments'])
             except TypeError:
@@ -59,6 +94,144 @@ def real_download(self, filename, info_dict):
 
         return self.download_and_append_fragments_multiple(*args, is_fatal=lambda idx: idx == 0)
 
+    def _fetch_live_manifest(self, fmt, live_manifest, max_age):
+        with live_manifest['lock']:
+            if time.time() - live_manifest.get('fetched', 0) < max_age:
+                return live_manifest.get('doc'), live_manifest.get('url')
+            from ..extractor.common import InfoExtractor
+
+            ie = InfoExtractor(self.ydl)
+            retry_manager = RetryManager(self.params.get('fragment_retries'), self.report_retry, fatal=False)
+            for retry in retry_manager:
+                res = ie._download_xml_handle(
+                    live_manifest.get('url') or fmt['manifest_url'], None, note=False, errnote=False,
+                    fatal=False, headers=fmt.get('http_headers') or {})
+                if not res:
+                    retry.error = 'Unable to download the live MPD manifest'
+                    continue
+                live_manifest.update({
+                    'doc': res[0],
+                    'url': res[1].geturl(),
+                    'fetched': time.time(),
+                    'ie': ie,
+                })
+                return live_manifest['doc'], live_manifest['url']
+            self.report_warning(f'{retry_manager.error}; Stopping the recording')
+            live_manifest.update({'doc': None, 'fetched': time.time()})
+            return None, None
+
+    def _live_fragments(self, fmt, live_manifest, ctx):
+        """Generate the fragments of a dynamic MPD as they become available"""
+        format_id, representation_id = fmt['format_id'], fmt.get('_representation_id')
+        # Fragment URLs of the latest manifests; it is trimmed after every refresh so that
+        # the memory usage does not grow with the duration of the stream
+        seen_urls = collections.OrderedDict()
+        refresh_interval, last_new_fragment = 1, time.time()
+        while True:
+            fetch_time = time.time()
+            mpd_doc, mpd_url = self._fetch_live_manifest(fmt, live_manifest, refresh_interval / 2)
+            if mpd_doc is None:
+                return
+            fmts, _ = live_manifest['ie']._parse_mpd_formats_and_subtitles(
+                mpd_doc, mpd_base_url=base_url(mpd_url), mpd_url=mpd_url)
+            # The representations of all the periods are joined. Without an id, the representation
+            # is matched by its format_id, which is not unique within a period
+            if representation_id is None:
+                matching = [f for f in fmts if f.get('fragments') and f['format_id'] == format_id]
+                if len(matching) > 1:
+                    self.report_warning(
+                        f'Format {format_id} is ambiguous in the live MPD manifest; Stopping the recording')
+                    return
+            else:
+                matching = [f for f in fmts if f.get('fragments') and f.get('_representation_id') == representation_id]
+            fragments = [
+                {**fragment, 'url': fragment.get('url') or urljoin(f['fragment_base_url'], fragment['path'])}
+                for f in matching for fragment in f['fragments']]
+            if not fragments:
+                self.report_warning(f'Format {format_id} is no longer in the live MPD manifest; Stopping the recording')
+                return
+
+            # Only the fragments after the last known one are new, since a window may be listed again
+            # (e.g. when the MPD becomes static at the end of the stream)
+            last_known = max((i for i, fragment in enumerate(fragments) if fragment['url'] in seen_urls), default=-1)
+            new_fragments = [fragment for fragment in fragments[last_known + 1:] if fragment['url'] not in seen_urls]
+            if not seen_urls and ctx.get('live') != 'is_from_start' and not self.params.get('live_from_start'):
+                # Start near the live edge; initialization segments have no duration
+                media_fragments = [fragment for fragment in new_fragments if 'duration' in fragment]
+                skipped = {fragment['url'] for fragment in media_fragments[:-self._LIVE_EDGE_SEGMENTS]}
+                new_fragments = [fragment for fragment in new_fragments if fragment['url'] not in skipped]
+            for fragment in fragments:
+                seen_urls[fragment['url']] = None
+                seen_urls.move_to_end(fragment['url'])
+            while len(seen_urls) > 2 * len(fragments):
+                seen_urls.popitem(last=False)
+
+            for fragment in new_fragments:
+                yield {key: fragment[key] for key in ('url', 'duration', 'byte_range') if key in fragment}
+
+            is_dynamic = mpd_doc.get('type') == 'dynamic'
+            if not is_dynamic:
+                return
+            if new_fragments:
+                last_new_fragment = time.time()
+            refresh_interval = max(1, parse_duration(mpd_doc.get('minimumUpdatePeriod'))
+                                   or traverse_obj(fragments, (-1, 'duration')) or 2)
+            if time.time() - last_new_fragment > max(60, 10 * refresh_interval):
+                self.report_warning('No new segments have been published for a while; Stopping the recording')
+                return
+            time.sleep(max(0, fetch_time + refresh_interval - time.time()))
+
+    @staticmethod
+    def _parse_sidx(data):
+        """Parse a sidx box into its first offset and (size, duration) references [ISO/IEC 14496-12, 8.16.3]"""
+        size, box_type = struct.unpack_from('>I4s', data)
+        if box_type != b'sidx' or size > len(data):
+            return None
+        version, timescale = data[8], struct.unpack_from('>I', data, 16)[0]
+        if version == 0:
+            _, first_offset = struct.unpack_from('>II', data, 20)
+            pos = 28
+        else:
+            _, first_offset = struct.unpack_from('>QQ', data, 20)
+            pos = 36
+        reference_count = struct.unpack_from('>H', data, pos + 2)[0]
+        references = []
+        for reference in struct.iter_unpack('>III', data[pos + 4:pos + 4 + 12 * reference_count]):
+            if reference[0] >> 31:
+                # Hierarchical indexes that reference other sidx boxes are not supported
+                return None
+            references.append((reference[0] & 0x7FFFFFFF, reference[1] / timescale if timescale else None))
+        return size, first_offset, references
+
+    def _sidx_fragments(self, fmt):
+        """Get the byte range fragments of a single-file representation from its sidx box"""
+        index_range = fmt['_index_range']
+        headers = {**(fmt.get('http_headers') or {}), 'Range': 'bytes=%d-%d' % (index_range['start'], index_range['end'] - 1)}
+        retry_manager = RetryManager(self.params.get('fragment_retries'), self.report_retry, fatal=False)
+        for retry in retry_manager:
+            try:
+                index = self.ydl.urlopen(sanitized_Request(fmt['url'], None, headers)).read()
+            except network_exceptions as err:
+                retry.error = err
+                continue
+            # Servers that ignore the range send the whole file, where the index is not at the start
+            sidx = self._parse_sidx(index) if len(index) == index_range['end'] - index_range['start'] else None
+            if not sidx:
+                return None
+            break
+        else:
+            return None
+
+        sidx_size, first_offset, references = sidx
+        # The initialization segment and the index itself are kept, so that the file is the same as the original
+        offset = index_range['start'] + sidx_size + first_offset
+        fragments = [{'url': fmt['url'], 'byte_range': {'start': 0, 'end': offset}}]
+        for size, duration in references:
+            fragments.append({'url': fmt['url'], 'byte_range': {'start': offset, 'end': offset + size}, 'duration': duration})
+            offset += size
+        self.write_debug(f'Segment index of format {fmt.get("format_id")} has {len(references)} segments')
+        return fragments
+
     def _resolve_fragments(self, fragments, ctx):
         fragments = fragments(ctx) if callable(fragments) else fragments
         return [next(iter(fragments))] if self.params.get('test') else fragments
@@ -84,4 +257,5 @@ def _get_fragments(self, fmt, ctx, extra_query):
                 'fragment_count': fragment.get('fragment_count'),
                 'index': i,
                 'url': fragment_url,
+                'byte_range': fragment.get('byte_range'),
             }
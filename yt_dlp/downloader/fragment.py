@@ -1,12 +1,18 @@
+import base64
+import collections
 import concurrent.futures
 import contextlib
+import copy
 import http.client
 import json
 import math
 import os
+import re
 import struct
+import threading
 import time
 import urllib.error
+import weakref
 
 from .common import FileDownloader
 from .http import HttpFD
@@ -18,6 +24,8 @@
     encodeFilename,
     sanitized_Request,
     traverse_obj,
+    try_call,
+    write_json_file,
 )
 
 
@@ -28,6 +36,121 @@ def to_screen(self, *args, **kargs):
     to_console_title = to_screen
 
 
+class FragmentProgress:
+    """
+    Progress accounting of a fragmented download that is fed by all the fragment workers
+
+    Every worker thread only updates its own counters, so the download loop never
+    waits on a lock. Totals, speed and ETA are aggregated only when reported
+    """
+
+    # Smoothing factor of the exponentially weighted moving average of the speed
+    SPEED_SMOOTHING = 0.3
+    # Minimum number of seconds between two speed samples
+    SPEED_INTERVAL = 0.5
+
+    def __init__(self, resume_len=0, fragment_index=0):
+        self.started = time.time()
+        self._resume_len = resume_len
+        self._resume_frags = fragment_index
+        self._workers = {}
+        self._register_lock = threading.Lock()
+        self._report_lock = threading.Lock()
+        self._speed = None
+        self._last_sample = (self.started, resume_len)
+
+    def _worker(self):
+        ident = threading.get_ident()
+        worker = self._workers.get(ident)
+        if worker is None:
+            with self._register_lock:
+                worker = self._workers[ident] = {
+                    'started': time.time(),
+                    'downloaded_bytes': 0,
+                    'completed_bytes': 0,
+                    'fragment_bytes': 0,
+                    'fragment_total_bytes': 0,
+                    'fragment_span': 1,
+                    'fragments': 0,
+                }
+        return worker
+
+    def _values(self, key):
+        with self._register_lock:
+            workers = tuple(self._workers.values())
+        return sum(worker[key] for worker in workers)
+
+    def _count(self, key):
+        with self._register_lock:
+            workers = tuple(self._workers.values())
+        return sum(worker['fragment_span'] for worker in workers if worker[key])
+
+    def update(self, status, downloaded_bytes=None, total_bytes=None, fragments=1):
+        worker = self._worker()
+        if status == 'finished':
+            size = total_bytes or worker['fragment_bytes']
+            worker['downloaded_bytes'] += size - worker['fragment_bytes']
+            worker['completed_bytes'] += size
+            worker['fragment_bytes'] = worker['fragment_total_bytes'] = 0
+            worker['fragments'] += fragments
+        elif downloaded_bytes is not None:
+            worker['downloaded_bytes'] += downloaded_bytes - worker['fragment_bytes']
+            worker['fragment_bytes'] = downloaded_bytes
+            worker['fragment_total_bytes'] = total_bytes or 0
+            worker['fragment_span'] = fragments
+
+    @property
+    def downloaded_bytes(self):
+        return self._resume_len + self._values('downloaded_bytes')
+
+    @property
+    def completed_bytes(self):
+        return self._resume_len + self._values('completed_bytes')
+
+    @property
+    def fragment_index(self):
+        return self._resume_frags + self._values('fragments')
+
+    @contextlib.contextmanager
+    def report_lock(self, blocking=False):
+        locked = self._report_lock.acquire(blocking)
+        try:
+            yield locked
+        finally:
+            if locked:
+                self._report_lock.release()
+
+    def speed(self, now=None):
+        """Smoothed speed of all the workers. Call with report_lock held"""
+        now = now or time.time()
+        downloaded_bytes = self.downloaded_bytes
+        last_time, last_bytes = self._last_sample
+        if now - last_time >= self.SPEED_INTERVAL:
+            sample = (downloaded_bytes - last_bytes) / (now - last_time)
+            self._speed = sample if self._speed is None else (
+                self.SPEED_SMOOTHING * sample + (1 - self.SPEED_SMOOTHING) * self._speed)
+            self._last_sample = (now, downloaded_bytes)
+        if self._speed is not None:
+            return self._speed
+        return FileDownloader.calc_speed(self.started, now, downloaded_bytes - self._resume_len)
+
+    def estimate_size(self, total_frags):
+        fragments = self.fragment_index + self._count('fragment_total_bytes')
+        if not total_frags or not fragments:
+            return None
+        return (self.completed_bytes + self._values('fragment_total_bytes')) / fragments * total_frags
+
+    def workers(self, now=None):
+        now = now or time.time()
+        with self._register_lock:
+            workers = tuple(self._workers.values())
+        return [{
+            'downloaded_bytes': worker['downloaded_bytes'],
+            'fragments': worker['fragments'],
+            'speed': FileDownloader.calc_speed(worker['started'], now, worker['downloaded_bytes']),
+        } for worker in workers]
+
+
 class FragmentFD(FileDownloader):
     """
     A base file downloader class for fragmented media (e.g. f4m/m3u8 manifests).
@@ -41,6 +164,9 @@ class FragmentFD(FileDownloader):
     keep_fragments:     Keep downloaded fragments on disk after downloading is
                         finished
     concurrent_fragment_downloads:  The number of threads to use for native hls and dash downloads
+    fragment_coalesce_size:  Maximum size in bytes of a request for adjacent byte range
+                        fragments of the same URL, which are then downloaded together
+                        (hlsnative and DASH only). 0 disables it. Default is 10MiB
     _no_ytdl_file:      Don't use .ytdl file
 
     For each incomplete fragment download yt-dlp keeps on disk a special
@@ -58,12 +184,29 @@ class FragmentFD(FileDownloader):
             current_fragment:
                 Dictionary with current (being downloaded) fragment data:
                 index:  0-based index of current fragment among all fragments
+                offset: Size of the output file after the last appended fragment
+            completed_fragments:
+                Base64-encoded bitmap of the fragments that have been downloaded
+                but not yet appended. Bit i (LSB first) represents the fragment
+                with index current_fragment.index + 1 + i
             fragment_count:
                 Total count of fragments
 
     This feature is experimental and file format may change in future.
     """
 
+    # Number of fragments per worker that may be downloaded ahead of the one being appended
+    _FRAGMENT_LOOKAHEAD = 4
+    # Default maximum size of a request for coalesced byte range fragments
+    _FRAGMENT_COALESCE_SIZE = 10 * 1024 * 1024
+    # Futures of the AES keys by video id and key URI, for each YoutubeDL instance. They are shared by
+    # all the downloaders of an instance, so that every format of a video reuses the keys.
+    # The same URI may serve another key to another video (e.g. depending on the session)
+    _key_cache = weakref.WeakKeyDictionary()
+    _key_cache_lock = threading.Lock()
+    # Maximum number of keys that are cached for each YoutubeDL instance, e.g. for rotating keys of livestreams
+    _KEY_CACHE_SIZE = 64
+
     def report_retry_fragment(self, err, frag_index, count, retries):
         self.deprecation_warning('yt_dlp.downloader.FragmentFD.report_retry_fragment is deprecated. '
                                  'Use yt_dlp.downloader.FileDownloader.report_retry instead')
@@ -84,12 +227,37 @@ def _prepare_and_start_frag_download(self, ctx, info_dict):
     def __do_ytdl_file(self, ctx):
         return ctx['live'] is not True and ctx['tmpfilename'] != '-' and not self.params.get('_no_ytdl_file')
 
+    @staticmethod
+    def _encode_fragment_bitmap(indices, base):
+        bitmap = bytearray()
+        for idx in indices:
+            pos = idx - base - 1
+            if pos < 0:
+                continue
+            if pos // 8 >= len(bitmap):
+                bitmap.extend(bytes(pos // 8 - len(bitmap) + 1))
+            bitmap[pos // 8] |= 1 << (pos % 8)
+        return base64.b64encode(bitmap).decode('ascii')
+
+    @staticmethod
+    def _decode_fragment_bitmap(data, base):
+        return {
+            base + 1 + pos * 8 + bit
+            for pos, byte in enumerate(base64.b64decode(data))
+            for bit in range(8) if byte & (1 << bit)}
+
     def _read_ytdl_file(self, ctx):
         assert 'ytdl_corrupt' not in ctx
         stream, _ = self.sanitize_open(self.ytdl_filename(ctx['filename']), 'r')
         try:
             ytdl_data = json.loads(stream.read())
-            ctx['fragment_index'] = ytdl_data['downloader']['current_fragment']['index']
+            current_fragment = ytdl_data['downloader']['current_fragment']
+            ctx['fragment_index'] = current_fragment['index']
+            if current_fragment.get('offset') is not None:
+                ctx['fragment_offset'] = current_fragment['offset']
+            if 'completed_fragments' in ytdl_data['downloader']:
+                ctx['completed_fragments'] = self._decode_fragment_bitmap(
+                    ytdl_data['downloader']['completed_fragments'], ctx['fragment_index'])
             if 'extra_state' in ytdl_data['downloader']:
                 ctx['extra_state'] = ytdl_data['downloader']['extra_state']
         except Exception:
@@ -98,28 +266,52 @@ def _read_ytdl_file(self, ctx):
             stream.close()
 
     def _write_ytdl_file(self, ctx):
-        frag_index_stream, _ = self.sanitize_open(self.ytdl_filename(ctx['filename']), 'w')
-        try:
-            downloader = {
-                'current_fragment': {
-                    'index': ctx['fragment_index'],
-                },
-            }
-            if 'extra_state' in ctx:
-                downloader['extra_state'] = ctx['extra_state']
-            if ctx.get('fragment_count') is not None:
-                downloader['fragment_count'] = ctx['fragment_count']
-            frag_index_stream.write(json.dumps({'downloader': downloader}))
-        finally:
-            frag_index_stream.close()
+        # The state may be written concurrently by the fragment workers, so the last
+        # appended fragment is kept in a dict that is shared between the ctx copies,
+        # together with the extra_state that matches it
+        resume_state = ctx.get('resume_state') or {'index': ctx['fragment_index'], 'extra_state': ctx.get('extra_state')}
+        downloader = {
+            'current_fragment': {
+                'index': resume_state['index'],
+            },
+        }
+        if resume_state.get('offset') is not None:
+            downloader['current_fragment']['offset'] = resume_state['offset']
+        completed = ctx.get('completed_fragments')
+        if completed:
+            downloader['completed_fragments'] = self._encode_fragment_bitmap(completed, resume_state['index'])
+        if resume_state.get('extra_state') is not None:
+            downloader['extra_state'] = resume_state['extra_state']
+        if ctx.get('fragment_count') is not None:
+            downloader['fragment_count'] = ctx['fragment_count']
+        # Write atomically so that a killed process never leaves a truncated state file
+        write_json_file({'downloader': downloader}, encodeFilename(self.ytdl_filename(ctx['filename'])))
+
+    def _mark_fragment_completed(self, ctx, frag_index):
+        if 'completed_fragments' not in ctx:
+            return
+        with ctx['ytdl_lock']:
+            ctx['completed_fragments'].add(frag_index)
+            # Without concurrency, the fragment is appended right away, which saves the state anyway
+            if ctx.get('fragment_workers', 1) > 1 and self.__do_ytdl_file(ctx):
+                self._write_ytdl_file(ctx)
 
     def _download_fragment(self, ctx, frag_url, info_dict, headers=None, request_data=None):
         fragment_filename = '%s-Frag%d' % (ctx['tmpfilename'], ctx['fragment_index'])
+        byte_range = re.match(r'bytes=(\d+)-(\d+)', traverse_obj(headers, 'Range') or '')
+        if (ctx['fragment_index'] in ctx.get('completed_fragments', ())
+                and os.path.isfile(encodeFilename(fragment_filename))
+                and (not byte_range or os.path.getsize(encodeFilename(fragment_filename))
+                     == int(byte_range.group(2)) - int(byte_range.group(1)) + 1)):
+            # Already downloaded before the previous run was interrupted
+            ctx['fragment_filename_sanitized'] = fragment_filename
+            return True
         fragment_info_dict = {
             'url': frag_url,
             'http_headers': headers or info_dict.get('http_headers'),
             'request_data': request_data,
             'ctx_id': ctx.get('ctx_id'),
+            'fragment_span': ctx.get('fragment_span', 1),
         }
         frag_resume_len = 0
         if ctx['dl'].params.get('continuedl', True):
@@ -132,6 +324,7 @@ def _download_fragment(self, ctx, frag_url, info_dict, headers=None, request_dat
         if fragment_info_dict.get('filetime'):
             ctx['fragment_filetime'] = fragment_info_dict.get('filetime')
         ctx['fragment_filename_sanitized'] = fragment_filename
+        self._mark_fragment_completed(ctx, ctx['fragment_index'])
         return True
 
     def _read_fragment(self, ctx):
@@ -153,11 +346,21 @@ def _append_fragment(self, ctx, frag_content):
             ctx['dest_stream'].write(frag_content)
             ctx['dest_stream'].flush()
         finally:
-            if self.__do_ytdl_file(ctx):
-                self._write_ytdl_file(ctx)
-            if not self.params.get('keep_fragments', False):
-                self.try_remove(encodeFilename(ctx['fragment_filename_sanitized']))
-            del ctx['fragment_filename_sanitized']
+            with ctx.get('ytdl_lock') or contextlib.nullcontext():
+                if 'resume_state' in ctx:
+                    ctx['completed_fragments'].discard(ctx['fragment_index'])
+                    ctx['resume_state'].update({
+                        'index': ctx['fragment_index'],
+                        'offset': try_call(ctx['dest_stream'].tell),
+                        # pack_func changes the extra_state before the fragment is appended
+                        'extra_state': copy.deepcopy(ctx.get('extra_state')),
+                    })
+                if self.__do_ytdl_file(ctx):
+                    self._write_ytdl_file(ctx)
+            # Coalesced fragments are appended in several parts from a single file
+            frag_filename = ctx.pop('fragment_filename_sanitized', None)
+            if frag_filename and not self.params.get('keep_fragments', False):
+                self.try_remove(encodeFilename(frag_filename))
 
     def _prepare_frag_download(self, ctx):
         if not ctx.setdefault('live', False):
@@ -169,11 +372,11 @@ def _prepare_frag_download(self, ctx):
             total_frags_str = 'unknown (live)'
         self.to_screen(f'[{self.FD_NAME}] Total fragments: {total_frags_str}')
         self.report_destination(ctx['filename'])
-        dl = HttpQuietDownloader(self.ydl, {
-            **self.params,
+        # The params are looked up in those of the download, which may change while it runs (e.g. the rate limits)
+        dl = HttpQuietDownloader(self.ydl, collections.ChainMap({
             'noprogress': True,
             'test': False,
-        })
+        }, self.params))
         tmpfilename = self.temp_name(ctx['filename'])
         open_mode = 'wb'
 
@@ -194,7 +397,9 @@ def _prepare_frag_download(self, ctx):
             if continuedl and ytdl_file_exists:
                 self._read_ytdl_file(ctx)
                 is_corrupt = ctx.get('ytdl_corrupt') is True
-                is_inconsistent = ctx['fragment_index'] > 0 and resume_len == 0
+                is_inconsistent = (
+                    ctx['fragment_index'] > 0 and resume_len == 0
+                    or resume_len < ctx.get('fragment_offset', 0))
                 if is_corrupt or is_inconsistent:
                     message = (
                         '.ytdl file is corrupt' if is_corrupt else
@@ -202,21 +407,41 @@ def _prepare_frag_download(self, ctx):
                     self.report_warning(
                         '%s. Restarting from the beginning ...' % message)
                     ctx['fragment_index'] = resume_len = 0
+                    open_mode = 'wb'
+                    ctx.pop('completed_fragments', None)
+                    ctx.pop('fragment_offset', None)
                     if 'ytdl_corrupt' in ctx:
                         del ctx['ytdl_corrupt']
                     self._write_ytdl_file(ctx)
+                elif resume_len > ctx.get('fragment_offset', resume_len):
+                    # The process was killed after a fragment was written but before its state was saved
+                    self.to_screen(f'[{self.FD_NAME}] Discarding partially appended fragment data')
+                    os.truncate(encodeFilename(tmpfilename), ctx['fragment_offset'])
+                    resume_len = ctx['fragment_offset']
+                if ctx.get('completed_fragments'):
+                    self.to_screen(
+                        f'[{self.FD_NAME}] Resuming with {len(ctx["completed_fragments"])} '
+                        'already downloaded fragments')
 
             else:
                 if not continuedl:
                     if ytdl_file_exists:
                         self._read_ytdl_file(ctx)
                     ctx['fragment_index'] = resume_len = 0
+                    ctx.pop('completed_fragments', None)
                 self._write_ytdl_file(ctx)
                 assert ctx['fragment_index'] == 0
 
         dest_stream, tmpfilename = self.sanitize_open(tmpfilename, open_mode)
 
         ctx.update({
+            'ytdl_lock': threading.Lock(),
+            'completed_fragments': ctx.get('completed_fragments') or set(),
+            'resume_state': {
+                'index': ctx['fragment_index'],
+                'offset': resume_len,
+                'extra_state': copy.deepcopy(ctx.get('extra_state')),
+            },
             'dl': dl,
             'dest_stream': dest_stream,
             'tmpfilename': tmpfilename,
@@ -239,13 +464,11 @@ def _start_frag_download(self, ctx, info_dict):
             'tmpfilename': ctx['tmpfilename'],
         }
 
-        start = time.time()
+        progress = FragmentProgress(resume_len, ctx['fragment_index'])
+        start = progress.started
         ctx.update({
             'started': start,
-            'fragment_started': start,
-            # Amount of fragment's bytes downloaded by the time of the previous
-            # frag progress hook invocation
-            'prev_frag_downloaded_bytes': 0,
+            'progress': progress,
         })
 
         def frag_progress_hook(s):
@@ -258,37 +481,33 @@ def frag_progress_hook(s):
             if ctx_id is not None and s.get('ctx_id') != ctx_id:
                 return
 
-            state['max_progress'] = ctx.get('max_progress')
-            state['progress_idx'] = ctx.get('progress_idx')
-
-            time_now = time.time()
-            state['elapsed'] = time_now - start
-            frag_total_bytes = s.get('total_bytes') or 0
             s['fragment_info_dict'] = s.pop('info_dict', {})
-            if not ctx['live']:
-                estimated_size = (
-                    (ctx['complete_frags_downloaded_bytes'] + frag_total_bytes)
-                    / (state['fragment_index'] + 1) * total_frags)
-                state['total_bytes_estimate'] = estimated_size
-
+            # This is called from every fragment worker; only the worker's own counters are updated here
+            progress.update(
+                s['status'], s.get('downloaded_bytes'), s.get('total_bytes'),
+                fragments=s['fragment_info_dict'].get('fragment_span', 1))
             if s['status'] == 'finished':
-                state['fragment_index'] += 1
-                ctx['fragment_index'] = state['fragment_index']
-                state['downloaded_bytes'] += frag_total_bytes - ctx['prev_frag_downloaded_bytes']
-                ctx['complete_frags_downloaded_bytes'] = state['downloaded_bytes']
-                ctx['speed'] = state['speed'] = self.calc_speed(
-                    ctx['fragment_started'], time_now, frag_total_bytes)
-                ctx['fragment_started'] = time.time()
-                ctx['prev_frag_downloaded_bytes'] = 0
-            else:
-                frag_downloaded_bytes = s['downloaded_bytes']
-                state['downloaded_bytes'] += frag_downloaded_bytes - ctx['prev_frag_downloaded_bytes']
-                ctx['speed'] = state['speed'] = self.calc_speed(
-                    ctx['fragment_started'], time_now, frag_downloaded_bytes - ctx.get('frag_resume_len', 0))
+                ctx['fragment_index'] = progress.fragment_index
+                ctx['complete_frags_downloaded_bytes'] = progress.completed_bytes
+
+            with progress.report_lock(s['status'] == 'finished') as locked:
+                if not locked:  # Another worker is reporting the same progress
+                    return
+                time_now = time.time()
+                state.update({
+                    'max_progress': ctx.get('max_progress'),
+                    'progress_idx': ctx.get('progress_idx'),
+                    'elapsed': time_now - start,
+                    'fragment_index': progress.fragment_index,
+                    'downloaded_bytes': progress.downloaded_bytes,
+                    'fragment_workers': progress.workers(time_now),
+                })
+                ctx['speed'] = state['speed'] = progress.speed(time_now)
                 if not ctx['live']:
-                    state['eta'] = self.calc_eta(state['speed'], estimated_size - state['downloaded_bytes'])
-                ctx['prev_frag_downloaded_bytes'] = frag_downloaded_bytes
-            self._hook_progress(state, info_dict)
+                    state['total_bytes_estimate'] = progress.estimate_size(total_frags)
+                    state['eta'] = self.calc_eta(
+                        state['speed'], try_call(lambda: state['total_bytes_estimate'] - state['downloaded_bytes']))
+                self._hook_progress(state, info_dict)
 
         ctx['dl'].add_progress_hook(frag_progress_hook)
 
@@ -352,14 +571,82 @@ def _prepare_external_frag_download(self, ctx):
             'fragment_index': 0,
         })
 
-    def decrypter(self, info_dict):
-        _key_cache = {}
+    def _coalesce_fragments(self, fragments):
+        """
+        Merge consecutive fragments that are adjacent byte ranges of the same URL,
+        so that they are downloaded with a single request of up to fragment_coalesce_size bytes.
+        The merged fragment lists the original ones in 'coalesced'
+        """
+        max_size = self.params.get('fragment_coalesce_size')
+        if max_size is None:
+            max_size = self._FRAGMENT_COALESCE_SIZE
+        if not max_size:
+            yield from fragments
+            return
+
+        def merge(group):
+            if len(group) == 1:
+                return group[0]
+            return {
+                **group[0],
+                'byte_range': {'start': group[0]['byte_range']['start'], 'end': group[-1]['byte_range']['end']},
+                'coalesced': group,
+            }
 
-        def _get_key(url):
-            if url not in _key_cache:
-                _key_cache[url] = self.ydl.urlopen(self._prepare_url(info_dict, url)).read()
-            return _key_cache[url]
+        group = []
+        for fragment in fragments:
+            byte_range = fragment.get('byte_range')
+            if group and not (
+                    byte_range and fragment['url'] == group[-1]['url']
+                    and byte_range['start'] == group[-1]['byte_range']['end']
+                    and byte_range['end'] - group[0]['byte_range']['start'] <= max_size):
+                yield merge(group)
+                group = []
+            if byte_range:
+                group.append(fragment)
+            else:
+                yield fragment
+        if group:
+            yield merge(group)
+
+    def _key_uri(self, info_dict, fragment):
+        """The URI of the AES key that is needed to decrypt the fragment, if any"""
+        decrypt_info = fragment.get('decrypt_info')
+        if not decrypt_info or decrypt_info['METHOD'] != 'AES-128' or decrypt_info.get('KEY'):
+            return None
+        return traverse_obj(info_dict, ('hls_aes', 'uri')) or decrypt_info['URI']
+
+    def _get_key(self, info_dict, url):
+        cache_key = (info_dict.get('id'), url)
+        with self._key_cache_lock:
+            keys = self._key_cache.setdefault(self.ydl, collections.OrderedDict())
+            future = keys.get(cache_key)
+            fetch = future is None
+            if fetch:
+                future = keys[cache_key] = concurrent.futures.Future()
+                while len(keys) > self._KEY_CACHE_SIZE:
+                    keys.popitem(last=False)
+            else:
+                keys.move_to_end(cache_key)
+        if fetch:
+            try:
+                future.set_result(self.ydl.urlopen(self._prepare_url(info_dict, url)).read())
+            except BaseException as e:
+                # Failed requests are not cached, so that they are retried by the next fragment
+                with self._key_cache_lock:
+                    if keys.get(cache_key) is future:
+                        keys.pop(cache_key)
+                future.set_exception(e)
+        return future.result()
+
+    def _prefetch_keys(self, info_dict, fragment, pool):
+        """Start the requests of the keys of the fragment, so that they are ready when it is decrypted"""
+        for part in fragment.get('coalesced') or [fragment]:
+            url = self._key_uri(info_dict, part)
+            if url and (info_dict.get('id'), url) not in self._key_cache.get(self.ydl, {}):
+                pool.submit(self._get_key, info_dict, url)
 
+    def decrypter(self, info_dict):
         def decrypt_fragment(fragment, frag_content):
             if frag_content is None:
                 return
@@ -367,8 +654,7 @@ def decrypt_fragment(fragment, frag_content):
             if not decrypt_info or decrypt_info['METHOD'] != 'AES-128':
                 return frag_content
             iv = decrypt_info.get('IV') or struct.pack('>8xq', fragment['media_sequence'])
-            decrypt_info['KEY'] = (decrypt_info.get('KEY')
-                                   or _get_key(traverse_obj(info_dict, ('hls_aes', 'uri')) or decrypt_info['URI']))
+            decrypt_info['KEY'] = decrypt_info.get('KEY') or self._get_key(info_dict, self._key_uri(info_dict, fragment))
             # Don't decrypt the content in tests since the data is explicitly truncated and it's not to a valid block
             # size (see https://github.com/ytdl-org/youtube-dl/pull/27660). Tests only care that the correct data downloaded,
             # not what it decrypts to.
@@ -463,6 +749,7 @@ def download_fragment(fragment, ctx):
 
             # Never skip the first fragment
             fatal = is_fatal(fragment.get('index') or (frag_index - 1))
+            ctx['fragment_span'] = len(fragment.get('coalesced') or [fragment])
 
             def error_callback(err, count, retries):
                 if fatal and count > retries:
@@ -494,42 +781,83 @@ def append_fragment(frag_content, frag_index, ctx):
                 return False
             return True
 
+        def decrypt_fragments(fragment, frag_content):
+            """Get the (fragment, decrypted content) of the fragment, or of its parts if it is coalesced"""
+            if not fragment.get('coalesced') or frag_content is None:
+                return [(fragment, decrypt_fragment(fragment, frag_content))]
+            # Split the response back into the original fragments for decryption and resuming
+            parts, offset = [], 0
+            for i, part in enumerate(fragment['coalesced'], 1):
+                size = part['byte_range']['end'] - part['byte_range']['start']
+                part_content = frag_content[offset:] if i == len(fragment['coalesced']) else frag_content[offset:offset + size]
+                offset += size
+                parts.append((part, decrypt_fragment(part, part_content)))
+            return parts
+
+        def append_fragments(parts, ctx):
+            for part, frag_content in parts:
+                ctx['fragment_index'] = part['frag_index']
+                if not append_fragment(frag_content, part['frag_index'], ctx):
+                    return False
+            return True
+
         decrypt_fragment = self.decrypter(info_dict)
+        if not ctx.get('live'):
+            fragments = self._coalesce_fragments(fragments)
 
-        max_workers = math.ceil(
+        max_workers = ctx['fragment_workers'] = math.ceil(
             self.params.get('concurrent_fragment_downloads', 1) / ctx.get('max_progress', 1))
         if max_workers > 1:
             def _download_fragment(fragment):
                 ctx_copy = ctx.copy()
+                ctx_copy.pop('fragment_filename_sanitized', None)
                 download_fragment(fragment, ctx_copy)
-                return fragment, fragment['frag_index'], ctx_copy.get('fragment_filename_sanitized')
+                # The fragment is decrypted by the worker, so that only the writes are left to the ordered append
+                parts = decrypt_fragments(fragment, self._read_fragment(ctx_copy))
+                return parts, fragment['frag_index'], ctx_copy.get('fragment_filename_sanitized')
+
+            # Only a bounded number of fragments are submitted ahead of the one being appended,
+            # so that the fragments can be lazily generated (e.g. for livestreams)
+            pending = collections.deque()
+
+            def download_fragments(pool):
+                for fragment in fragments:
+                    while pending and (len(pending) >= max_workers * self._FRAGMENT_LOOKAHEAD or pending[0].done()):
+                        yield pending.popleft().result()
+                    self._prefetch_keys(info_dict, fragment, pool)
+                    pending.append(pool.submit(_download_fragment, fragment))
+                while pending:
+                    yield pending.popleft().result()
 
-            self.report_warning('The download speed shown is only of one thread. This is a known issue')
             with tpe or concurrent.futures.ThreadPoolExecutor(max_workers) as pool:
                 try:
-                    for fragment, frag_index, frag_filename in pool.map(_download_fragment, fragments):
+                    for parts, frag_index, frag_filename in download_fragments(pool):
                         ctx.update({
                             'fragment_filename_sanitized': frag_filename,
                             'fragment_index': frag_index,
                         })
-                        if not append_fragment(decrypt_fragment(fragment, self._read_fragment(ctx)), frag_index, ctx):
+                        if not append_fragments(parts, ctx):
                             return False
                 except KeyboardInterrupt:
-                    self._finish_multiline_status()
-                    self.report_error(
-                        'Interrupted by user. Waiting for all threads to shutdown...', is_error=False, tb=False)
-                    pool.shutdown(wait=False)
-                    raise
+                    for future in pending:
+                        future.cancel()
+                    if ctx.get('live'):
+                        self.to_screen(f'[{self.FD_NAME}] Interrupted by user. Finishing the recording ...')
+                    else:
+                        self._finish_multiline_status()
+                        self.report_error(
+                            'Interrupted by user. Waiting for all threads to shutdown...', is_error=False, tb=False)
+                        pool.shutdown(wait=False)
+                        raise
         else:
             for fragment in fragments:
                 if not interrupt_trigger[0]:
                     break
                 try:
                     download_fragment(fragment, ctx)
-                    result = append_fragment(
-                        decrypt_fragment(fragment, self._read_fragment(ctx)), fragment['frag_index'], ctx)
+                    result = append_fragments(decrypt_fragments(fragment, self._read_fragment(ctx)), ctx)
                 except KeyboardInterrupt:
-                    if info_dict.get('is_live'):
+                    if info_dict.get('is_live') or ctx.get('live'):
                         break
                     raise
                 if not result:
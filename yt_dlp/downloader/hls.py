@@ -1,15 +1,22 @@
 import binascii
+import http.client
 import io
+import os
 import re
+import time
+import urllib.error
 import urllib.parse
 
 from . import get_suitable_downloader
 from .external import FFmpegFD
 from .fragment import FragmentFD
+from .mpegts import MpegTsError, MpegTsRemuxer
 from .. import webvtt
 from ..dependencies import Cryptodome
 from ..utils import (
+    RetryManager,
     bug_reports_message,
+    encodeFilename,
     parse_m3u8_attributes,
     remove_start,
     traverse_obj,
@@ -23,9 +30,16 @@ class HlsFD(FragmentFD):
     Download segments in a m3u8 manifest. External downloaders can take over
     the fragment downloads by supporting the 'm3u8_frag_urls' protocol and
     re-defining 'supports_manifest' function
+
+    Live media playlists are re-polled at the target-duration cadence and
+    only the new segments are downloaded, until #EXT-X-ENDLIST is found
     """
 
     FD_NAME = 'hlsnative'
+    # Whether the MPEG-TS streams may be remuxed natively, which is not retried once it has failed
+    _native_remux = True
+    # Default number of seconds between playlist refreshes, used when #EXT-X-TARGETDURATION is missing
+    _LIVE_REFRESH_INTERVAL = 10
 
     @staticmethod
     def can_download(manifest, info_dict, allow_unplayable_formats=False):
@@ -54,7 +68,6 @@ def can_download(manifest, info_dict, allow_unplayable_formats=False):
             ]
 
         def check_results():
-            yield not info_dict.get('is_live')
             for feature in UNSUPPORTED_FEATURES:
                 yield not re.search(feature, manifest)
         return all(check_results())
@@ -76,10 +89,12 @@ def real_download(self, filename, info_dict):
             elif no_crypto:
                 message = ('The stream has AES-128 encryption and neither ffmpeg nor pycryptodomex are available; '
                            'Decryption will be performed natively, but will be extremely slow')
-            elif info_dict.get('extractor_key') == 'Generic' and re.search(r'(?m)#EXT-X-MEDIA-SEQUENCE:(?!0$)', s):
-                install_ffmpeg = '' if has_ffmpeg else 'install ffmpeg and '
-                message = ('Live HLS streams are not supported by the native downloader. If this is a livestream, '
-                           f'please {install_ffmpeg}add "--downloader ffmpeg --hls-use-mpegts" to your command')
+        is_live = info_dict.get('is_live')
+        if (can_download and not is_live and '#EXT-X-ENDLIST' not in s
+                and info_dict.get('extractor_key') == 'Generic'
+                and re.search(r'(?m)#EXT-X-MEDIA-SEQUENCE:(?!0$)', s)):
+            is_live = True
+            self.to_screen(f'[{self.FD_NAME}] The stream seems to be live; the playlist will be refreshed until it ends')
         if not can_download:
             has_drm = re.search('|'.join([
                 r'#EXT-X-FAXS-CM:',  # Adobe Flash Access
@@ -98,8 +113,9 @@ def real_download(self, filename, info_dict):
             self.report_warning(message)
 
         is_webvtt = info_dict['ext'] == 'vtt'
-        if is_webvtt:
-            real_downloader = None  # Packing the fragments is not currently supported for external downloader
+        if is_webvtt or is_live:
+            # Packing the fragments and refreshing the playlist are not currently supported for external downloader
+            real_downloader = None
         else:
             real_downloader = get_suitable_downloader(
                 info_dict, self.params, None, protocol='m3u8_frag_urls', to_stdout=(filename == '-'))
@@ -116,8 +132,6 @@ def is_ad_fragment_end(s):
             return (s.startswith('#ANVATO-SEGMENT-INFO') and 'type=master' in s
                     or s.startswith('#UPLYNK-SEGMENT') and s.endswith(',segment'))
 
-        fragments = []
-
         media_frags = 0
         ad_frags = 0
         ad_frag_next = False
@@ -138,8 +152,9 @@ def is_ad_fragment_end(s):
 
         ctx = {
             'filename': filename,
-            'total_frags': media_frags,
+            'total_frags': None if is_live else media_frags,
             'ad_frags': ad_frags,
+            'live': bool(is_live),
         }
 
         if real_downloader:
@@ -154,9 +169,6 @@ def is_ad_fragment_end(s):
         extra_param_to_segment_url = info_dict.get('extra_param_to_segment_url')
         if extra_param_to_segment_url:
             extra_query = urllib.parse.parse_qs(extra_param_to_segment_url)
-        i = 0
-        media_sequence = 0
-        decrypt_info = {'METHOD': 'NONE'}
         external_aes_key = traverse_obj(info_dict, ('hls_aes', 'key'))
         if external_aes_key:
             external_aes_key = binascii.unhexlify(remove_start(external_aes_key, '0x'))
@@ -164,101 +176,174 @@ def is_ad_fragment_end(s):
         external_aes_iv = traverse_obj(info_dict, ('hls_aes', 'iv'))
         if external_aes_iv:
             external_aes_iv = binascii.unhexlify(remove_start(external_aes_iv, '0x').zfill(32))
-        byte_range = {}
-        discontinuity_count = 0
-        frag_index = 0
-        ad_frag_next = False
-        for line in s.splitlines():
-            line = line.strip()
-            if line:
-                if not line.startswith('#'):
-                    if format_index and discontinuity_count != format_index:
-                        continue
-                    if ad_frag_next:
-                        continue
-                    frag_index += 1
-                    if frag_index <= ctx['fragment_index']:
-                        continue
-                    frag_url = urljoin(man_url, line)
-                    if extra_query:
-                        frag_url = update_url_query(frag_url, extra_query)
-
-                    fragments.append({
-                        'frag_index': frag_index,
-                        'url': frag_url,
-                        'decrypt_info': decrypt_info,
-                        'byte_range': byte_range,
-                        'media_sequence': media_sequence,
-                    })
-                    media_sequence += 1
-
-                elif line.startswith('#EXT-X-MAP'):
-                    if format_index and discontinuity_count != format_index:
-                        continue
-                    if frag_index > 0:
-                        self.report_error(
-                            'Initialization fragment found after media fragments, unable to download')
-                        return False
-                    frag_index += 1
-                    map_info = parse_m3u8_attributes(line[11:])
-                    frag_url = urljoin(man_url, map_info.get('URI'))
-                    if extra_query:
-                        frag_url = update_url_query(frag_url, extra_query)
 
-                    if map_info.get('BYTERANGE'):
-                        splitted_byte_range = map_info.get('BYTERANGE').split('@')
+        def parse_fragments(s, man_url, live=False):
+            fragments = []
+            i = 0
+            media_sequence = 0
+            decrypt_info = {'METHOD': 'NONE'}
+            byte_range = {}
+            discontinuity_count = 0
+            frag_index = 0
+            ad_frag_next = False
+            for line in s.splitlines():
+                line = line.strip()
+                if line:
+                    if not line.startswith('#'):
+                        if format_index and discontinuity_count != format_index:
+                            continue
+                        if ad_frag_next:
+                            continue
+                        frag_index += 1
+                        if not live and frag_index <= ctx['fragment_index']:
+                            continue
+                        frag_url = urljoin(man_url, line)
+                        if extra_query:
+                            frag_url = update_url_query(frag_url, extra_query)
+
+                        fragments.append({
+                            'frag_index': frag_index,
+                            'url': frag_url,
+                            'decrypt_info': decrypt_info,
+                            'byte_range': byte_range,
+                            'media_sequence': media_sequence,
+                        })
+                        media_sequence += 1
+
+                    elif line.startswith('#EXT-X-MAP'):
+                        if format_index and discontinuity_count != format_index:
+                            continue
+                        if frag_index > 0 and not live:
+                            self.report_error(
+                                'Initialization fragment found after media fragments, unable to download')
+                            return None
+                        frag_index += 1
+                        map_info = parse_m3u8_attributes(line[11:])
+                        frag_url = urljoin(man_url, map_info.get('URI'))
+                        if extra_query:
+                            frag_url = update_url_query(frag_url, extra_query)
+
+                        if map_info.get('BYTERANGE'):
+                            splitted_byte_range = map_info.get('BYTERANGE').split('@')
+                            sub_range_start = int(splitted_byte_range[1]) if len(splitted_byte_range) == 2 else byte_range['end']
+                            byte_range = {
+                                'start': sub_range_start,
+                                'end': sub_range_start + int(splitted_byte_range[0]),
+                            }
+
+                        fragments.append({
+                            'frag_index': frag_index,
+                            'url': frag_url,
+                            'decrypt_info': decrypt_info,
+                            'byte_range': byte_range,
+                            'media_sequence': media_sequence,
+                            **({'init_section': True} if live else {}),
+                        })
+                        # In live playlists, the sequence numbers are needed to identify the new segments
+                        if not live:
+                            media_sequence += 1
+
+                    elif line.startswith('#EXT-X-KEY'):
+                        decrypt_url = decrypt_info.get('URI')
+                        decrypt_info = parse_m3u8_attributes(line[11:])
+                        if decrypt_info['METHOD'] == 'AES-128':
+                            if external_aes_iv:
+                                decrypt_info['IV'] = external_aes_iv
+                            elif 'IV' in decrypt_info:
+                                decrypt_info['IV'] = binascii.unhexlify(decrypt_info['IV'][2:].zfill(32))
+                            if external_aes_key:
+                                decrypt_info['KEY'] = external_aes_key
+                            else:
+                                decrypt_info['URI'] = urljoin(man_url, decrypt_info['URI'])
+                                if extra_query:
+                                    decrypt_info['URI'] = update_url_query(decrypt_info['URI'], extra_query)
+                                if decrypt_url != decrypt_info['URI']:
+                                    decrypt_info['KEY'] = None
+
+                    elif line.startswith('#EXT-X-MEDIA-SEQUENCE'):
+                        media_sequence = int(line[22:])
+                    elif line.startswith('#EXT-X-BYTERANGE'):
+                        splitted_byte_range = line[17:].split('@')
                         sub_range_start = int(splitted_byte_range[1]) if len(splitted_byte_range) == 2 else byte_range['end']
                         byte_range = {
                             'start': sub_range_start,
                             'end': sub_range_start + int(splitted_byte_range[0]),
                         }
-
-                    fragments.append({
-                        'frag_index': frag_index,
-                        'url': frag_url,
-                        'decrypt_info': decrypt_info,
-                        'byte_range': byte_range,
-                        'media_sequence': media_sequence
-                    })
-                    media_sequence += 1
-
-                elif line.startswith('#EXT-X-KEY'):
-                    decrypt_url = decrypt_info.get('URI')
-                    decrypt_info = parse_m3u8_attributes(line[11:])
-                    if decrypt_info['METHOD'] == 'AES-128':
-                        if external_aes_iv:
-                            decrypt_info['IV'] = external_aes_iv
-                        elif 'IV' in decrypt_info:
-                            decrypt_info['IV'] = binascii.unhexlify(decrypt_info['IV'][2:].zfill(32))
-                        if external_aes_key:
-                            decrypt_info['KEY'] = external_aes_key
-                        else:
-                            decrypt_info['URI'] = urljoin(man_url, decrypt_info['URI'])
-                            if extra_query:
-                                decrypt_info['URI'] = update_url_query(decrypt_info['URI'], extra_query)
-                            if decrypt_url != decrypt_info['URI']:
-                                decrypt_info['KEY'] = None
-
-                elif line.startswith('#EXT-X-MEDIA-SEQUENCE'):
-                    media_sequence = int(line[22:])
-                elif line.startswith('#EXT-X-BYTERANGE'):
-                    splitted_byte_range = line[17:].split('@')
-                    sub_range_start = int(splitted_byte_range[1]) if len(splitted_byte_range) == 2 else byte_range['end']
-                    byte_range = {
-                        'start': sub_range_start,
-                        'end': sub_range_start + int(splitted_byte_range[0]),
-                    }
-                elif is_ad_fragment_start(line):
-                    ad_frag_next = True
-                elif is_ad_fragment_end(line):
-                    ad_frag_next = False
-                elif line.startswith('#EXT-X-DISCONTINUITY'):
-                    discontinuity_count += 1
-                i += 1
+                    elif is_ad_fragment_start(line):
+                        ad_frag_next = True
+                    elif is_ad_fragment_end(line):
+                        ad_frag_next = False
+                    elif line.startswith('#EXT-X-DISCONTINUITY'):
+                        discontinuity_count += 1
+                    i += 1
+            return fragments
+
+        def refresh_playlist(man_url):
+            retry_manager = RetryManager(self.params.get('fragment_retries'), self.report_retry, fatal=False)
+            for retry in retry_manager:
+                try:
+                    urlh = self.ydl.urlopen(self._prepare_url(info_dict, man_url))
+                    return urlh.read().decode('utf-8', 'ignore')
+                except (urllib.error.HTTPError, http.client.IncompleteRead) as err:
+                    retry.error = err
+                    continue
+            self.report_warning(f'Unable to refresh the live playlist: {retry_manager.error}; Stopping the recording')
+
+        def live_fragments(s, man_url):
+            # Only the sequence number of the last segment and the current initialization
+            # section are kept, so that the memory usage does not grow with the stream duration
+            frag_index, last_sequence, last_init = 0, None, None
+            while True:
+                refreshed = time.time()
+                fragments = parse_fragments(s, man_url, live=True)
+                media_sequences = [f['media_sequence'] for f in fragments if not f.get('init_section')]
+                if media_sequences and last_sequence is not None:
+                    if media_sequences[-1] < last_sequence:
+                        self.report_warning('The media sequence of the live playlist has been reset')
+                        last_sequence = None
+                    elif media_sequences[0] > last_sequence + 1:
+                        self.report_warning(
+                            f'Missed {media_sequences[0] - last_sequence - 1} fragments that are no longer '
+                            'in the live playlist')
+
+                new_frags, init_section = 0, None
+                for fragment in fragments:
+                    if fragment.pop('init_section', False):
+                        init_section = fragment
+                        continue
+                    elif last_sequence is not None and fragment['media_sequence'] <= last_sequence:
+                        continue
+                    last_sequence = fragment['media_sequence']
+                    new_frags += 1
+                    # A new initialization section follows discontinuities in fMP4 streams
+                    init_key = init_section and (init_section['url'], init_section['byte_range'].get('start'))
+                    if init_key and init_key != last_init:
+                        last_init = init_key
+                        frag_index += 1
+                        yield {**init_section, 'frag_index': frag_index}
+                    frag_index += 1
+                    yield {**fragment, 'frag_index': frag_index}
+
+                if '#EXT-X-ENDLIST' in s:
+                    return
+                mobj = re.search(r'(?m)^#EXT-X-TARGETDURATION:(\d+(?:\.\d+)?)', s)
+                target_duration = float(mobj.group(1)) if mobj else self._LIVE_REFRESH_INTERVAL
+                # Refresh after half the target duration when the playlist has not changed (RFC 8216, 6.3.4)
+                time.sleep(max(0, refreshed + (target_duration if new_frags else target_duration / 2) - time.time()))
+                s = refresh_playlist(man_url)
+                if s is None:
+                    return
+
+        if is_live:
+            fragments = live_fragments(s, man_url)
+        else:
+            fragments = parse_fragments(s, man_url)
+            if fragments is None:
+                return False
 
         # We only download the first fragment during the test
         if self.params.get('test', False):
-            fragments = [fragments[0] if fragments else None]
+            fragments = [next(iter(fragments), None)]
 
         if real_downloader:
             info_dict['fragments'] = fragments
@@ -361,5 +446,49 @@ def fin_fragments():
 
             self.download_and_append_fragments(
                 ctx, fragments, info_dict, pack_func=pack_fragment, finish_func=fin_fragments)
+        elif (info_dict['ext'] in ('mp4', 'm4a') and filename != '-' and '#EXT-X-MAP' not in s
+                # The streams may change at a discontinuity (e.g. an inserted ad), which may
+                # also be added to the playlist of a livestream after it is refreshed
+                and not ctx['live'] and not re.search(r'(?m)^#EXT-X-DISCONTINUITY\s*$', s)
+                and self._native_remux and not self.params.get('hls_use_mpegts')
+                and self.params.get('hls_native_remux', True)):
+            if ctx['fragment_index'] and 'mpegts_remux' not in extra_state:
+                # The download was started without remuxing
+                extra_state['mpegts_remux'] = False
+            remuxer = MpegTsRemuxer(extra_state.get('mpegts_remux'))
+
+            def pack_fragment(frag_content, frag_index):
+                if extra_state.get('mpegts_remux') is False:
+                    return frag_content
+                is_first = not extra_state.get('mpegts_remux')
+                try:
+                    frag_content = remuxer.remux(frag_content)
+                except MpegTsError as e:
+                    if not is_first:
+                        raise MpegTsError(f'Unable to remux fragment {frag_index}: {e}') from e
+                    # The MPEG-TS file will be fixed up by ffmpeg
+                    self.write_debug(f'Unable to remux the MPEG-TS stream natively: {e}')
+                    extra_state['mpegts_remux'] = False
+                    return frag_content
+                extra_state['mpegts_remux'] = remuxer.state
+                return frag_content
+
+            try:
+                return self.download_and_append_fragments(ctx, fragments, info_dict, pack_func=pack_fragment)
+            except MpegTsError as e:
+                # The remuxed fragments cannot be followed by MPEG-TS ones, so the stream is downloaded again
+                self.report_warning(f'{e}; Downloading the stream again without remuxing it natively')
+                ctx['dest_stream'].close()
+                os.truncate(encodeFilename(ctx['tmpfilename']), 0)
+                if os.path.isfile(encodeFilename(self.ytdl_filename(ctx['filename']))):
+                    ctx.pop('extra_state')
+                    ctx.update({
+                        'fragment_index': 0,
+                        'resume_state': {'index': 0, 'offset': 0},
+                        'completed_fragments': set(),
+                    })
+                    self._write_ytdl_file(ctx)
+                self._native_remux = False
+                return self.real_download(filename, info_dict)
         else:
             return self.download_and_append_fragments(ctx, fragments, info_dict)
@@ -0,0 +1,517 @@
+"""
+Remuxing of MPEG-TS (ISO/IEC 13818-1) into fragmented MP4 (ISO/IEC 14496-12)
+
+Only H.264 video and AAC audio (in ADTS) are supported. Every MPEG-TS segment is
+converted into a single fragment (moof/mdat), so that the segments can be remuxed
+as they are downloaded
+"""
+
+import re
+
+from .ism import box, full_box, s16, u8, u16, u32, u64, unity_matrix
+from ..utils import YoutubeDLError
+
+_PACKET_SIZE = 188
+_STREAM_TYPES = {
+    0x1b: 'video',  # H.264
+    0x0f: 'audio',  # AAC in ADTS
+}
+# Streams that can be dropped from the output
+_IGNORED_STREAM_TYPES = (
+    0x15,  # ID3 timed metadata
+    0x86,  # SCTE-35 cues
+)
+_SAMPLING_RATES = (96000, 88200, 64000, 48000, 44100, 32000, 24000, 22050, 16000, 12000, 11025, 8000, 7350)
+_HIGH_PROFILES = (100, 110, 122, 244, 44, 83, 86, 118, 128, 138, 139, 134, 135)
+_TIMESCALE = 90000
+_AAC_FRAME_SAMPLES = 1024
+# Jumps in the timestamps that are larger than this are discontinuities
+_MAX_TIME_JUMP = 60 * _TIMESCALE
+
+_SYNC_SAMPLE_FLAGS = 0x02000000
+_NON_SYNC_SAMPLE_FLAGS = 0x01010000
+
+
+class MpegTsError(YoutubeDLError):
+    pass
+
+
+class _BitReader:
+    def __init__(self, data):
+        # Remove the emulation prevention bytes
+        self._bits = ''.join(f'{byte:08b}' for byte in re.sub(rb'\x00\x00\x03', b'\x00\x00', data))
+        self._pos = 0
+
+    def read(self, count):
+        if self._pos + count > len(self._bits):
+            raise MpegTsError('Truncated H.264 sequence parameter set')
+        value = int(self._bits[self._pos:self._pos + count] or '0', 2)
+        self._pos += count
+        return value
+
+    def ue(self):
+        leading_zeros = 0
+        while not self.read(1):
+            leading_zeros += 1
+        return (1 << leading_zeros) - 1 + self.read(leading_zeros)
+
+    def se(self):
+        value = self.ue()
+        return (value + 1) // 2 if value % 2 else -(value // 2)
+
+
+def _parse_sps(sps):
+    """Get the (width, height) of the video from a H.264 sequence parameter set"""
+    reader = _BitReader(sps[1:])
+    profile_idc = reader.read(8)
+    reader.read(16)  # constraint flags + level
+    reader.ue()  # seq_parameter_set_id
+    chroma_format_idc = 1
+    if profile_idc in _HIGH_PROFILES:
+        chroma_format_idc = reader.ue()
+        if chroma_format_idc == 3:
+            reader.read(1)  # separate_colour_plane_flag
+        reader.ue()  # bit_depth_luma_minus8
+        reader.ue()  # bit_depth_chroma_minus8
+        reader.read(1)  # qpprime_y_zero_transform_bypass_flag
+        if reader.read(1):  # seq_scaling_matrix_present_flag
+            for i in range(8 if chroma_format_idc != 3 else 12):
+                if not reader.read(1):
+                    continue
+                last_scale = next_scale = 8
+                for _ in range(16 if i < 6 else 64):
+                    if next_scale:
+                        next_scale = (last_scale + reader.se()) % 256
+                    last_scale = next_scale or last_scale
+    reader.ue()  # log2_max_frame_num_minus4
+    pic_order_cnt_type = reader.ue()
+    if pic_order_cnt_type == 0:
+        reader.ue()  # log2_max_pic_order_cnt_lsb_minus4
+    elif pic_order_cnt_type == 1:
+        reader.read(1)  # delta_pic_order_always_zero_flag
+        reader.se()  # offset_for_non_ref_pic
+        reader.se()  # offset_for_top_to_bottom_field
+        for _ in range(reader.ue()):
+            reader.se()  # offset_for_ref_frame
+    reader.ue()  # max_num_ref_frames
+    reader.read(1)  # gaps_in_frame_num_value_allowed_flag
+    width_in_mbs = reader.ue() + 1
+    height_in_map_units = reader.ue() + 1
+    frame_mbs_only = reader.read(1)
+    if not frame_mbs_only:
+        reader.read(1)  # mb_adaptive_frame_field_flag
+    reader.read(1)  # direct_8x8_inference_flag
+    crop_left = crop_right = crop_top = crop_bottom = 0
+    if reader.read(1):  # frame_cropping_flag
+        crop_left, crop_right, crop_top, crop_bottom = (reader.ue() for _ in range(4))
+
+    crop_unit_x = 1 if chroma_format_idc in (0, 3) else 2
+    crop_unit_y = (2 - frame_mbs_only) * (2 if chroma_format_idc == 1 else 1)
+    return (width_in_mbs * 16 - (crop_left + crop_right) * crop_unit_x,
+            (2 - frame_mbs_only) * height_in_map_units * 16 - (crop_top + crop_bottom) * crop_unit_y)
+
+
+def _parse_timestamp(data):
+    return ((((data[0] >> 1) & 0x7) << 30) | (data[1] << 22) | ((data[2] >> 1) << 15)
+            | (data[3] << 7) | (data[4] >> 1))
+
+
+def _iter_packets(data):
+    """Yield the (pid, payload unit start indicator, payload) of the packets in data"""
+    for pos in range(0, len(data) - _PACKET_SIZE + 1, _PACKET_SIZE):
+        if data[pos] != 0x47:
+            raise MpegTsError('Lost synchronization with the MPEG-TS packets')
+        pid = ((data[pos + 1] & 0x1f) << 8) | data[pos + 2]
+        adaptation_field_control = (data[pos + 3] >> 4) & 0x3
+        start = pos + 4
+        if adaptation_field_control & 0x2:
+            start += 1 + data[pos + 4]
+        if adaptation_field_control & 0x1 and start < pos + _PACKET_SIZE:
+            yield pid, data[pos + 1] & 0x40, data[start:pos + _PACKET_SIZE]
+
+
+def _psi_section(payload):
+    section = payload[1 + payload[0]:]
+    section_length = ((section[1] & 0xf) << 8) | section[2]
+    # Without the CRC
+    return section[:3 + section_length - 4]
+
+
+def _parse_pes(data):
+    """Get the (pts, dts, payload) of a PES packet"""
+    if data[:3] != b'\x00\x00\x01':
+        raise MpegTsError('Invalid PES packet')
+    flags, header_length = data[7], data[8]
+    pts = dts = None
+    if flags & 0x80:
+        pts = dts = _parse_timestamp(data[9:14])
+    if flags & 0x40:
+        dts = _parse_timestamp(data[14:19])
+    return pts, dts, data[9 + header_length:]
+
+
+def _iter_nal_units(data):
+    # The first item is what precedes the first start code
+    for nal_unit in data.split(b'\x00\x00\x01')[1:]:
+        nal_unit = nal_unit.rstrip(b'\x00')
+        if nal_unit:
+            yield nal_unit
+
+
+def _iter_adts_frames(data):
+    """Yield the (header, raw AAC frame) of the ADTS frames in data"""
+    pos = 0
+    while pos + 7 <= len(data):
+        if data[pos] != 0xff or data[pos + 1] & 0xf6 != 0xf0:
+            # Skip to the next syncword
+            pos = data.find(b'\xff', pos + 1)
+            if pos == -1:
+                return
+            continue
+        header_length = 7 if data[pos + 1] & 0x1 else 9
+        frame_length = ((data[pos + 3] & 0x3) << 11) | (data[pos + 4] << 3) | (data[pos + 5] >> 5)
+        if frame_length < header_length or pos + frame_length > len(data):
+            return
+        if data[pos + 6] & 0x3:
+            raise MpegTsError('ADTS frames with several raw data blocks are not supported')
+        yield data[pos:pos + header_length], data[pos + header_length:pos + frame_length]
+        pos += frame_length
+
+
+def _descriptor(tag, payload):
+    return u8.pack(tag) + u8.pack(len(payload)) + payload
+
+
+def _sample_entry(track):
+    payload = u8.pack(0) * 6  # reserved
+    payload += u16.pack(1)  # data reference index
+    if track['type'] == 'video':
+        sps, pps = bytes.fromhex(track['sps']), bytes.fromhex(track['pps'])
+        payload += u16.pack(0) * 2  # pre defined + reserved
+        payload += u32.pack(0) * 3  # pre defined
+        payload += u16.pack(track['width'])
+        payload += u16.pack(track['height'])
+        payload += u32.pack(0x480000) * 2  # resolution 72 dpi
+        payload += u32.pack(0)  # reserved
+        payload += u16.pack(1)  # frame count
+        payload += u8.pack(0) * 32  # compressor name
+        payload += u16.pack(0x18)  # depth
+        payload += s16.pack(-1)  # pre defined
+        avcc_payload = u8.pack(1)  # configuration version
+        avcc_payload += sps[1:4]  # avc profile indication + profile compatibility + avc level indication
+        avcc_payload += u8.pack(0xff)  # reserved (111111) + length size minus one (11)
+        avcc_payload += u8.pack(0xe1)  # reserved (111) + number of sps (00001)
+        avcc_payload += u16.pack(len(sps)) + sps
+        avcc_payload += u8.pack(1)  # number of pps
+        avcc_payload += u16.pack(len(pps)) + pps
+        payload += box(b'avcC', avcc_payload)  # AVC Decoder Configuration Record
+        return box(b'avc1', payload)
+
+    audio_specific_config = bytes.fromhex(track['config'])
+    payload += u32.pack(0) * 2  # reserved
+    payload += u16.pack(track['channels'])
+    payload += u16.pack(16)  # sample size
+    payload += u16.pack(0) * 2  # pre defined + reserved
+    payload += u32.pack(track['timescale'] << 16)  # sample rate
+    decoder_config = u8.pack(0x40)  # object type indication: MPEG-4 audio
+    decoder_config += u8.pack(0x15)  # stream type: audio (000101) + upstream (0) + reserved (1)
+    decoder_config += u8.pack(0) * 3  # buffer size
+    decoder_config += u32.pack(0) * 2  # max bitrate + average bitrate
+    decoder_config += _descriptor(0x05, audio_specific_config)  # Decoder Specific Info
+    es_payload = u16.pack(0)  # ES id
+    es_payload += u8.pack(0)  # flags
+    es_payload += _descriptor(0x04, decoder_config)  # Decoder Config Descriptor
+    es_payload += _descriptor(0x06, u8.pack(0x02))  # SL Config Descriptor
+    payload += full_box(b'esds', 0, 0, _descriptor(0x03, es_payload))  # Elementary Stream Descriptor Box
+    return box(b'mp4a', payload)
+
+
+def _trak(track):
+    is_video = track['type'] == 'video'
+    tkhd_payload = u32.pack(0) * 2  # creation time + modification time
+    tkhd_payload += u32.pack(track['id'])
+    tkhd_payload += u32.pack(0)  # reserved
+    tkhd_payload += u32.pack(0)  # duration
+    tkhd_payload += u32.pack(0) * 2  # reserved
+    tkhd_payload += u16.pack(0) * 2  # layer + alternate group
+    tkhd_payload += u16.pack(0 if is_video else 0x100)  # volume
+    tkhd_payload += u16.pack(0)  # reserved
+    tkhd_payload += unity_matrix
+    tkhd_payload += u32.pack(track.get('width', 0) << 16)
+    tkhd_payload += u32.pack(track.get('height', 0) << 16)
+    trak_payload = full_box(b'tkhd', 0, 0x3, tkhd_payload)  # Track Header Box
+
+    mdhd_payload = u32.pack(0) * 2  # creation time + modification time
+    mdhd_payload += u32.pack(track['timescale'])
+    mdhd_payload += u32.pack(0)  # duration
+    mdhd_payload += u16.pack(0x55c4)  # language: und
+    mdhd_payload += u16.pack(0)  # pre defined
+    mdia_payload = full_box(b'mdhd', 0, 0, mdhd_payload)  # Media Header Box
+
+    hdlr_payload = u32.pack(0)  # pre defined
+    hdlr_payload += b'vide' if is_video else b'soun'  # handler type
+    hdlr_payload += u32.pack(0) * 3  # reserved
+    hdlr_payload += b'VideoHandler\0' if is_video else b'SoundHandler\0'  # name
+    mdia_payload += full_box(b'hdlr', 0, 0, hdlr_payload)  # Handler Reference Box
+
+    if is_video:
+        minf_payload = full_box(b'vmhd', 0, 1, u16.pack(0) * 4)  # Video Media Header
+    else:
+        minf_payload = full_box(b'smhd', 0, 0, u16.pack(0) * 2)  # Sound Media Header
+    dref_payload = u32.pack(1)  # entry count
+    dref_payload += full_box(b'url ', 0, 0x1, b'')  # Data Entry URL Box
+    minf_payload += box(b'dinf', full_box(b'dref', 0, 0, dref_payload))  # Data Information Box
+
+    stbl_payload = full_box(b'stsd', 0, 0, u32.pack(1) + _sample_entry(track))  # Sample Description Box
+    stbl_payload += full_box(b'stts', 0, 0, u32.pack(0))  # Decoding Time to Sample Box
+    stbl_payload += full_box(b'stsc', 0, 0, u32.pack(0))  # Sample To Chunk Box
+    stbl_payload += full_box(b'stsz', 0, 0, u32.pack(0) * 2)  # Sample Size Box
+    stbl_payload += full_box(b'stco', 0, 0, u32.pack(0))  # Chunk Offset Box
+    minf_payload += box(b'stbl', stbl_payload)  # Sample Table Box
+
+    mdia_payload += box(b'minf', minf_payload)  # Media Information Box
+    trak_payload += box(b'mdia', mdia_payload)  # Media Box
+    return box(b'trak', trak_payload)
+
+
+def _init_segment(tracks):
+    ftyp_payload = b'isom'  # major brand
+    ftyp_payload += u32.pack(0x200)  # minor version
+    ftyp_payload += b'isom' + b'iso6' + b'avc1' + b'mp41'  # compatible brands
+
+    mvhd_payload = u32.pack(0) * 2  # creation time + modification time
+    mvhd_payload += u32.pack(1000)  # timescale
+    mvhd_payload += u32.pack(0)  # duration
+    mvhd_payload += u32.pack(0x10000)  # rate
+    mvhd_payload += u16.pack(0x100)  # volume
+    mvhd_payload += u16.pack(0) + u32.pack(0) * 2  # reserved
+    mvhd_payload += unity_matrix
+    mvhd_payload += u32.pack(0) * 6  # pre defined
+    mvhd_payload += u32.pack(len(tracks) + 1)  # next track id
+    moov_payload = full_box(b'mvhd', 0, 0, mvhd_payload)  # Movie Header Box
+
+    mvex_payload = b''
+    for track in tracks:
+        moov_payload += _trak(track)
+        trex_payload = u32.pack(track['id'])  # track id
+        trex_payload += u32.pack(1)  # default sample description index
+        trex_payload += u32.pack(0) * 3  # default sample duration + size + flags
+        mvex_payload += full_box(b'trex', 0, 0, trex_payload)  # Track Extends Box
+    moov_payload += box(b'mvex', mvex_payload)  # Movie Extends Box
+    return box(b'ftyp', ftyp_payload) + box(b'moov', moov_payload)
+
+
+def _fragment(sequence_number, trafs):
+    """Build a fragment from the (track, decode time, samples) of trafs, where the samples are
+    (data, duration, flags, composition time offset) for video tracks, or data for audio tracks"""
+    def build_moof(data_offset):
+        moof_payload = full_box(b'mfhd', 0, 0, u32.pack(sequence_number))  # Movie Fragment Header Box
+        for track, decode_time, samples in trafs:
+            is_video = track['type'] == 'video'
+            traf_payload = full_box(
+                b'tfhd', 0, 0x20000 | (0 if is_video else 0x8),  # default-base-is-moof + default-sample-duration
+                u32.pack(track['id']) + (b'' if is_video else u32.pack(_AAC_FRAME_SAMPLES)))  # Track Fragment Header Box
+            traf_payload += full_box(b'tfdt', 1, 0, u64.pack(decode_time))  # Track Fragment Decode Time Box
+            trun_payload = u32.pack(len(samples))  # sample count
+            trun_payload += u32.pack(data_offset)
+            if is_video:
+                # sample-duration + sample-size + sample-flags + sample-composition-time-offset
+                trun_flags = 0x1 | 0x100 | 0x200 | 0x400 | 0x800
+                for data, duration, flags, composition_offset in samples:
+                    trun_payload += u32.pack(duration) + u32.pack(len(data)) + u32.pack(flags) + u32.pack(composition_offset)
+                    data_offset += len(data)
+            else:
+                trun_flags = 0x1 | 0x200  # data-offset + sample-size
+                for data in samples:
+                    trun_payload += u32.pack(len(data))
+                    data_offset += len(data)
+            traf_payload += full_box(b'trun', 0, trun_flags, trun_payload)  # Track Fragment Run Box
+            moof_payload += box(b'traf', traf_payload)  # Track Fragment Box
+        return box(b'moof', moof_payload)  # Movie Fragment Box
+
+    # The data offsets are relative to the moof, whose size does not depend on them
+    moof_size = len(build_moof(0))
+    mdat_payload = b''.join(
+        (sample[0] if track['type'] == 'video' else sample) for track, _, samples in trafs for sample in samples)
+    return build_moof(moof_size + 8) + box(b'mdat', mdat_payload)
+
+
+class MpegTsRemuxer:
+    """
+    Remux the segments of a MPEG-TS stream into the fragments of a fragmented MP4 file
+
+    The state is JSON serializable, so that the remuxing can be resumed with it
+    """
+
+    def __init__(self, state=None):
+        self.state = state or {}
+
+    def _demux(self, data):
+        """Get the PES packets of the elementary streams in data, as a {stream type: [(pts, dts, payload)]}"""
+        state = self.state
+        pes_data, packets = {}, {}
+
+        def flush(pid):
+            if pes_data.get(pid):
+                packets.setdefault(pid, []).append(_parse_pes(b''.join(pes_data.pop(pid))))
+
+        for pid, unit_start, payload in _iter_packets(data):
+            if pid == 0 and unit_start:
+                section = _psi_section(payload)
+                for pos in range(8, len(section) - 3, 4):
+                    if u16.unpack_from(section, pos)[0]:  # Not the network PID
+                        state.setdefault('pmt_pid', u16.unpack_from(section, pos + 2)[0] & 0x1fff)
+                        break
+            elif pid == state.get('pmt_pid') and unit_start and 'pids' not in state:
+                section = _psi_section(payload)
+                pos = 12 + (u16.unpack_from(section, 10)[0] & 0xfff)
+                pids = {}
+                while pos + 5 <= len(section):
+                    stream_type = section[pos]
+                    if stream_type in _STREAM_TYPES and _STREAM_TYPES[stream_type] not in pids:
+                        pids[_STREAM_TYPES[stream_type]] = u16.unpack_from(section, pos + 1)[0] & 0x1fff
+                    elif stream_type not in _IGNORED_STREAM_TYPES:
+                        raise MpegTsError(f'Unsupported stream type 0x{stream_type:02x}')
+                    pos += 5 + (u16.unpack_from(section, pos + 3)[0] & 0xfff)
+                if not pids:
+                    raise MpegTsError('No supported streams')
+                state['pids'] = pids
+            elif pid in state.get('pids', {}).values():
+                if unit_start:
+                    flush(pid)
+                    pes_data[pid] = []
+                # Data that continues a PES packet of the previous segment cannot be used
+                if pid in pes_data:
+                    pes_data[pid].append(payload)
+        for pid in list(pes_data):
+            flush(pid)
+        if 'pids' not in state:
+            raise MpegTsError('No program map table')
+        return {stream_type: packets.get(pid, []) for stream_type, pid in state['pids'].items()}
+
+    def _unwrap(self, timestamp):
+        # The timestamps are 33 bits, and wrap around every 26.5 hours
+        reference = self.state.get('reference')
+        if reference is not None:
+            timestamp += ((reference - timestamp + (1 << 32)) >> 33) << 33
+        self.state['reference'] = timestamp
+        return timestamp
+
+    def _decode_time(self, track, timestamp):
+        """Convert a timestamp into a decode time of the track, removing the discontinuities"""
+        decode_time = (timestamp - self.state['base']) * track['timescale'] // _TIMESCALE + track['offset']
+        next_time = track.get('next')
+        if next_time is not None and not -track['timescale'] < decode_time - next_time < _MAX_TIME_JUMP * track['timescale'] // _TIMESCALE:
+            track['offset'] += next_time - decode_time
+            decode_time = next_time
+        return max(decode_time, 0)
+
+    def _video_samples(self, packets):
+        """Get the (dts, pts, NAL units) of the access units, where every PES packet with a timestamp starts a new one"""
+        access_units = []
+        for pts, dts, payload in packets:
+            if pts is not None:
+                access_units.append((self._unwrap(dts), self._unwrap(pts), []))
+            if access_units:
+                access_units[-1][2].append(payload)
+        return [(dts, pts, list(_iter_nal_units(b''.join(payloads)))) for dts, pts, payloads in access_units]
+
+    def _audio_frames(self, packets):
+        """Get the pts of the first frame and the ADTS frames"""
+        first_pts = next((pts for pts, _, _ in packets if pts is not None), None)
+        if first_pts is None:
+            return None, []
+        return self._unwrap(first_pts), list(_iter_adts_frames(b''.join(payload for _, _, payload in packets)))
+
+    def _setup_tracks(self, video, audio):
+        tracks = self.state['tracks'] = {}
+        if 'video' in self.state['pids']:
+            nal_units = [nal_unit for _, _, nal_units in video for nal_unit in nal_units]
+            sps = next((nal_unit for nal_unit in nal_units if nal_unit[0] & 0x1f == 7), None)
+            pps = next((nal_unit for nal_unit in nal_units if nal_unit[0] & 0x1f == 8), None)
+            if not sps or not pps:
+                raise MpegTsError('No H.264 parameter sets in the first segment')
+            width, height = _parse_sps(sps)
+            tracks['video'] = {
+                'type': 'video',
+                'timescale': _TIMESCALE,
+                'sps': sps.hex(),
+                'pps': pps.hex(),
+                'width': width,
+                'height': height,
+            }
+        if 'audio' in self.state['pids']:
+            if not audio[1]:
+                raise MpegTsError('No ADTS frames in the first segment')
+            header = audio[1][0][0]
+            object_type, frequency_index = (header[2] >> 6) + 1, (header[2] >> 2) & 0xf
+            channels = ((header[2] & 0x1) << 2) | (header[3] >> 6)
+            if frequency_index >= len(_SAMPLING_RATES) or not channels:
+                raise MpegTsError('Unsupported AAC configuration')
+            tracks['audio'] = {
+                'type': 'audio',
+                'timescale': _SAMPLING_RATES[frequency_index],
+                'config': u16.pack((object_type << 11) | (frequency_index << 7) | (channels << 3)).hex(),
+                'channels': channels,
+            }
+        for track_id, track in enumerate(tracks.values(), 1):
+            track.update({'id': track_id, 'offset': 0})
+
+        start_times = [video[0][0]] if video else []
+        if audio[0] is not None:
+            start_times.append(audio[0])
+        self.state['base'] = min(start_times)
+        self.state['sequence'] = 0
+        return _init_segment(list(tracks.values()))
+
+    def remux(self, data):
+        """Remux a segment, which is preceded by the initialization segment for the first one"""
+        try:
+            return self._remux(data)
+        except (IndexError, ValueError) as e:
+            raise MpegTsError(f'Unable to parse the MPEG-TS segment: {e}')
+
+    def _remux(self, data):
+        packets = self._demux(data)
+        video = self._video_samples(packets.get('video', []))
+        audio = self._audio_frames(packets.get('audio', []))
+        init_segment = self._setup_tracks(video, audio) if 'tracks' not in self.state else b''
+        tracks, trafs = self.state['tracks'], []
+
+        if video and 'video' in tracks:
+            track = tracks['video']
+            samples = []
+            for i, (dts, pts, nal_units) in enumerate(video):
+                if i + 1 < len(video):
+                    track['duration'] = video[i + 1][0] - dts
+                samples.append((
+                    b''.join(u32.pack(len(nal_unit)) + nal_unit for nal_unit in nal_units),
+                    max(track.get('duration', 3000), 0),
+                    _SYNC_SAMPLE_FLAGS if any(nal_unit[0] & 0x1f == 5 for nal_unit in nal_units) else _NON_SYNC_SAMPLE_FLAGS,
+                    max(pts - dts, 0)))
+            decode_time = self._decode_time(track, video[0][0])
+            track['next'] = decode_time + sum(sample[1] for sample in samples)
+            trafs.append((track, decode_time, samples))
+
+        if audio[1] and 'audio' in tracks:
+            track = tracks['audio']
+            decode_time = self._decode_time(track, audio[0])
+            track['next'] = decode_time + len(audio[1]) * _AAC_FRAME_SAMPLES
+            trafs.append((track, decode_time, [frame for _, frame in audio[1]]))
+
+        if not trafs:
+            return init_segment
+        self.state['sequence'] += 1
+        return init_segment + _fragment(self.state['sequence'], trafs)
+
+
+def is_mp4_file(path):
+    """Whether the file at path starts with a MP4 file type box"""
+    try:
+        with open(path, 'rb') as f:
+            return f.read(8)[4:] == b'ftyp'
+    except OSError:
+        return False
+
+
+__all__ = ['MpegTsError', 'MpegTsRemuxer', 'is_mp4_file']
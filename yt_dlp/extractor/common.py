@@ -2594,7 +2594,10 @@ def extract_common(source):
             def extract_Initialization(source):
                 initialization = source.find(_add_ns('Initialization'))
                 if initialization is not None:
-                    ms_info['initialization_url'] = initialization.attrib['sourceURL']
+                    # Without @sourceURL, the initialization segment is a byte range of the BaseURL
+                    ms_info['initialization_url'] = initialization.get('sourceURL', '')
+                    if initialization.get('range'):
+                        ms_info['initialization_range'] = initialization.get('range')
 
             segment_list = element.find(_add_ns('SegmentList'))
             if segment_list is not None:
@@ -2602,7 +2605,8 @@ def extract_Initialization(source):
                 extract_Initialization(segment_list)
                 segment_urls_e = segment_list.findall(_add_ns('SegmentURL'))
                 if segment_urls_e:
-                    ms_info['segment_urls'] = [segment.attrib['media'] for segment in segment_urls_e]
+                    ms_info['segment_urls'] = [segment.get('media', '') for segment in segment_urls_e]
+                    ms_info['segment_ranges'] = [segment.get('mediaRange') for segment in segment_urls_e]
             else:
                 segment_template = element.find(_add_ns('SegmentTemplate'))
                 if segment_template is not None:
@@ -2615,13 +2619,25 @@ def extract_Initialization(source):
                         ms_info['initialization'] = initialization
                     else:
                         extract_Initialization(segment_template)
+                else:
+                    segment_base = element.find(_add_ns('SegmentBase'))
+                    if segment_base is not None and segment_base.get('indexRange'):
+                        ms_info['index_range'] = segment_base.get('indexRange')
             return ms_info
 
         mpd_duration = parse_duration(mpd_doc.get('mediaPresentationDuration'))
+        # For dynamic MPDs, the available segments are determined by the wall-clock time [1, 5.3.9.5.3]
+        availability_start_time = mpd_doc.get('type') == 'dynamic' and unified_timestamp(
+            mpd_doc.get('availabilityStartTime'), day_first=False)
+        # An absent timeShiftBufferDepth means an infinite buffer; limit it to the last hour
+        time_shift_buffer_depth = parse_duration(mpd_doc.get('timeShiftBufferDepth')) or 3600
+        now = time.time()
         formats, subtitles = [], {}
         stream_numbers = collections.defaultdict(int)
         for period in mpd_doc.findall(_add_ns('Period')):
             period_duration = parse_duration(period.get('duration')) or mpd_duration
+            # Time elapsed since the start of the period, for the live edge of dynamic MPDs
+            live_edge = availability_start_time and now - availability_start_time - (parse_duration(period.get('start')) or 0)
             period_ms_info = extract_multisegment_info(period, {
                 'start_number': 1,
                 'timescale': 1,
@@ -2715,6 +2731,9 @@ def extract_Initialization(source):
                         }
                     if is_drm_protected(adaptation_set) or is_drm_protected(representation):
                         f['has_drm'] = True
+                    if representation_id is not None:
+                        # The representation is looked up by the downloader when a dynamic MPD is refreshed
+                        f['_representation_id'] = representation_id
                     representation_ms_info = extract_multisegment_info(representation, adaption_set_ms_info)
 
                     def prepare_template(template_name, identifiers):
@@ -2757,6 +2776,13 @@ def prepare_template(template_name, identifiers):
                     def location_key(location):
                         return 'url' if re.match(r'^https?://', location) else 'path'
 
+                    def segment_fragment(location, media_range=None):
+                        fragment = {location_key(location): location} if location else {'url': base_url}
+                        if media_range:
+                            start, end = media_range.split('-')
+                            fragment['byte_range'] = {'start': int(start), 'end': int(end) + 1}
+                        return fragment
+
                     if 'segment_urls' not in representation_ms_info and 'media' in representation_ms_info:
 
                         media_template = prepare_template('media', ('Number', 'Bandwidth', 'Time'))
@@ -2768,8 +2794,15 @@ def location_key(location):
                             segment_duration = None
                             if 'total_number' not in representation_ms_info and 'segment_duration' in representation_ms_info:
                                 segment_duration = float_or_none(representation_ms_info['segment_duration'], representation_ms_info['timescale'])
-                                representation_ms_info['total_number'] = int(math.ceil(
-                                    float_or_none(period_duration, segment_duration, default=0)))
+                                if live_edge and segment_duration:
+                                    # Only the complete segments within the time shift buffer are available
+                                    live_number = max(0, int(live_edge // segment_duration))
+                                    first_number = max(0, live_number - int(time_shift_buffer_depth // segment_duration))
+                                    representation_ms_info['start_number'] += first_number
+                                    representation_ms_info['total_number'] = live_number - first_number
+                                else:
+                                    representation_ms_info['total_number'] = int(math.ceil(
+                                        float_or_none(period_duration, segment_duration, default=0)))
                             representation_ms_info['fragments'] = [{
                                 media_location_key: media_template % {
                                     'Number': segment_number,
@@ -2804,7 +2837,15 @@ def add_segment_url():
                                 segment_d = s['d']
                                 add_segment_url()
                                 segment_number += 1
-                                for r in range(s.get('r', 0)):
+                                repeat = s.get('r', 0)
+                                if repeat < 0:
+                                    # Repeat until the next S element, the live edge or the end of the period [1, 5.3.9.6.2]
+                                    timescale = representation_ms_info['timescale']
+                                    end_time = traverse_obj(representation_ms_info, ('s', num + 1, 't'))
+                                    if end_time is None:
+                                        end_time = (live_edge or period_duration or 0) * timescale
+                                    repeat = max(0, int((end_time - segment_time) // segment_d) - 1)
+                                for r in range(repeat):
                                     segment_time += segment_d
                                     add_segment_url()
                                     segment_number += 1
@@ -2819,9 +2860,10 @@ def add_segment_url():
                         for s in representation_ms_info['s']:
                             duration = float_or_none(s['d'], timescale)
                             for r in range(s.get('r', 0) + 1):
-                                segment_uri = representation_ms_info['segment_urls'][segment_index]
                                 fragments.append({
-                                    location_key(segment_uri): segment_uri,
+                                    **segment_fragment(
+                                        representation_ms_info['segment_urls'][segment_index],
+                                        traverse_obj(representation_ms_info, ('segment_ranges', segment_index))),
                                     'duration': duration,
                                 })
                                 segment_index += 1
@@ -2834,10 +2876,9 @@ def add_segment_url():
                         segment_duration = float_or_none(
                             representation_ms_info['segment_duration'],
                             representation_ms_info['timescale']) if 'segment_duration' in representation_ms_info else None
-                        for segment_url in representation_ms_info['segment_urls']:
-                            fragment = {
-                                location_key(segment_url): segment_url,
-                            }
+                        for segment_url, media_range in zip(
+                                representation_ms_info['segment_urls'], representation_ms_info['segment_ranges']):
+                            fragment = segment_fragment(segment_url, media_range)
                             if segment_duration:
                                 fragment['duration'] = segment_duration
                             fragments.append(fragment)
@@ -2858,7 +2899,8 @@ def add_segment_url():
                             initialization_url = representation_ms_info['initialization_url']
                             if not f.get('url'):
                                 f['url'] = initialization_url
-                            f['fragments'].append({location_key(initialization_url): initialization_url})
+                            f['fragments'].append(segment_fragment(
+                                initialization_url, representation_ms_info.get('initialization_range')))
                         f['fragments'].extend(representation_ms_info['fragments'])
                         if not period_duration:
                             period_duration = try_get(
@@ -2867,6 +2909,10 @@ def add_segment_url():
                     else:
                         # Assuming direct URL to unfragmented media.
                         f['url'] = base_url
+                        if 'index_range' in representation_ms_info:
+                            # The segment index allows the downloader to fetch the segments separately
+                            start, end = representation_ms_info['index_range'].split('-')
+                            f['_index_range'] = {'start': int(start), 'end': int(end) + 1}
                     if content_type in ('video', 'audio', 'image/jpeg'):
                         f['manifest_stream_number'] = stream_numbers[f['url']]
                         stream_numbers[f['url']] += 1
@@ -1387,7 +1387,8 @@ def _extract_playlist(self, host, type, id):
         thumbnail = format_field(info, 'thumbnailPath', f'https://{host}%s')
 
         entries = OnDemandPagedList(functools.partial(
-            self.fetch_page, host, id, type), self._PAGE_SIZE)
+            self.fetch_page, host, id, type), self._PAGE_SIZE,
+            prefetch=0 if self.get_param('sleep_interval_requests') else 4)
 
         return self.playlist_result(
             entries, id, playlist_title, playlist_description,
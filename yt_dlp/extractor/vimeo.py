@@ -1200,7 +1200,8 @@ def _real_extract(self, url):
                     raise ExtractorError('Wrong password', expected=True)
                 raise
         entries = OnDemandPagedList(functools.partial(
-            self._fetch_page, album_id, jwt, hashed_pass), self._PAGE_SIZE)
+            self._fetch_page, album_id, jwt, hashed_pass), self._PAGE_SIZE,
+            prefetch=0 if self.get_param('sleep_interval_requests') else 4)
         return self.playlist_result(
             entries, album_id, album.get('name'), album.get('description'))
 
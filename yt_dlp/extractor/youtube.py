@@ -1,6 +1,7 @@
 import base64
 import calendar
 import collections
+import concurrent.futures
 import copy
 import datetime
 import enum
@@ -9,6 +10,7 @@
 import json
 import math
 import os.path
+import queue
 import random
 import re
 import sys
@@ -65,6 +67,7 @@
     urljoin,
     variadic,
 )
+from ..version import __version__
 
 STREAMING_DATA_CLIENT_NAME = '__yt_dlp_client'
 # any clients starting with _ cannot be explicitly requested by the user
@@ -705,6 +708,12 @@ def generate_api_headers(
             headers['X-Origin'] = origin
         return filter_dict(headers)
 
+    def _concurrent_requests(self, max_workers):
+        """Get an executor for making independent requests concurrently"""
+        if self.get_param('sleep_interval_requests'):
+            max_workers = 1
+        return concurrent.futures.ThreadPoolExecutor(max_workers=max(max_workers, 1))
+
     def _download_ytcfg(self, client, video_id):
         url = {
             'web': 'https://www.youtube.com',
@@ -1160,6 +1169,13 @@ class YoutubeIE(YoutubeBaseInfoExtractor):
         r'/(?P<id>[a-zA-Z0-9_-]{8,})/player(?:_ias\.vflset(?:/[a-zA-Z]{2,3}_[a-zA-Z]{2,3})?|-plasma-ias-(?:phone|tablet)-[a-z]{2}_[A-Z]{2}\.vflset)/base\.js$',
         r'\b(?P<id>vfl[a-zA-Z0-9_-]+)\b.*?\.js$',
     )
+    # Number of comment reply threads that are fetched at once
+    _COMMENT_REPLY_WORKERS = 4
+    # Number of players, and of n values per player, whose nsig results are kept
+    _NSIG_RESULTS_PLAYERS = 8
+    _NSIG_RESULTS_SIZE = 1024
+    # Number of player JS files that are kept in the cache dir
+    _PLAYER_CACHE_SIZE = 4
     _formats = {
         '5': {'ext': 'flv', 'width': 400, 'height': 240, 'acodec': 'mp3', 'abr': 64, 'vcodec': 'h263'},
         '6': {'ext': 'flv', 'width': 450, 'height': 270, 'acodec': 'mp3', 'abr': 64, 'vcodec': 'h263'},
@@ -2787,6 +2803,8 @@ def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._code_cache = {}
         self._player_cache = {}
+        self._nsig_results = collections.OrderedDict()
+        self._player_lock = threading.Lock()
 
     def _prepare_live_from_start_formats(self, formats, video_id, live_start_time, url, webpage_url, smuggled_data, is_live):
         lock = threading.Lock()
@@ -2981,15 +2999,55 @@ def _extract_player_info(cls, player_url):
 
     def _load_player(self, video_id, player_url, fatal=True):
         player_id = self._extract_player_info(player_url)
+        # The player can be needed by several concurrent player API requests
+        with self._player_lock:
+            return self._load_player_code(video_id, player_url, player_id, fatal)
+
+    def _load_player_code(self, video_id, player_url, player_id, fatal):
         if player_id not in self._code_cache:
-            code = self._download_webpage(
-                player_url, video_id, fatal=fatal,
-                note='Downloading player ' + player_id,
-                errnote='Download of %s failed' % player_url)
+            code = self._load_cached_player(player_id)
+            if not code:
+                code = self._download_webpage(
+                    player_url, video_id, fatal=fatal,
+                    note='Downloading player ' + player_id,
+                    errnote='Download of %s failed' % player_url)
+                if code:
+                    self._store_cached_player(player_id, code)
             if code:
                 self._code_cache[player_id] = code
         return self._code_cache.get(player_id)
 
+    def _load_cached_player(self, player_id):
+        cached = self.cache.load('youtube-player', player_id)
+        if cached is None:
+            return None
+        code = traverse_obj(cached, ('code', {str}))
+        if not code or hashlib.sha256(code.encode()).hexdigest() != traverse_obj(cached, 'sha256'):
+            self.report_warning(f'Discarding corrupted cache of player {player_id}', only_once=True)
+            self.cache.delete('youtube-player', player_id)
+            return None
+        self._touch_cached_player(player_id)
+        return code
+
+    def _store_cached_player(self, player_id, code):
+        self.cache.store('youtube-player', player_id, {
+            'sha256': hashlib.sha256(code.encode()).hexdigest(),
+            'code': code,
+        })
+        self._touch_cached_player(player_id)
+
+    def _touch_cached_player(self, player_id):
+        """Mark the player as the most recently used, and evict the least recently used ones"""
+        players = self.cache.load('youtube-player-index', 'players')
+        if not isinstance(players, list):
+            players = []
+        elif players[-1:] == [player_id]:
+            return
+        players = [p for p in players if p != player_id] + [player_id]
+        for evicted in players[:-self._PLAYER_CACHE_SIZE]:
+            self.cache.delete('youtube-player', evicted)
+        self.cache.store('youtube-player-index', 'players', players[-self._PLAYER_CACHE_SIZE:])
+
     def _extract_signature_function(self, video_id, player_url, example_sig):
         player_id = self._extract_player_info(player_url)
 
@@ -3102,6 +3160,11 @@ def _decrypt_nsig(self, s, video_id, player_url):
         if player_url is None:
             raise ExtractorError('Cannot decrypt nsig without player_url')
         player_url = urljoin('https://www.youtube.com', player_url)
+        player_id = self._extract_player_info(player_url)
+        ret = not self.get_param('youtube_print_sig_code') and self._load_nsig_result(player_id, s)
+        if ret:
+            self.write_debug(f'Decrypted nsig {s} => {ret} (cached)')
+            return ret
 
         try:
             jsi, player_id, func_code = self._extract_n_function_code(video_id, player_url)
@@ -3127,10 +3190,44 @@ def _decrypt_nsig(self, s, video_id, player_url):
             ret = jsi.execute(
                 f'console.log(function({", ".join(args)}) {{ {func_body} }}({s!r}));',
                 video_id=video_id, note='Executing signature code').strip()
+        else:
+            # The results of PhantomJS are not checked, so they are not kept
+            self._store_nsig_result(player_id, s, ret)
 
         self.write_debug(f'Decrypted nsig {s} => {ret}')
         return ret
 
+    def _get_nsig_results(self, player_id):
+        """Get the memo of the nsig results of a player, which is shared with the cache dir"""
+        results = self._nsig_results.get(player_id)
+        if results is None:
+            # The results depend on the interpreter, so those of the other versions are discarded
+            results = self.cache.load('youtube-nsig-results', player_id, min_ver=__version__)
+            if not isinstance(results, dict):
+                results = {}
+            self._nsig_results[player_id] = results
+            while len(self._nsig_results) > self._NSIG_RESULTS_PLAYERS:
+                self._nsig_results.popitem(last=False)
+        self._nsig_results.move_to_end(player_id)
+        return results
+
+    def _load_nsig_result(self, player_id, s):
+        results = self._get_nsig_results(player_id)
+        ret = results.pop(s, None)
+        if isinstance(ret, str):
+            # Move the result to the end, so that the least recently used ones are evicted first
+            results[s] = ret
+            return ret
+
+    def _store_nsig_result(self, player_id, s, ret):
+        if not isinstance(ret, str) or not ret or ret.startswith('enhanced_except_'):
+            return
+        results = self._get_nsig_results(player_id)
+        results[s] = ret
+        for key in list(itertools.islice(results, max(0, len(results) - self._NSIG_RESULTS_SIZE))):
+            del results[key]
+        self.cache.store('youtube-nsig-results', player_id, results)
+
     def _extract_n_function_name(self, jscode):
         funcname, idx = self._search_regex(
             r'\.get\("n"\)\)&&\(b=(?P<nfunc>[a-zA-Z0-9$]+)(?:\[(?P<idx>\d+)\])?\([a-zA-Z0-9]\)',
@@ -3369,7 +3466,8 @@ def _extract_comment(self, comment_renderer, parent=None):
 
         return info
 
-    def _comment_entries(self, root_continuation_data, ytcfg, video_id, parent=None, tracker=None):
+    def _comment_entries(self, root_continuation_data, ytcfg, video_id, parent=None, tracker=None,
+                         reply_executor=None, stop_event=None):
 
         get_single_config_arg = lambda c: self._configuration_arg(c, [''])[0]
 
@@ -3401,10 +3499,65 @@ def extract_header(contents):
                 break
             return _continuation
 
+        def fetch_reply_threads(contents, stop_event):
+            """Start fetching the reply threads of the page in reply_executor"""
+            limit = min(max_replies_per_thread, max(0, max_replies - tracker['total_reply_comments']))
+            remaining = max_comments - tracker['running_total']
+            if parent or not reply_executor or not limit or max_depth == 1:
+                return {}
+            jobs = {}
+            for i, content in enumerate(contents[:max(0, max_parents - tracker['total_parent_comments'])]):
+                # The comments before the thread and its parent comment also count towards max_comments
+                thread_limit = min(limit, remaining - i - 1)
+                if thread_limit <= 0:
+                    break
+                comment_id = traverse_obj(
+                    content, ('commentThreadRenderer', 'commentRenderer', 'commentId'),
+                    ('commentThreadRenderer', 'comment', 'commentRenderer', 'commentId'), expected_type=str)
+                comment_replies_renderer = traverse_obj(
+                    content, ('commentThreadRenderer', 'replies', 'commentRepliesRenderer', {dict}))
+                if not comment_id or not comment_replies_renderer:
+                    continue
+                # The counts are a snapshot for the progress notes; the replies are counted
+                # and checked for loops when they are yielded
+                reply_tracker = dict(
+                    tracker, current_page_thread=len(jobs) + 1, seen_comment_ids=set(), pinned_comment_ids=set())
+                jobs[i] = reply_executor.submit(
+                    fetch_replies, comment_replies_renderer, comment_id, reply_tracker, thread_limit, stop_event)
+            return jobs
+
+        def fetch_replies(comment_replies_renderer, comment_id, reply_tracker, limit, stop_event):
+            return list(itertools.islice(self._comment_entries(
+                comment_replies_renderer, ytcfg, video_id, parent=comment_id, tracker=reply_tracker,
+                stop_event=stop_event), limit))
+
+        def extract_replies(replies):
+            for reply in itertools.islice(replies, min(
+                    max_replies_per_thread, max(0, max_replies - tracker['total_reply_comments']))):
+                if reply['id'] in tracker['seen_comment_ids']:
+                    self.report_warning('Detected YouTube comments looping. Stopping comment extraction as we probably cannot get any more.')
+                    yield
+                    return
+                tracker['seen_comment_ids'].add(reply['id'])
+                tracker['running_total'] += 1
+                tracker['total_reply_comments'] += 1
+                yield reply
+
         def extract_thread(contents):
+            # Stops the reply threads that are still being fetched once the page is left
+            stop_event = threading.Event()
+            reply_jobs = fetch_reply_threads(contents, stop_event)
+            try:
+                yield from extract_comments(contents, reply_jobs)
+            finally:
+                stop_event.set()
+                for job in reply_jobs.values():
+                    job.cancel()
+
+        def extract_comments(contents, reply_jobs):
             if not parent:
                 tracker['current_page_thread'] = 0
-            for content in contents:
+            for i, content in enumerate(contents):
                 if not parent and tracker['total_parent_comments'] >= max_parents:
                     yield
                 comment_thread_renderer = try_get(content, lambda x: x['commentThreadRenderer'])
@@ -3438,7 +3591,10 @@ def extract_thread(contents):
                 comment_replies_renderer = try_get(
                     comment_thread_renderer, lambda x: x['replies']['commentRepliesRenderer'], dict)
 
-                if comment_replies_renderer:
+                if i in reply_jobs:
+                    tracker['current_page_thread'] += 1
+                    yield from extract_replies(reply_jobs[i].result())
+                elif comment_replies_renderer:
                     tracker['current_page_thread'] += 1
                     comment_entries_iter = self._comment_entries(
                         comment_replies_renderer, ytcfg, video_id,
@@ -3486,7 +3642,7 @@ def extract_thread(contents):
         continuation_items_path = (
             'onResponseReceivedEndpoints', ..., ('reloadContinuationItemsCommand', 'appendContinuationItemsAction'), 'continuationItems')
         for page_num in itertools.count(0):
-            if not continuation:
+            if not continuation or (stop_event and stop_event.is_set()):
                 break
             headers = self.generate_api_headers(ytcfg=ytcfg, visitor_data=self._extract_visitor_data(response))
             comment_prog_str = f"({tracker['running_total']}/~{tracker['est_total']})"
@@ -3559,7 +3715,12 @@ def _real_comment_extract(contents):
             renderer = next((
                 item for item in traverse_obj(contents, (..., 'itemSectionRenderer'), default={})
                 if item.get('sectionIdentifier') == 'comment-item-section'), None)
-            yield from self._comment_entries(renderer, ytcfg, video_id)
+            # The reply threads of each page are fetched concurrently
+            executor = self._concurrent_requests(self._COMMENT_REPLY_WORKERS)
+            try:
+                yield from self._comment_entries(renderer, ytcfg, video_id, reply_executor=executor)
+            finally:
+                executor.shutdown(wait=False)
 
         max_comments = int_or_none(self._configuration_arg('max_comments', [''])[0])
         return itertools.islice(_real_comment_extract(contents), 0, max_comments)
@@ -3653,16 +3814,18 @@ def _extract_player_responses(self, clients, video_id, webpage, master_ytcfg, sm
                 self._YT_INITIAL_PLAYER_RESPONSE_RE, webpage, 'initial player response', video_id, fatal=False)
 
         all_clients = set(clients)
-        clients = clients[::-1]
-        prs = []
+        # The responses are sorted by these keys, so that the response of a fallback
+        # client comes right after the one of the client that it is a fallback for
+        clients = [((i,), client) for i, client in enumerate(clients)]
+        prs, responses = [], []
 
-        def append_client(*client_names):
+        def append_client(key, *client_names):
             """ Append the first client name that exists but not already used """
             for client_name in client_names:
                 actual_client = _split_innertube_client(client_name)[0]
                 if actual_client in INNERTUBE_CLIENTS:
                     if actual_client not in all_clients:
-                        clients.append(client_name)
+                        clients.append((key + (0,), client_name))
                         all_clients.add(actual_client)
                         return
 
@@ -3679,54 +3842,70 @@ def append_client(*client_names):
         tried_iframe_fallback = False
         player_url = None
         while clients:
-            client, base_client, variant = _split_innertube_client(clients.pop())
-            player_ytcfg = master_ytcfg if client == 'web' else {}
-            if 'configs' not in self._configuration_arg('player_skip') and client != 'web':
-                player_ytcfg = self._download_ytcfg(client, video_id) or player_ytcfg
-
-            player_url = player_url or self._extract_player_url(master_ytcfg, player_ytcfg, webpage=webpage)
-            require_js_player = self._get_default_ytcfg(client).get('REQUIRE_JS_PLAYER')
-            if 'js' in self._configuration_arg('player_skip'):
-                require_js_player = False
-                player_url = None
-
-            if not player_url and not tried_iframe_fallback and require_js_player:
-                player_url = self._download_player_url(video_id)
-                tried_iframe_fallback = True
-
-            try:
-                pr = initial_pr if client == 'web' and initial_pr else self._extract_player_response(
-                    client, video_id, player_ytcfg or master_ytcfg, player_ytcfg, player_url if require_js_player else None, initial_pr, smuggled_data)
-            except ExtractorError as e:
-                if last_error:
-                    self.report_warning(last_error)
-                last_error = e
-                continue
+            # The requests of the queued clients do not depend on each other, so they
+            # are made concurrently. The fallback clients that their responses
+            # add are requested in the next batch
+            batch = [(key, *_split_innertube_client(client)) for key, client in clients]
+            clients.clear()
+            with self._concurrent_requests(len(batch)) as executor:
+                ytcfgs = list(executor.map(
+                    lambda c: {} if 'configs' in self._configuration_arg('player_skip') else self._download_ytcfg(c, video_id),
+                    [client for _, client, _, _ in batch if client != 'web']))
+
+                jobs = []
+                for key, client, base_client, variant in batch:
+                    player_ytcfg = master_ytcfg if client == 'web' else ytcfgs.pop(0)
+
+                    player_url = player_url or self._extract_player_url(master_ytcfg, player_ytcfg, webpage=webpage)
+                    require_js_player = self._get_default_ytcfg(client).get('REQUIRE_JS_PLAYER')
+                    if 'js' in self._configuration_arg('player_skip'):
+                        require_js_player = False
+                        player_url = None
+
+                    if not player_url and not tried_iframe_fallback and require_js_player:
+                        player_url = self._download_player_url(video_id)
+                        tried_iframe_fallback = True
+
+                    job = None if client == 'web' and initial_pr else executor.submit(
+                        self._extract_player_response, client, video_id, player_ytcfg or master_ytcfg, player_ytcfg,
+                        player_url if require_js_player else None, initial_pr, smuggled_data)
+                    jobs.append((key, client, base_client, variant, job))
+
+            for key, client, base_client, variant, job in jobs:
+                try:
+                    pr = initial_pr if job is None else job.result()
+                except ExtractorError as e:
+                    if last_error:
+                        self.report_warning(last_error)
+                    last_error = e
+                    continue
 
-            if pr:
-                # YouTube may return a different video player response than expected.
-                # See: https://github.com/TeamNewPipe/NewPipe/issues/8713
-                pr_video_id = traverse_obj(pr, ('videoDetails', 'videoId'))
-                if pr_video_id and pr_video_id != video_id:
-                    self.report_warning(
-                        f'Skipping player response from {client} client (got player response for video "{pr_video_id}" instead of "{video_id}")' + bug_reports_message())
-                else:
-                    # Save client name for introspection later
-                    name = short_client_name(client)
-                    sd = traverse_obj(pr, ('streamingData', {dict})) or {}
-                    sd[STREAMING_DATA_CLIENT_NAME] = name
-                    for f in traverse_obj(sd, (('formats', 'adaptiveFormats'), ..., {dict})):
-                        f[STREAMING_DATA_CLIENT_NAME] = name
-                    prs.append(pr)
-
-            # creator clients can bypass AGE_VERIFICATION_REQUIRED if logged in
-            if variant == 'embedded' and self._is_unplayable(pr) and self.is_authenticated:
-                append_client(f'{base_client}_creator')
-            elif self._is_agegated(pr):
-                if variant == 'tv_embedded':
-                    append_client(f'{base_client}_embedded')
-                elif not variant:
-                    append_client(f'tv_embedded.{base_client}', f'{base_client}_embedded')
+                if pr:
+                    # YouTube may return a different video player response than expected.
+                    # See: https://github.com/TeamNewPipe/NewPipe/issues/8713
+                    pr_video_id = traverse_obj(pr, ('videoDetails', 'videoId'))
+                    if pr_video_id and pr_video_id != video_id:
+                        self.report_warning(
+                            f'Skipping player response from {client} client (got player response for video "{pr_video_id}" instead of "{video_id}")' + bug_reports_message())
+                    else:
+                        # Save client name for introspection later
+                        name = short_client_name(client)
+                        sd = traverse_obj(pr, ('streamingData', {dict})) or {}
+                        sd[STREAMING_DATA_CLIENT_NAME] = name
+                        for f in traverse_obj(sd, (('formats', 'adaptiveFormats'), ..., {dict})):
+                            f[STREAMING_DATA_CLIENT_NAME] = name
+                        responses.append((key, pr))
+
+                # creator clients can bypass AGE_VERIFICATION_REQUIRED if logged in
+                if variant == 'embedded' and self._is_unplayable(pr) and self.is_authenticated:
+                    append_client(key, f'{base_client}_creator')
+                elif self._is_agegated(pr):
+                    if variant == 'tv_embedded':
+                        append_client(key, f'{base_client}_embedded')
+                    elif not variant:
+                        append_client(key, f'tv_embedded.{base_client}', f'{base_client}_embedded')
+
+        prs.extend(pr for _, pr in sorted(responses, key=lambda x: x[0]))
 
         if last_error:
             if not len(prs):
@@ -3888,6 +4067,12 @@ def build_fragments(f):
             single_stream = 'none' in (dct.get('acodec'), dct.get('vcodec'))
             if single_stream and dct.get('ext'):
                 dct['container'] = dct['ext'] + '_dash'
+            index_range = fmt.get('indexRange') or {}
+            index_start, index_end = int_or_none(index_range.get('start')), int_or_none(index_range.get('end'))
+            if single_stream and dct.get('ext') in ('mp4', 'm4a') and None not in (index_start, index_end):
+                # The segment index allows the downloader to fetch the segments separately.
+                # That of the WebM formats is not a sidx box, so they are left out
+                dct['_index_range'] = {'start': index_start, 'end': index_end + 1}
 
             if all_formats and dct['filesize']:
                 yield {
@@ -4558,6 +4743,9 @@ def process_language(container, base_url, lang_code, sub_name, query):
 
 
 class YoutubeTabBaseInfoExtractor(YoutubeBaseInfoExtractor):
+    # Number of pages that are fetched ahead of the ones being consumed
+    _CONTINUATION_LOOKAHEAD = 1
+
     @staticmethod
     def passthrough_smuggled_data(func):
         def _smuggle(info, smuggled_data):
@@ -4886,7 +5074,56 @@ def _extract_entries(self, parent_renderer, continuation_list):
         if not continuation_list[0]:
             continuation_list[0] = self._extract_continuation(parent_renderer)
 
+    def _prefetch_pages(self, pages):
+        """
+        Get the entries of the pages, which are lists of entries
+
+        The pages are fetched in a background thread that stays up to
+        _CONTINUATION_LOOKAHEAD pages ahead of the consumer, and that stops
+        once the consumer is closed, or garbage collected. With --sleep-requests,
+        they are fetched by the consumer, so that the requests are not concurrent
+        """
+        if self.get_param('sleep_interval_requests'):
+            for page in pages:
+                yield from page
+            return
+
+        results, stop = queue.Queue(), threading.Event()
+        slots = threading.Semaphore(self._CONTINUATION_LOOKAHEAD)
+
+        # NB: The thread must not reference the consumer, so that it can be collected
+        def fetch_pages():
+            try:
+                while True:
+                    slots.acquire()
+                    if stop.is_set():
+                        return
+                    page = next(pages, None)
+                    results.put((page, None))
+                    if page is None:
+                        return
+            except BaseException as e:
+                results.put((None, e))
+
+        threading.Thread(target=fetch_pages, name=f'{self.IE_NAME}-prefetch', daemon=True).start()
+        try:
+            while True:
+                page, error = results.get()
+                if error:
+                    raise error
+                elif page is None:
+                    return
+                slots.release()
+                yield from page
+        finally:
+            stop.set()
+            # Wake up the thread if it is waiting for a slot
+            slots.release()
+
     def _entries(self, tab, item_id, ytcfg, account_syncid, visitor_data):
+        return self._prefetch_pages(self._entry_pages(tab, item_id, ytcfg, account_syncid, visitor_data))
+
+    def _entry_pages(self, tab, item_id, ytcfg, account_syncid, visitor_data):
         continuation_list = [None]
         extract_entries = lambda x: self._extract_entries(x, continuation_list)
         tab_content = try_get(tab, lambda x: x['content'], dict)
@@ -4895,7 +5132,7 @@ def _entries(self, tab, item_id, ytcfg, account_syncid, visitor_data):
         parent_renderer = (
             try_get(tab_content, lambda x: x['sectionListRenderer'], dict)
             or try_get(tab_content, lambda x: x['richGridRenderer'], dict) or {})
-        yield from extract_entries(parent_renderer)
+        yield list(extract_entries(parent_renderer))
         continuation = continuation_list[0]
 
         for page_num in itertools.count(1):
@@ -4936,18 +5173,19 @@ def _entries(self, tab, item_id, ytcfg, account_syncid, visitor_data):
             ), 'continuationContents', get_all=False)
             continuation_item = traverse_obj(continuation_items, 0, None, expected_type=dict, default={})
 
-            video_items_renderer = None
+            video_items_renderer, entries = None, []
             for key in continuation_item.keys():
                 if key not in known_renderers:
                     continue
                 func, parent_key = known_renderers[key]
                 video_items_renderer = {parent_key: continuation_items} if parent_key else continuation_items
                 continuation_list = [None]
-                yield from func(video_items_renderer)
+                entries.extend(func(video_items_renderer))
                 continuation = continuation_list[0] or self._extract_continuation(video_items_renderer)
 
             if not video_items_renderer:
                 break
+            yield entries
 
     @staticmethod
     def _extract_selected_tab(tabs, fatal=True):
@@ -5324,19 +5562,22 @@ def _search_results(self, query, params=NO_DEFAULT, default_client='web'):
         ytcfg = self._download_ytcfg(default_client, display_id) if not self.skip_webpage else {}
         self._report_playlist_authcheck(ytcfg, fatal=False)
 
-        continuation_list = [None]
-        search = None
-        for page_num in itertools.count(1):
-            data.update(continuation_list[0] or {})
-            headers = self.generate_api_headers(
-                ytcfg=ytcfg, visitor_data=self._extract_visitor_data(search), default_client=default_client)
-            search = self._extract_response(
-                item_id=f'{display_id} page {page_num}', ep='search', query=data,
-                default_client=default_client, check_get_keys=check_get_keys, ytcfg=ytcfg, headers=headers)
-            slr_contents = traverse_obj(search, *content_keys)
-            yield from self._extract_entries({'contents': list(variadic(slr_contents))}, continuation_list)
-            if not continuation_list[0]:
-                break
+        def result_pages():
+            continuation_list = [None]
+            search = None
+            for page_num in itertools.count(1):
+                data.update(continuation_list[0] or {})
+                headers = self.generate_api_headers(
+                    ytcfg=ytcfg, visitor_data=self._extract_visitor_data(search), default_client=default_client)
+                search = self._extract_response(
+                    item_id=f'{display_id} page {page_num}', ep='search', query=data,
+                    default_client=default_client, check_get_keys=check_get_keys, ytcfg=ytcfg, headers=headers)
+                slr_contents = traverse_obj(search, *content_keys)
+                yield list(self._extract_entries({'contents': list(variadic(slr_contents))}, continuation_list))
+                if not continuation_list[0]:
+                    break
+
+        yield from self._prefetch_pages(result_pages())
 
 
 class YoutubeTabIE(YoutubeTabBaseInfoExtractor):
@@ -1,5 +1,7 @@
 import collections
 import contextlib
+import copy
+import functools
 import itertools
 import json
 import math
@@ -134,6 +136,31 @@ def _js_ternary(cndn, if_true=True, if_false=False):
 _MATCHING_PARENS = dict(zip(*zip('()', '{}', '[]')))
 _QUOTES = '\'"/'
 
+_STATEMENT_RE = re.compile(r'(?P<var>(?:var|const|let)\s)|return(?:\s+|(?=["\'])|$)|(?P<throw>throw\s+)')
+_BLOCK_RE = re.compile(r'''(?x)
+    (?P<try>try)\s*\{|
+    (?P<if>if)\s*\(|
+    (?P<switch>switch)\s*\(|
+    (?P<for>for)\s*\(
+    ''')
+_INCREMENT_RE = re.compile(rf'''(?x)
+    (?P<pre_sign>\+\+|--)(?P<var1>{_NAME_RE})|
+    (?P<var2>{_NAME_RE})(?P<post_sign>\+\+|--)''')
+_EXPRESSION_RE = re.compile(fr'''(?x)
+    (?P<assign>
+        (?P<out>{_NAME_RE})(?:\[(?P<index>[^\]]+?)\])?\s*
+        (?P<op>{"|".join(map(re.escape, set(_OPERATORS) - _COMP_OPERATORS))})?
+        =(?!=)(?P<expr>.*)$
+    )|(?P<return>
+        (?!if|return|true|false|null|undefined|NaN)(?P<name>{_NAME_RE})$
+    )|(?P<indexing>
+        (?P<in>{_NAME_RE})\[(?P<idx>.+)\]$
+    )|(?P<attribute>
+        (?P<var>{_NAME_RE})(?:(?P<nullish>\?)?\.(?P<member>[^(]+)|\[(?P<member2>[^\]]+)\])\s*
+    )|(?P<function>
+        (?P<fname>{_NAME_RE})\((?P<args>.*)\)$
+    )''')
+
 
 class JS_Undefined:
     pass
@@ -215,6 +242,9 @@ class JSInterpreter:
     def __init__(self, code, objects=None):
         self.code, self._functions = code, {}
         self._objects = {} if objects is None else objects
+        # The statements are compiled into functions the first time they are run
+        self._compiled_statements = {}
+        self._slot_counter = itertools.count()
 
     class Exception(ExtractorError):
         def __init__(self, msg, expr=None, *args, **kwargs):
@@ -230,6 +260,11 @@ def _named_object(self, namespace, obj):
         namespace[name] = obj
         return name
 
+    @staticmethod
+    def _json_literal(expr):
+        """Parse a JSON literal, or raise ValueError"""
+        return json.loads(js_to_json(expr, strict=True))
+
     @classmethod
     def _regex_flags(cls, expr):
         flags = 0
@@ -280,6 +315,23 @@ def _separate(expr, delim=',', max_split=None):
                 break
         yield expr[start:]
 
+    @classmethod
+    def _separate_at_operator(cls, expr):
+        """Get the (operator, left, right) expressions of expr, split at its operator of lowest precedence"""
+        for op in _OPERATORS:
+            separated = list(cls._separate(expr, op))
+            right_expr = separated.pop()
+            while True:
+                if op in '?<>*-' and len(separated) > 1 and not separated[-1].strip():
+                    separated.pop()
+                elif not (separated and op == '?' and right_expr.startswith('.')):
+                    break
+                right_expr = f'{op}{right_expr}'
+                if op != '-':
+                    right_expr = f'{separated.pop()}{op}{right_expr}'
+            if separated:
+                return op, op.join(separated), right_expr
+
     @classmethod
     def _separate_at_paren(cls, expr, delim=None):
         if delim is None:
@@ -289,24 +341,39 @@ def _separate_at_paren(cls, expr, delim=None):
             raise cls.Exception(f'No terminating paren {delim}', expr)
         return separated[0][1:].strip(), separated[1].strip()
 
-    def _operator(self, op, left_val, right_expr, expr, local_vars, allow_recursion):
-        if op in ('||', '&&'):
-            if (op == '&&') ^ _js_ternary(left_val):
-                return left_val  # short circuiting
-        elif op == '??':
-            if left_val not in (None, JS_Undefined):
-                return left_val
-        elif op == '?':
-            right_expr = _js_ternary(left_val, *self._separate(right_expr, ':', 1))
-
-        right_val = self.interpret_expression(right_expr, local_vars, allow_recursion)
-        if not _OPERATORS.get(op):
-            return right_val
-
-        try:
-            return _OPERATORS[op](left_val, right_val)
-        except Exception as e:
-            raise self.Exception(f'Failed to evaluate {left_val!r} {op} {right_val!r}', expr, cause=e)
+    def _compile_operator(self, op, right_expr, expr):
+        """Get the function that applies op to a value and the value of right_expr"""
+        if op == '?':
+            if_true, if_false = ([self._compiled_expression(e) for e in self._separate(right_expr, ':', 1)] + [None])[:2]
+
+            def ternary(left_val, local_vars, allow_recursion):
+                evaluate = _js_ternary(left_val, if_true, if_false)
+                return evaluate and evaluate(local_vars, allow_recursion)
+            return ternary
+
+        evaluate = self._compiled_expression(right_expr)
+        if op in ('||', '&&', '??'):
+            def short_circuit(left_val, local_vars, allow_recursion):
+                if op == '??':
+                    if left_val not in (None, JS_Undefined):
+                        return left_val
+                elif (op == '&&') ^ _js_ternary(left_val):
+                    return left_val
+                return evaluate(local_vars, allow_recursion)
+            return short_circuit
+
+        elif not _OPERATORS.get(op):
+            def assign(left_val, local_vars, allow_recursion):
+                return evaluate(local_vars, allow_recursion)
+            return assign
+
+        def operate(left_val, local_vars, allow_recursion):
+            right_val = evaluate(local_vars, allow_recursion)
+            try:
+                return _OPERATORS[op](left_val, right_val)
+            except Exception as e:
+                raise self.Exception(f'Failed to evaluate {left_val!r} {op} {right_val!r}', expr, cause=e)
+        return operate
 
     def _index(self, obj, idx, allow_undefined=False):
         if idx == 'length':
@@ -318,36 +385,91 @@ def _index(self, obj, idx, allow_undefined=False):
                 return JS_Undefined
             raise self.Exception(f'Cannot get index {idx}', repr(obj), cause=e)
 
-    def _dump(self, obj, namespace):
-        try:
-            return json.dumps(obj)
-        except TypeError:
-            return self._named_object(namespace, obj)
+    @staticmethod
+    def _constant(value, should_return):
+        return lambda local_vars, allow_recursion: (value, should_return)
 
-    @Debugger.wrap_interpreter
-    def interpret_statement(self, stmt, local_vars, allow_recursion=100):
-        if allow_recursion < 0:
-            raise self.Exception('Recursion limit reached')
-        allow_recursion -= 1
+    @staticmethod
+    def _try_compile(compile_func, *args):
+        """Compile with compile_func, or get a function that raises the error when it is run"""
+        try:
+            return compile_func(*args)
+        except Exception as e:
+            error = e
+
+        def raise_error(*args, **kwargs):
+            raise error.with_traceback(None)
+        return raise_error
+
+    def _compile(self, stmt):
+        """Get the function that runs stmt with (local_vars, allow_recursion) and returns (ret, should_return)"""
+        compiled = self._compiled_statements.get(stmt)
+        if compiled is None:
+            compiled = self._compiled_statements[stmt] = self._try_compile(self._compile_statement, stmt)
+        return compiled
+
+    def _compiled(self, stmt):
+        """Like _compile, but the statements are run through interpret_statement, so that they are logged, when debugging"""
+        if Debugger.ENABLED:
+            return functools.partial(self.interpret_statement, stmt)
+        return self._compile(stmt)
+
+    def _compiled_expression(self, expr):
+        """Get the function that evaluates expr with (local_vars, allow_recursion)"""
+        compiled = self._compiled(expr)
+
+        def evaluate(local_vars, allow_recursion):
+            ret, should_return = compiled(local_vars, allow_recursion)
+            if should_return:
+                raise self.Exception('Cannot return from an expression', expr)
+            return ret
+        return evaluate
 
-        should_return = False
+    def _compile_statement(self, stmt):
         sub_statements = list(self._separate(stmt, ';')) or ['']
         expr = stmt = sub_statements.pop().strip()
+        sub_statements = [self._compiled(sub_stmt) for sub_stmt in sub_statements]
 
-        for sub_stmt in sub_statements:
-            ret, should_return = self.interpret_statement(sub_stmt, local_vars, allow_recursion)
-            if should_return:
-                return ret, should_return
-
-        m = re.match(r'(?P<var>(?:var|const|let)\s)|return(?:\s+|(?=["\'])|$)|(?P<throw>throw\s+)', stmt)
+        should_return, throw = False, None
+        m = _STATEMENT_RE.match(stmt)
         if m:
             expr = stmt[len(m.group(0)):].strip()
             if m.group('throw'):
-                raise JS_Throw(self.interpret_expression(expr, local_vars, allow_recursion))
+                throw = self._compiled_expression(expr)
             should_return = not m.group('var')
-        if not expr:
-            return None, should_return
+        compiled = expr and not throw and self._try_compile(self._compile_expression, expr, should_return, stmt)
 
+        def statement(local_vars, allow_recursion):
+            if allow_recursion < 0:
+                raise self.Exception('Recursion limit reached')
+            allow_recursion -= 1
+
+            for sub_statement in sub_statements:
+                ret, should_abort = sub_statement(local_vars, allow_recursion)
+                if should_abort:
+                    return ret, should_abort
+            if throw:
+                raise JS_Throw(throw(local_vars, allow_recursion))
+            elif not compiled:
+                return None, should_return
+            return compiled(local_vars, allow_recursion)
+        return statement
+
+    def _compile_substitution(self, outer, should_return, stmt):
+        """
+        Compile the rest of the statement after a value, which is substituted by a name in the code,
+        and get the function that runs it with (value, local_vars, allow_recursion)
+        """
+        name = f'__yt_dlp_jsinterp_tmp{next(self._slot_counter)}'
+        compiled = self._try_compile(self._compile_expression, name + outer, should_return, stmt)
+
+        def substitute(value, local_vars, allow_recursion):
+            local_vars[name] = value
+            return compiled(local_vars, allow_recursion)
+        return substitute
+
+    def _compile_expression(self, expr, should_return, stmt):
+        """Compile the expression expr of the statement stmt"""
         if expr[0] in _QUOTES:
             inner, outer = self._separate(expr, expr[0], 1)
             if expr[0] == '/':
@@ -357,87 +479,167 @@ def interpret_statement(self, stmt, local_vars, allow_recursion=100):
                 # Avoid https://github.com/python/cpython/issues/74534
                 # inner = re.compile(inner[1:].replace('[[', r'[\['), flags=flags)
             else:
-                inner = json.loads(js_to_json(f'{inner}{expr[0]}', strict=True))
+                inner = self._json_literal(f'{inner}{expr[0]}')
             if not outer:
-                return inner, should_return
-            expr = self._named_object(local_vars, inner) + outer
+                return self._constant(inner, should_return)
+            substitute = self._compile_substitution(outer, should_return, stmt)
+            return lambda local_vars, allow_recursion: substitute(inner, local_vars, allow_recursion)
 
         if expr.startswith('new '):
             obj = expr[4:]
-            if obj.startswith('Date('):
-                left, right = self._separate_at_paren(obj[4:])
-                date = unified_timestamp(
-                    self.interpret_expression(left, local_vars, allow_recursion), False)
+            if not obj.startswith('Date('):
+                raise self.Exception(f'Unsupported object {obj}', expr)
+            left, right = self._separate_at_paren(obj[4:])
+            evaluate = self._compiled_expression(left)
+            substitute = self._compile_substitution(right, should_return, stmt)
+
+            def new_date(local_vars, allow_recursion):
+                date = unified_timestamp(evaluate(local_vars, allow_recursion), False)
                 if date is None:
                     raise self.Exception(f'Failed to parse date {left!r}', expr)
-                expr = self._dump(int(date * 1000), local_vars) + right
-            else:
-                raise self.Exception(f'Unsupported object {obj}', expr)
+                return substitute(int(date * 1000), local_vars, allow_recursion)
+            return new_date
 
         if expr.startswith('void '):
-            left = self.interpret_expression(expr[5:], local_vars, allow_recursion)
-            return None, should_return
+            evaluate = self._compiled_expression(expr[5:])
+
+            def void(local_vars, allow_recursion):
+                evaluate(local_vars, allow_recursion)
+                return None, should_return
+            return void
 
         if expr.startswith('{'):
             inner, outer = self._separate_at_paren(expr)
             # try for object expression (Map)
             sub_expressions = [list(self._separate(sub_expr.strip(), ':', 1)) for sub_expr in self._separate(inner)]
             if all(len(sub_expr) == 2 for sub_expr in sub_expressions):
-                def dict_item(key, val):
-                    val = self.interpret_expression(val, local_vars, allow_recursion)
-                    if re.match(_NAME_RE, key):
-                        return key, val
-                    return self.interpret_expression(key, local_vars, allow_recursion), val
-
-                return dict(dict_item(k, v) for k, v in sub_expressions), should_return
-
-            inner, should_abort = self.interpret_statement(inner, local_vars, allow_recursion)
-            if not outer or should_abort:
-                return inner, should_abort or should_return
-            else:
-                expr = self._dump(inner, local_vars) + outer
-
-        if expr.startswith('('):
+                items = [(
+                    key if re.match(_NAME_RE, key) else self._compiled_expression(key),
+                    self._compiled_expression(val),
+                ) for key, val in sub_expressions]
+
+                def object_literal(local_vars, allow_recursion):
+                    obj = {}
+                    for key, evaluate in items:
+                        val = evaluate(local_vars, allow_recursion)
+                        obj[key if isinstance(key, str) else key(local_vars, allow_recursion)] = val
+                    return obj, should_return
+                return object_literal
+
+        if expr[0] in '{(':
             inner, outer = self._separate_at_paren(expr)
-            inner, should_abort = self.interpret_statement(inner, local_vars, allow_recursion)
-            if not outer or should_abort:
-                return inner, should_abort or should_return
-            else:
-                expr = self._dump(inner, local_vars) + outer
+            compiled = self._compiled(inner)
+            substitute = outer and self._compile_substitution(outer, should_return, stmt)
+
+            def block(local_vars, allow_recursion):
+                inner, should_abort = compiled(local_vars, allow_recursion)
+                if not outer or should_abort:
+                    return inner, should_abort or should_return
+                return substitute(inner, local_vars, allow_recursion)
+            return block
 
         if expr.startswith('['):
             inner, outer = self._separate_at_paren(expr)
-            name = self._named_object(local_vars, [
-                self.interpret_expression(item, local_vars, allow_recursion)
-                for item in self._separate(inner)])
-            expr = name + outer
-
-        m = re.match(r'''(?x)
-                (?P<try>try)\s*\{|
-                (?P<if>if)\s*\(|
-                (?P<switch>switch)\s*\(|
-                (?P<for>for)\s*\(
-                ''', expr)
-        md = m.groupdict() if m else {}
-        if md.get('if'):
-            cndn, expr = self._separate_at_paren(expr[m.end() - 1:])
-            if_expr, expr = self._separate_at_paren(expr.lstrip())
-            # TODO: "else if" is not handled
-            else_expr = None
-            m = re.match(r'else\s*{', expr)
-            if m:
-                else_expr, expr = self._separate_at_paren(expr[m.end() - 1:])
-            cndn = _js_ternary(self.interpret_expression(cndn, local_vars, allow_recursion))
-            ret, should_abort = self.interpret_statement(
-                if_expr if cndn else else_expr, local_vars, allow_recursion)
+            items = [self._compiled_expression(item) for item in self._separate(inner)]
+            substitute = outer and self._compile_substitution(outer, should_return, stmt)
+
+            def array_literal(local_vars, allow_recursion):
+                array = [evaluate(local_vars, allow_recursion) for evaluate in items]
+                if not outer:
+                    return array, should_return
+                return substitute(array, local_vars, allow_recursion)
+            return array_literal
+
+        m = _BLOCK_RE.match(expr)
+        if m:
+            run_block, expr = getattr(self, f'_compile_{m.lastgroup}')(expr[m.end() - 1:])
+            compiled = self._compiled(expr)
+
+            def block_statement(local_vars, allow_recursion):
+                aborted = run_block(local_vars, allow_recursion)
+                if aborted:
+                    return aborted
+                ret, should_abort = compiled(local_vars, allow_recursion)
+                return ret, should_abort or should_return
+            return block_statement
+
+        # Comma separated statements
+        sub_expressions = list(self._separate(expr))
+        if len(sub_expressions) > 1:
+            sub_expressions = [self._compiled(sub_expr) for sub_expr in sub_expressions]
+
+            def comma_separated(local_vars, allow_recursion):
+                for sub_expr in sub_expressions:
+                    ret, should_abort = sub_expr(local_vars, allow_recursion)
+                    if should_abort:
+                        return ret, True
+                return ret, False
+            return comma_separated
+
+        # The value of each increment is substituted by a name in the code
+        increments, parts, end = [], [], 0
+        for m in _INCREMENT_RE.finditer(expr):
+            name = f'__yt_dlp_jsinterp_tmp{next(self._slot_counter)}'
+            sign = m.group('pre_sign') or m.group('post_sign')
+            increments.append((m.group('var1') or m.group('var2'), name, sign, bool(m.group('pre_sign'))))
+            parts.extend((expr[end:m.start()], name))
+            end = m.end()
+        if not increments:
+            return self._compile_value(expr, should_return, stmt)
+
+        compiled = self._try_compile(self._compile_value, ''.join(parts) + expr[end:], should_return, stmt)
+
+        def increment(local_vars, allow_recursion):
+            for var, name, sign, pre in increments:
+                ret = local_vars[var]
+                local_vars[var] += 1 if sign[0] == '+' else -1
+                local_vars[name] = local_vars[var] if pre else ret
+            return compiled(local_vars, allow_recursion)
+        return increment
+
+    def _compile_if(self, expr):
+        cndn, expr = self._separate_at_paren(expr)
+        if_expr, expr = self._separate_at_paren(expr.lstrip())
+        # TODO: "else if" is not handled
+        else_expr = None
+        m = re.match(r'else\s*{', expr)
+        if m:
+            else_expr, expr = self._separate_at_paren(expr[m.end() - 1:])
+        cndn = self._compiled_expression(cndn)
+        if_expr = self._compiled(if_expr)
+        else_expr = else_expr and self._compiled(else_expr)
+
+        def run_if(local_vars, allow_recursion):
+            if _js_ternary(cndn(local_vars, allow_recursion)):
+                ret, should_abort = if_expr(local_vars, allow_recursion)
+            elif else_expr:
+                ret, should_abort = else_expr(local_vars, allow_recursion)
+            else:
+                return
             if should_abort:
                 return ret, True
+        return run_if, expr
 
-        if md.get('try'):
-            try_expr, expr = self._separate_at_paren(expr[m.end() - 1:])
+    def _compile_try(self, expr):
+        try_expr, expr = self._separate_at_paren(expr)
+        try_expr = self._compiled(try_expr)
+
+        catch_expr = err_name = None
+        m = re.match(fr'catch\s*(?P<err>\(\s*{_NAME_RE}\s*\))?\{{', expr)
+        if m:
+            catch_expr, expr = self._separate_at_paren(expr[m.end() - 1:])
+            catch_expr, err_name = self._compiled(catch_expr), m.group('err')
+
+        finally_expr = None
+        m = re.match(r'finally\s*\{', expr)
+        if m:
+            finally_expr, expr = self._separate_at_paren(expr[m.end() - 1:])
+            finally_expr = self._compiled(finally_expr)
+
+        def run_try(local_vars, allow_recursion):
             err = None
             try:
-                ret, should_abort = self.interpret_statement(try_expr, local_vars, allow_recursion)
+                ret, should_abort = try_expr(local_vars, allow_recursion)
                 if should_abort:
                     return ret, True
             except Exception as e:
@@ -445,20 +647,15 @@ def dict_item(key, val):
                 err = e
 
             pending = (None, False)
-            m = re.match(fr'catch\s*(?P<err>\(\s*{_NAME_RE}\s*\))?\{{', expr)
-            if m:
-                sub_expr, expr = self._separate_at_paren(expr[m.end() - 1:])
-                if err:
-                    catch_vars = {}
-                    if m.group('err'):
-                        catch_vars[m.group('err')] = err.error if isinstance(err, JS_Throw) else err
-                    catch_vars = local_vars.new_child(catch_vars)
-                    err, pending = None, self.interpret_statement(sub_expr, catch_vars, allow_recursion)
-
-            m = re.match(r'finally\s*\{', expr)
-            if m:
-                sub_expr, expr = self._separate_at_paren(expr[m.end() - 1:])
-                ret, should_abort = self.interpret_statement(sub_expr, local_vars, allow_recursion)
+            if catch_expr and err:
+                catch_vars = {}
+                if err_name:
+                    catch_vars[err_name] = err.error if isinstance(err, JS_Throw) else err
+                catch_vars = local_vars.new_child(catch_vars)
+                err, pending = None, catch_expr(catch_vars, allow_recursion)
+
+            if finally_expr:
+                ret, should_abort = finally_expr(local_vars, allow_recursion)
                 if should_abort:
                     return ret, True
 
@@ -468,311 +665,300 @@ def dict_item(key, val):
 
             if err:
                 raise err
-
-        elif md.get('for'):
-            constructor, remaining = self._separate_at_paren(expr[m.end() - 1:])
-            if remaining.startswith('{'):
-                body, expr = self._separate_at_paren(remaining)
+        return run_try, expr
+
+    def _compile_for(self, expr):
+        constructor, remaining = self._separate_at_paren(expr)
+        if remaining.startswith('{'):
+            body, expr = self._separate_at_paren(remaining)
+        else:
+            switch_m = re.match(r'switch\s*\(', remaining)  # FIXME
+            if switch_m:
+                switch_val, remaining = self._separate_at_paren(remaining[switch_m.end() - 1:])
+                body, expr = self._separate_at_paren(remaining, '}')
+                body = 'switch(%s){%s}' % (switch_val, body)
             else:
-                switch_m = re.match(r'switch\s*\(', remaining)  # FIXME
-                if switch_m:
-                    switch_val, remaining = self._separate_at_paren(remaining[switch_m.end() - 1:])
-                    body, expr = self._separate_at_paren(remaining, '}')
-                    body = 'switch(%s){%s}' % (switch_val, body)
-                else:
-                    body, expr = remaining, ''
-            start, cndn, increment = self._separate(constructor, ';')
-            self.interpret_expression(start, local_vars, allow_recursion)
+                body, expr = remaining, ''
+        start, cndn, increment = map(self._compiled_expression, self._separate(constructor, ';'))
+        body = self._compiled(body)
+
+        def run_for(local_vars, allow_recursion):
+            start(local_vars, allow_recursion)
             while True:
-                if not _js_ternary(self.interpret_expression(cndn, local_vars, allow_recursion)):
+                if not _js_ternary(cndn(local_vars, allow_recursion)):
                     break
                 try:
-                    ret, should_abort = self.interpret_statement(body, local_vars, allow_recursion)
+                    ret, should_abort = body(local_vars, allow_recursion)
                     if should_abort:
                         return ret, True
                 except JS_Break:
                     break
                 except JS_Continue:
                     pass
-                self.interpret_expression(increment, local_vars, allow_recursion)
-
-        elif md.get('switch'):
-            switch_val, remaining = self._separate_at_paren(expr[m.end() - 1:])
-            switch_val = self.interpret_expression(switch_val, local_vars, allow_recursion)
-            body, expr = self._separate_at_paren(remaining, '}')
-            items = body.replace('default:', 'case default:').split('case ')[1:]
+                increment(local_vars, allow_recursion)
+        return run_for, expr
+
+    def _compile_switch(self, expr):
+        switch_val, remaining = self._separate_at_paren(expr)
+        switch_val = self._compiled_expression(switch_val)
+        body, expr = self._separate_at_paren(remaining, '}')
+        items = []
+        for item in body.replace('default:', 'case default:').split('case ')[1:]:
+            case, case_stmt = (i.strip() for i in self._separate(item, ':', 1))
+            items.append((
+                None if case == 'default' else self._compiled_expression(case), self._compiled(case_stmt)))
+
+        def run_switch(local_vars, allow_recursion):
+            value = switch_val(local_vars, allow_recursion)
             for default in (False, True):
                 matched = False
-                for item in items:
-                    case, stmt = (i.strip() for i in self._separate(item, ':', 1))
+                for case, case_stmt in items:
                     if default:
-                        matched = matched or case == 'default'
+                        matched = matched or case is None
                     elif not matched:
-                        matched = (case != 'default'
-                                   and switch_val == self.interpret_expression(case, local_vars, allow_recursion))
+                        matched = case is not None and value == case(local_vars, allow_recursion)
                     if not matched:
                         continue
                     try:
-                        ret, should_abort = self.interpret_statement(stmt, local_vars, allow_recursion)
+                        ret, should_abort = case_stmt(local_vars, allow_recursion)
                         if should_abort:
-                            return ret
+                            return ret, True
                     except JS_Break:
                         break
                 if matched:
                     break
+        return run_switch, expr
 
-        if md:
-            ret, should_abort = self.interpret_statement(expr, local_vars, allow_recursion)
-            return ret, should_abort or should_return
-
-        # Comma separated statements
-        sub_expressions = list(self._separate(expr))
-        if len(sub_expressions) > 1:
-            for sub_expr in sub_expressions:
-                ret, should_abort = self.interpret_statement(sub_expr, local_vars, allow_recursion)
-                if should_abort:
-                    return ret, True
-            return ret, False
-
-        for m in re.finditer(rf'''(?x)
-                (?P<pre_sign>\+\+|--)(?P<var1>{_NAME_RE})|
-                (?P<var2>{_NAME_RE})(?P<post_sign>\+\+|--)''', expr):
-            var = m.group('var1') or m.group('var2')
-            start, end = m.span()
-            sign = m.group('pre_sign') or m.group('post_sign')
-            ret = local_vars[var]
-            local_vars[var] += 1 if sign[0] == '+' else -1
-            if m.group('pre_sign'):
-                ret = local_vars[var]
-            expr = expr[:start] + self._dump(ret, local_vars) + expr[end:]
-
-        if not expr:
-            return None, should_return
-
-        m = re.match(fr'''(?x)
-            (?P<assign>
-                (?P<out>{_NAME_RE})(?:\[(?P<index>[^\]]+?)\])?\s*
-                (?P<op>{"|".join(map(re.escape, set(_OPERATORS) - _COMP_OPERATORS))})?
-                =(?!=)(?P<expr>.*)$
-            )|(?P<return>
-                (?!if|return|true|false|null|undefined|NaN)(?P<name>{_NAME_RE})$
-            )|(?P<indexing>
-                (?P<in>{_NAME_RE})\[(?P<idx>.+)\]$
-            )|(?P<attribute>
-                (?P<var>{_NAME_RE})(?:(?P<nullish>\?)?\.(?P<member>[^(]+)|\[(?P<member2>[^\]]+)\])\s*
-            )|(?P<function>
-                (?P<fname>{_NAME_RE})\((?P<args>.*)\)$
-            )''', expr)
+    def _compile_value(self, expr, should_return, stmt):
+        m = _EXPRESSION_RE.match(expr)
         if m and m.group('assign'):
-            left_val = local_vars.get(m.group('out'))
-
-            if not m.group('index'):
-                local_vars[m.group('out')] = self._operator(
-                    m.group('op'), left_val, m.group('expr'), expr, local_vars, allow_recursion)
-                return local_vars[m.group('out')], should_return
-            elif left_val in (None, JS_Undefined):
-                raise self.Exception(f'Cannot index undefined variable {m.group("out")}', expr)
-
-            idx = self.interpret_expression(m.group('index'), local_vars, allow_recursion)
-            if not isinstance(idx, (int, float)):
-                raise self.Exception(f'List index {idx} must be integer', expr)
-            idx = int(idx)
-            left_val[idx] = self._operator(
-                m.group('op'), self._index(left_val, idx), m.group('expr'), expr, local_vars, allow_recursion)
-            return left_val[idx], should_return
+            out, index = m.group('out', 'index')
+            operate = self._compile_operator(m.group('op'), m.group('expr'), expr)
+
+            if not index:
+                def assign(local_vars, allow_recursion):
+                    local_vars[out] = operate(local_vars.get(out), local_vars, allow_recursion)
+                    return local_vars[out], should_return
+                return assign
+
+            index = self._compiled_expression(index)
+
+            def assign_index(local_vars, allow_recursion):
+                left_val = local_vars.get(out)
+                if left_val in (None, JS_Undefined):
+                    raise self.Exception(f'Cannot index undefined variable {out}', expr)
+                idx = index(local_vars, allow_recursion)
+                if not isinstance(idx, (int, float)):
+                    raise self.Exception(f'List index {idx} must be integer', expr)
+                idx = int(idx)
+                left_val[idx] = operate(self._index(left_val, idx), local_vars, allow_recursion)
+                return left_val[idx], should_return
+            return assign_index
 
         elif expr.isdigit():
-            return int(expr), should_return
+            return self._constant(int(expr), should_return)
+
+        elif expr in ('break', 'continue'):
+            error = JS_Break if expr == 'break' else JS_Continue
 
-        elif expr == 'break':
-            raise JS_Break()
-        elif expr == 'continue':
-            raise JS_Continue()
+            def jump(local_vars, allow_recursion):
+                raise error()
+            return jump
         elif expr == 'undefined':
-            return JS_Undefined, should_return
+            return self._constant(JS_Undefined, should_return)
         elif expr == 'NaN':
-            return float('NaN'), should_return
+            return self._constant(float('NaN'), should_return)
 
         elif m and m.group('return'):
-            return local_vars.get(m.group('name'), JS_Undefined), should_return
+            name = m.group('name')
+            return lambda local_vars, allow_recursion: (local_vars.get(name, JS_Undefined), should_return)
 
         with contextlib.suppress(ValueError):
-            return json.loads(js_to_json(expr, strict=True)), should_return
+            value = self._json_literal(expr)
+            if not isinstance(value, (list, dict)):
+                return self._constant(value, should_return)
+            # Each evaluation must get a new object
+            return lambda local_vars, allow_recursion: (copy.deepcopy(value), should_return)
 
         if m and m.group('indexing'):
-            val = local_vars[m.group('in')]
-            idx = self.interpret_expression(m.group('idx'), local_vars, allow_recursion)
-            return self._index(val, idx), should_return
+            name, idx = m.group('in'), self._compiled_expression(m.group('idx'))
 
-        for op in _OPERATORS:
-            separated = list(self._separate(expr, op))
-            right_expr = separated.pop()
-            while True:
-                if op in '?<>*-' and len(separated) > 1 and not separated[-1].strip():
-                    separated.pop()
-                elif not (separated and op == '?' and right_expr.startswith('.')):
-                    break
-                right_expr = f'{op}{right_expr}'
-                if op != '-':
-                    right_expr = f'{separated.pop()}{op}{right_expr}'
-            if not separated:
-                continue
-            left_val = self.interpret_expression(op.join(separated), local_vars, allow_recursion)
-            return self._operator(op, left_val, right_expr, expr, local_vars, allow_recursion), should_return
+            def indexing(local_vars, allow_recursion):
+                val = local_vars[name]
+                return self._index(val, idx(local_vars, allow_recursion)), should_return
+            return indexing
+
+        separated = self._separate_at_operator(expr)
+        if separated:
+            op, left_expr, right_expr = separated
+            left_expr, operate = self._compiled_expression(left_expr), self._compile_operator(op, right_expr, expr)
+
+            def operation(local_vars, allow_recursion):
+                left_val = left_expr(local_vars, allow_recursion)
+                return operate(left_val, local_vars, allow_recursion), should_return
+            return operation
 
         if m and m.group('attribute'):
-            variable, member, nullish = m.group('var', 'member', 'nullish')
-            if not member:
-                member = self.interpret_expression(m.group('member2'), local_vars, allow_recursion)
-            arg_str = expr[m.end():]
-            if arg_str.startswith('('):
-                arg_str, remaining = self._separate_at_paren(arg_str)
-            else:
-                arg_str, remaining = None, arg_str
+            return self._compile_attribute(m, expr, should_return)
+
+        elif m and m.group('function'):
+            fname = m.group('fname')
+            args = [self._compiled_expression(v) for v in self._separate(m.group('args'))]
+
+            def call(local_vars, allow_recursion):
+                argvals = [evaluate(local_vars, allow_recursion) for evaluate in args]
+                if fname in local_vars:
+                    return local_vars[fname](argvals, allow_recursion=allow_recursion), should_return
+                elif fname not in self._functions:
+                    self._functions[fname] = self.extract_function(fname)
+                return self._functions[fname](argvals, allow_recursion=allow_recursion), should_return
+            return call
+
+        raise self.Exception(
+            f'Unsupported JS expression {truncate_string(expr, 20, 20) if expr != stmt else ""}', stmt)
 
+    def _compile_attribute(self, m, expr, should_return):
+        variable, member, nullish = m.group('var', 'member', 'nullish')
+        member_expr = None if member else self._compiled_expression(m.group('member2'))
+        arg_str = expr[m.end():]
+        if arg_str.startswith('('):
+            arg_str, remaining = self._separate_at_paren(arg_str)
+        else:
+            arg_str, remaining = None, arg_str
+        args = arg_str is not None and [self._compiled_expression(v) for v in self._separate(arg_str)]
+        name = remaining and f'__yt_dlp_jsinterp_tmp{next(self._slot_counter)}'
+        remaining = remaining and self._compiled(name + remaining)
+
+        def eval_method(member, local_vars, allow_recursion):
             def assertion(cndn, msg):
                 """ assert, but without risk of getting optimized out """
                 if not cndn:
                     raise self.Exception(f'{member} {msg}', expr)
 
-            def eval_method():
-                if (variable, member) == ('console', 'debug'):
-                    if Debugger.ENABLED:
-                        Debugger.write(self.interpret_expression(f'[{arg_str}]', local_vars, allow_recursion))
-                    return
+            if (variable, member) == ('console', 'debug'):
+                if Debugger.ENABLED:
+                    Debugger.write(self.interpret_expression(f'[{arg_str}]', local_vars, allow_recursion))
+                return
 
-                types = {
-                    'String': str,
-                    'Math': float,
-                }
-                obj = local_vars.get(variable, types.get(variable, NO_DEFAULT))
-                if obj is NO_DEFAULT:
-                    if variable not in self._objects:
-                        try:
-                            self._objects[variable] = self.extract_object(variable)
-                        except self.Exception:
-                            if not nullish:
-                                raise
-                    obj = self._objects.get(variable, JS_Undefined)
-
-                if nullish and obj is JS_Undefined:
-                    return JS_Undefined
-
-                # Member access
-                if arg_str is None:
-                    return self._index(obj, member, nullish)
-
-                # Function call
-                argvals = [
-                    self.interpret_expression(v, local_vars, allow_recursion)
-                    for v in self._separate(arg_str)]
-
-                if obj == str:
-                    if member == 'fromCharCode':
-                        assertion(argvals, 'takes one or more arguments')
-                        return ''.join(map(chr, argvals))
-                    raise self.Exception(f'Unsupported String method {member}', expr)
-                elif obj == float:
-                    if member == 'pow':
-                        assertion(len(argvals) == 2, 'takes two arguments')
-                        return argvals[0] ** argvals[1]
-                    raise self.Exception(f'Unsupported Math method {member}', expr)
-
-                if member == 'split':
-                    assertion(argvals, 'takes one or more arguments')
-                    assertion(len(argvals) == 1, 'with limit argument is not implemented')
-                    return obj.split(argvals[0]) if argvals[0] else list(obj)
-                elif member == 'join':
-                    assertion(isinstance(obj, list), 'must be applied on a list')
-                    assertion(len(argvals) == 1, 'takes exactly one argument')
-                    return argvals[0].join(obj)
-                elif member == 'reverse':
-                    assertion(not argvals, 'does not take any arguments')
-                    obj.reverse()
-                    return obj
-                elif member == 'slice':
-                    assertion(isinstance(obj, list), 'must be applied on a list')
-                    assertion(len(argvals) == 1, 'takes exactly one argument')
-                    return obj[argvals[0]:]
-                elif member == 'splice':
-                    assertion(isinstance(obj, list), 'must be applied on a list')
-                    assertion(argvals, 'takes one or more arguments')
-                    index, howMany = map(int, (argvals + [len(obj)])[:2])
-                    if index < 0:
-                        index += len(obj)
-                    add_items = argvals[2:]
-                    res = []
-                    for i in range(index, min(index + howMany, len(obj))):
-                        res.append(obj.pop(index))
-                    for i, item in enumerate(add_items):
-                        obj.insert(index + i, item)
-                    return res
-                elif member == 'unshift':
-                    assertion(isinstance(obj, list), 'must be applied on a list')
-                    assertion(argvals, 'takes one or more arguments')
-                    for item in reversed(argvals):
-                        obj.insert(0, item)
-                    return obj
-                elif member == 'pop':
-                    assertion(isinstance(obj, list), 'must be applied on a list')
-                    assertion(not argvals, 'does not take any arguments')
-                    if not obj:
-                        return
-                    return obj.pop()
-                elif member == 'push':
-                    assertion(argvals, 'takes one or more arguments')
-                    obj.extend(argvals)
-                    return obj
-                elif member == 'forEach':
-                    assertion(argvals, 'takes one or more arguments')
-                    assertion(len(argvals) <= 2, 'takes at-most 2 arguments')
-                    f, this = (argvals + [''])[:2]
-                    return [f((item, idx, obj), {'this': this}, allow_recursion) for idx, item in enumerate(obj)]
-                elif member == 'indexOf':
-                    assertion(argvals, 'takes one or more arguments')
-                    assertion(len(argvals) <= 2, 'takes at-most 2 arguments')
-                    idx, start = (argvals + [0])[:2]
+            types = {
+                'String': str,
+                'Math': float,
+            }
+            obj = local_vars.get(variable, types.get(variable, NO_DEFAULT))
+            if obj is NO_DEFAULT:
+                if variable not in self._objects:
                     try:
-                        return obj.index(idx, start)
-                    except ValueError:
-                        return -1
-                elif member == 'charCodeAt':
-                    assertion(isinstance(obj, str), 'must be applied on a string')
-                    assertion(len(argvals) == 1, 'takes exactly one argument')
-                    idx = argvals[0] if isinstance(argvals[0], int) else 0
-                    if idx >= len(obj):
-                        return None
-                    return ord(obj[idx])
-
-                idx = int(member) if isinstance(obj, list) else member
-                return obj[idx](argvals, allow_recursion=allow_recursion)
-
-            if remaining:
-                ret, should_abort = self.interpret_statement(
-                    self._named_object(local_vars, eval_method()) + remaining,
-                    local_vars, allow_recursion)
-                return ret, should_return or should_abort
-            else:
-                return eval_method(), should_return
+                        self._objects[variable] = self.extract_object(variable)
+                    except self.Exception:
+                        if not nullish:
+                            raise
+                obj = self._objects.get(variable, JS_Undefined)
 
-        elif m and m.group('function'):
-            fname = m.group('fname')
-            argvals = [self.interpret_expression(v, local_vars, allow_recursion)
-                       for v in self._separate(m.group('args'))]
-            if fname in local_vars:
-                return local_vars[fname](argvals, allow_recursion=allow_recursion), should_return
-            elif fname not in self._functions:
-                self._functions[fname] = self.extract_function(fname)
-            return self._functions[fname](argvals, allow_recursion=allow_recursion), should_return
+            if nullish and obj is JS_Undefined:
+                return JS_Undefined
 
-        raise self.Exception(
-            f'Unsupported JS expression {truncate_string(expr, 20, 20) if expr != stmt else ""}', stmt)
+            # Member access
+            if arg_str is None:
+                return self._index(obj, member, nullish)
+
+            # Function call
+            argvals = [evaluate(local_vars, allow_recursion) for evaluate in args]
+
+            if obj == str:
+                if member == 'fromCharCode':
+                    assertion(argvals, 'takes one or more arguments')
+                    return ''.join(map(chr, argvals))
+                raise self.Exception(f'Unsupported String method {member}', expr)
+            elif obj == float:
+                if member == 'pow':
+                    assertion(len(argvals) == 2, 'takes two arguments')
+                    return argvals[0] ** argvals[1]
+                raise self.Exception(f'Unsupported Math method {member}', expr)
+
+            if member == 'split':
+                assertion(argvals, 'takes one or more arguments')
+                assertion(len(argvals) == 1, 'with limit argument is not implemented')
+                return obj.split(argvals[0]) if argvals[0] else list(obj)
+            elif member == 'join':
+                assertion(isinstance(obj, list), 'must be applied on a list')
+                assertion(len(argvals) == 1, 'takes exactly one argument')
+                return argvals[0].join(obj)
+            elif member == 'reverse':
+                assertion(not argvals, 'does not take any arguments')
+                obj.reverse()
+                return obj
+            elif member == 'slice':
+                assertion(isinstance(obj, list), 'must be applied on a list')
+                assertion(len(argvals) == 1, 'takes exactly one argument')
+                return obj[argvals[0]:]
+            elif member == 'splice':
+                assertion(isinstance(obj, list), 'must be applied on a list')
+                assertion(argvals, 'takes one or more arguments')
+                index, howMany = map(int, (argvals + [len(obj)])[:2])
+                if index < 0:
+                    index += len(obj)
+                add_items = argvals[2:]
+                res = []
+                for i in range(index, min(index + howMany, len(obj))):
+                    res.append(obj.pop(index))
+                for i, item in enumerate(add_items):
+                    obj.insert(index + i, item)
+                return res
+            elif member == 'unshift':
+                assertion(isinstance(obj, list), 'must be applied on a list')
+                assertion(argvals, 'takes one or more arguments')
+                for item in reversed(argvals):
+                    obj.insert(0, item)
+                return obj
+            elif member == 'pop':
+                assertion(isinstance(obj, list), 'must be applied on a list')
+                assertion(not argvals, 'does not take any arguments')
+                if not obj:
+                    return
+                return obj.pop()
+            elif member == 'push':
+                assertion(argvals, 'takes one or more arguments')
+                obj.extend(argvals)
+                return obj
+            elif member == 'forEach':
+                assertion(argvals, 'takes one or more arguments')
+                assertion(len(argvals) <= 2, 'takes at-most 2 arguments')
+                f, this = (argvals + [''])[:2]
+                return [f((item, idx, obj), {'this': this}, allow_recursion) for idx, item in enumerate(obj)]
+            elif member == 'indexOf':
+                assertion(argvals, 'takes one or more arguments')
+                assertion(len(argvals) <= 2, 'takes at-most 2 arguments')
+                idx, start = (argvals + [0])[:2]
+                try:
+                    return obj.index(idx, start)
+                except ValueError:
+                    return -1
+            elif member == 'charCodeAt':
+                assertion(isinstance(obj, str), 'must be applied on a string')
+                assertion(len(argvals) == 1, 'takes exactly one argument')
+                idx = argvals[0] if isinstance(argvals[0], int) else 0
+                if idx >= len(obj):
+                    return None
+                return ord(obj[idx])
+
+            idx = int(member) if isinstance(obj, list) else member
+            return obj[idx](argvals, allow_recursion=allow_recursion)
+
+        def attribute(local_vars, allow_recursion):
+            ret = eval_method(member or member_expr(local_vars, allow_recursion), local_vars, allow_recursion)
+            if not remaining:
+                return ret, should_return
+            local_vars[name] = ret
+            ret, should_abort = remaining(local_vars, allow_recursion)
+            return ret, should_return or should_abort
+        return attribute
+
+    @Debugger.wrap_interpreter
+    def interpret_statement(self, stmt, local_vars, allow_recursion=100):
+        return self._compile(stmt)(local_vars, allow_recursion)
 
     def interpret_expression(self, expr, local_vars, allow_recursion):
-        ret, should_return = self.interpret_statement(expr, local_vars, allow_recursion)
-        if should_return:
-            raise self.Exception('Cannot return from an expression', expr)
-        return ret
+        return self._compiled_expression(expr)(local_vars, allow_recursion)
 
     def extract_object(self, objname):
         _FUNC_NAME_RE = r'''(?:[a-zA-Z$0-9]+|"[a-zA-Z$0-9]+"|'[a-zA-Z$0-9]+')'''
@@ -842,12 +1028,14 @@ def call_function(self, funcname, *args):
     def build_function(self, argnames, code, *global_stack):
         global_stack = list(global_stack) or [{}]
         argnames = tuple(argnames)
+        # The body is compiled once, and the same functions run it on every call
+        compiled = self._compiled(code.replace('\n', ' '))
 
         def resf(args, kwargs={}, allow_recursion=100):
             global_stack[0].update(itertools.zip_longest(argnames, args, fillvalue=None))
             global_stack[0].update(kwargs)
             var_stack = LocalNameSpace(*global_stack)
-            ret, should_abort = self.interpret_statement(code.replace('\n', ' '), var_stack, allow_recursion - 1)
+            ret, should_abort = compiled(var_stack, allow_recursion - 1)
             if should_abort:
                 return ret
         return resf
@@ -835,6 +835,26 @@ def _alias_callback(option, opt_str, value, parser, opts, nargs):
             'Containers that may be used when merging formats, separated by "/", e.g. "mp4/mkv". '
             'Ignored if no merge is required. '
             f'(currently supported: {", ".join(sorted(FFmpegMergerPP.SUPPORTED_EXTS))})'))
+    video_format.add_option(
+        '--stream-merge',
+        action='store_true', dest='stream_merge', default=False,
+        help=(
+            'Merge the formats while they are being downloaded instead of afterwards. '
+            'The formats must be streamable, otherwise they are merged after the download (not supported on Windows)'))
+    video_format.add_option(
+        '--no-stream-merge',
+        action='store_false', dest='stream_merge',
+        help='Merge the formats after they have been downloaded (default)')
+    video_format.add_option(
+        '--native-merge',
+        action='store_true', dest='native_merge', default=None,
+        help=(
+            'Merge DASH fragmented MP4 formats into mp4 without ffmpeg. '
+            'By default, this is only done if ffmpeg is not installed'))
+    video_format.add_option(
+        '--no-native-merge',
+        action='store_false', dest='native_merge',
+        help='Always merge the formats with ffmpeg')
     video_format.add_option(
         '--allow-unplayable-formats',
         action='store_true', dest='allow_unplayable_formats', default=False,
@@ -887,6 +907,14 @@ def _alias_callback(option, opt_str, value, parser, opts, nargs):
         '-N', '--concurrent-fragments',
         dest='concurrent_fragment_downloads', metavar='N', default=1, type=int,
         help='Number of fragments of a dash/hlsnative video that should be downloaded concurrently (default is %default)')
+    downloader.add_option(
+        '--concurrent-formats',
+        action='store_true', dest='concurrent_formats', default=True,
+        help='Download the video and audio formats that are to be merged at the same time (default)')
+    downloader.add_option(
+        '--no-concurrent-formats',
+        action='store_false', dest='concurrent_formats',
+        help='Download the formats that are to be merged one after the other')
     downloader.add_option(
         '-r', '--limit-rate', '--rate-limit',
         dest='ratelimit', metavar='RATE',
@@ -936,6 +964,12 @@ def _alias_callback(option, opt_str, value, parser, opts, nargs):
         '--no-keep-fragments',
         action='store_false', dest='keep_fragments',
         help='Delete downloaded fragments after downloading is finished (default)')
+    downloader.add_option(
+        '--fragment-coalesce-size',
+        dest='fragment_coalesce_size', metavar='SIZE', default=None,
+        help=(
+            'Maximum size of a single request for adjacent byte ranges of the same file, e.g. 10M (default). '
+            'Consecutive dash/hlsnative fragments are downloaded together up to this size. Use 0 to disable'))
     downloader.add_option(
         '--buffer-size',
         dest='buffersize', metavar='SIZE', default='1024',
@@ -1004,6 +1038,16 @@ def _alias_callback(option, opt_str, value, parser, opts, nargs):
         help=(
             'Do not use the mpegts container for HLS videos. '
             'This is default when not downloading live streams'))
+    downloader.add_option(
+        '--hls-native-remux',
+        dest='hls_native_remux', action='store_true', default=True,
+        help=(
+            'Remux H.264/AAC MPEG-TS streams into fragmented MP4 while they are downloaded '
+            'by the native HLS downloader, without needing ffmpeg (default)'))
+    downloader.add_option(
+        '--no-hls-native-remux',
+        dest='hls_native_remux', action='store_false',
+        help='Download MPEG-TS streams as is, and fix up the container with ffmpeg')
     downloader.add_option(
         '--download-sections',
         metavar='REGEX', dest='download_ranges', action='append',
@@ -1462,6 +1506,18 @@ def _alias_callback(option, opt_str, value, parser, opts, nargs):
     filesystem.add_option(
         '--no-cache-dir', action='store_false', dest='cachedir',
         help='Disable filesystem caching')
+    filesystem.add_option(
+        '--cache-backend',
+        metavar='BACKEND', dest='cache_backend', default='json', choices=('json', 'sqlite'),
+        help=(
+            'How the cache is stored. One of "json" (default; a file for each entry, which is replaced atomically, '
+            'so it is also safe for a cache dir on a network filesystem) or "sqlite" (a single database file, '
+            'which is faster for a local cache dir that is shared by many processes. '
+            'Do not use it on network filesystems such as NFS, whose file locking is unreliable)'))
+    filesystem.add_option(
+        '--cache-max-size',
+        metavar='SIZE', dest='cache_max_size', default=None,
+        help='Maximum size of the cache, e.g. 50M. The least recently used entries are removed when it is exceeded')
     filesystem.add_option(
         '--rm-cache-dir',
         action='store_true', dest='rm_cachedir',
@@ -1732,6 +1788,12 @@ def _alias_callback(option, opt_str, value, parser, opts, nargs):
         '--no-force-keyframes-at-cuts',
         action='store_false', dest='force_keyframes_at_cuts',
         help='Do not force keyframes around the chapters when cutting/splitting (default)')
+    postproc.add_option(
+        '--postprocess-workers',
+        dest='postprocess_workers', metavar='N', default=1, type=int,
+        help=(
+            'Number of videos that are post-processed at the same time, while the next ones are downloaded '
+            '(default is %default, i.e. each video is post-processed before the next one is downloaded)'))
     _postprocessor_opts_parser = lambda key, val='': (
         *(item.split('=', 1) for item in (val.split(';') if val else [])),
         ('key', remove_end(key, 'PP')))
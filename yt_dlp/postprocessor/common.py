@@ -52,6 +52,9 @@ class PostProcessor(metaclass=PostProcessorMetaClass):
     """
 
     _downloader = None
+    # Whether the postprocessor only accesses the file through FFmpegPostProcessor,
+    # so that the stream copies of the file can be deferred (see FFmpegStreamCopyChain)
+    _STREAM_COPY_CHAINABLE = False
 
     def __init__(self, downloader=None):
         self._progress_hooks = []
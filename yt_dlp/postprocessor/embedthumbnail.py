@@ -4,7 +4,7 @@
 import subprocess
 
 from .common import PostProcessor
-from .ffmpeg import FFmpegPostProcessor, FFmpegThumbnailsConvertorPP
+from .ffmpeg import FFmpegPostProcessor, FFmpegStreamCopyChain, FFmpegThumbnailsConvertorPP
 from ..compat import imghdr
 from ..dependencies import mutagen
 from ..utils import (
@@ -16,6 +16,7 @@
     error_to_compat_str,
     prepend_extension,
     shell_quote,
+    traverse_obj,
 )
 
 if mutagen:
@@ -30,6 +31,7 @@ class EmbedThumbnailPPError(PostProcessingError):
 
 
 class EmbedThumbnailPP(FFmpegPostProcessor):
+    _STREAM_COPY_CHAINABLE = True
 
     def __init__(self, downloader=None, already_have_thumbnail=False):
         FFmpegPostProcessor.__init__(self, downloader)
@@ -86,8 +88,19 @@ def run(self, info):
             thumbnail_filename = convertor.convert_thumbnail(thumbnail_filename, 'png')
             thumbnail_ext = 'png'
 
+        if info['ext'] not in ('mkv', 'mka'):
+            # Only the thumbnails of mkv/mka are embedded with a stream copy
+            FFmpegStreamCopyChain.flush_files(filename)
         mtime = os.stat(encodeFilename(filename)).st_mtime
 
+        def finish():
+            self.try_utime(filename, mtime, mtime)
+            converted = original_thumbnail != thumbnail_filename
+            self._delete_downloaded_files(
+                thumbnail_filename if converted or not self._already_have_thumbnail else None,
+                original_thumbnail if converted and not self._already_have_thumbnail else None,
+                info=info)
+
         success = True
         if info['ext'] == 'mp3':
             options = [
@@ -98,21 +111,25 @@ def run(self, info):
             self.run_ffmpeg_multiple_files([filename, thumbnail_filename], temp_filename, options)
 
         elif info['ext'] in ['mkv', 'mka']:
-            options = list(self.stream_copy_opts())
-
             mimetype = f'image/{thumbnail_ext.replace("jpg", "jpeg")}'
-            old_stream, new_stream = self.get_stream_number(
-                filename, ('tags', 'mimetype'), mimetype)
-            if old_stream is not None:
-                options.extend(['-map', '-0:%d' % old_stream])
-                new_stream -= 1
-            options.extend([
-                '-attach', self._ffmpeg_filename_argument(thumbnail_filename),
-                '-metadata:s:%d' % new_stream, 'mimetype=%s' % mimetype,
-                '-metadata:s:%d' % new_stream, 'filename=cover.%s' % thumbnail_ext])
+
+            def options():
+                # The attachments are not changed by the other stream copies, so they can be combined
+                options, streams = [], self.get_metadata_object(filename)['streams']
+                old_stream = next((i for i, stream in enumerate(streams)
+                                   if traverse_obj(stream, ('tags', 'mimetype'), casesense=False) == mimetype), None)
+                if old_stream is not None:
+                    options.extend(['-map', '-0:%d' % old_stream])
+                new_stream = len([i for i, stream in enumerate(streams)
+                                  if stream.get('codec_type') == 'attachment' and i != old_stream])
+                return options + [
+                    '-attach', self._ffmpeg_filename_argument(thumbnail_filename),
+                    '-metadata:s:t:%d' % new_stream, 'mimetype=%s' % mimetype,
+                    '-metadata:s:t:%d' % new_stream, 'filename=cover.%s' % thumbnail_ext]
 
             self._report_run('ffmpeg', filename)
-            self.run_ffmpeg(filename, temp_filename, options)
+            self._stream_copy(filename, options, copy_opts=self.stream_copy_opts(), callback=finish)
+            return [], info
 
         elif info['ext'] in ['m4a', 'mp4', 'mov']:
             prefer_atomicparsley = 'embed-thumbnail-atomicparsley' in self.get_param('compat_opts', [])
@@ -218,10 +235,5 @@ def run(self, info):
         if success and temp_filename != filename:
             os.replace(temp_filename, filename)
 
-        self.try_utime(filename, mtime, mtime)
-        converted = original_thumbnail != thumbnail_filename
-        self._delete_downloaded_files(
-            thumbnail_filename if converted or not self._already_have_thumbnail else None,
-            original_thumbnail if converted and not self._already_have_thumbnail else None,
-            info=info)
+        finish()
         return [], info
@@ -1,14 +1,19 @@
 import collections
+import concurrent.futures
 import contextvars
+import hashlib
 import itertools
 import json
 import os
 import re
+import shutil
 import subprocess
+import threading
 import time
 
 from .common import PostProcessor
-from ..compat import functools, imghdr
+from .mp4mux import Mp4MuxError, mux_fragmented_mp4
+from ..compat import compat_os_name, functools, imghdr
 from ..utils import (
     MEDIA_EXTENSIONS,
     ISO639Utils,
@@ -85,6 +90,11 @@ class FFmpegPostProcessorError(PostProcessingError):
 
 class FFmpegPostProcessor(PostProcessor):
     _ffmpeg_location = contextvars.ContextVar('ffmpeg_location', default=None)
+    # Limits the number of ffmpeg processes of all the post-processing workers
+    _process_slots = threading.BoundedSemaphore(os.cpu_count() or 1)
+    # The JSON output of ffprobe, by the identity of the file (see _file_identity) and the options
+    _probe_cache, _probe_cache_lock = collections.OrderedDict(), threading.Lock()
+    _PROBE_CACHE_SIZE = 256
 
     def __init__(self, downloader=None):
         PostProcessor.__init__(self, downloader)
@@ -138,6 +148,35 @@ def _get_ffmpeg_version(self, prog):
         path = self._paths.get(prog)
         if path in self._version_cache:
             return self._version_cache[path], self._features_cache.get(path, {})
+
+        # The versions are also cached on disk, so that every process does not have to run the executables
+        ydl = getattr(self._downloader, 'ydl', self._downloader)
+        cache, identity = getattr(ydl, 'cache', None), self._executable_identity(path)
+        cache_key = identity and hashlib.sha256(identity[0].encode()).hexdigest()
+        cached = cache and cache_key and cache.load('ffmpeg-versions', cache_key)
+        if cached and cached.get('identity') == identity and cached.get('version'):
+            self._version_cache[path] = cached['version']
+            self._features_cache[path] = cached.get('features') or {}
+            return self._version_cache[path], self._features_cache[path]
+
+        ver, features = self._detect_ffmpeg_version(path, prog)
+        if cache and cache_key and ver:
+            cache.store('ffmpeg-versions', cache_key, {'identity': identity, 'version': ver, 'features': features})
+        return ver, features
+
+    @staticmethod
+    def _executable_identity(path):
+        """Get the (real path, size, mtime) of the executable, which change when it is updated"""
+        path = path and shutil.which(path)
+        if not path:
+            return None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return [os.path.realpath(path), stat.st_size, stat.st_mtime_ns]
+
+    def _detect_ffmpeg_version(self, path, prog):
         out = _get_exe_version_output(path, ['-bsfs'])
         ver = detect_exe_version(out) if out else False
         if ver:
@@ -239,6 +278,13 @@ def check_version(self):
     def get_audio_codec(self, path):
         if not self.probe_available and not self.available:
             raise PostProcessingError('ffprobe and ffmpeg not found. Please install or provide the path using --ffmpeg-location')
+        FFmpegStreamCopyChain.flush_files(path)
+        if self.probe_basename == 'ffprobe':
+            try:
+                streams = self._probe_json(path).get('streams') or []
+            except (OSError, ValueError):
+                return None
+            return next((stream.get('codec_name') for stream in streams if stream.get('codec_type') == 'audio'), None)
         try:
             if self.probe_available:
                 cmd = [
@@ -279,6 +325,29 @@ def get_metadata_object(self, path, opts=[]):
                 self.report_warning('Only ffprobe is supported for metadata extraction')
             raise PostProcessingError('ffprobe not found. Please install or provide the path using --ffmpeg-location')
         self.check_version()
+        FFmpegStreamCopyChain.flush_files(path)
+        return self._probe_json(path, opts)
+
+    @staticmethod
+    def _file_identity(path):
+        """Get a key that changes whenever the file at path is rewritten, or None if it does not exist"""
+        try:
+            stat = os.stat(encodeFilename(path))
+        except OSError:
+            return None
+        # The postprocessors restore the mtime of the files they rewrite, but not their ctime and inode
+        return os.path.abspath(path), stat.st_size, stat.st_mtime_ns, stat.st_ctime_ns, stat.st_ino
+
+    def _probe_json(self, path, opts=()):
+        """Run ffprobe on path, reusing its output if the file has not changed since"""
+        key = self._file_identity(path)
+        key = key and (key, self.probe_executable, tuple(opts))
+        with self._probe_cache_lock:
+            stdout = self._probe_cache.get(key)
+            if stdout is not None:
+                self._probe_cache.move_to_end(key)
+        if stdout is not None:
+            return json.loads(stdout)
 
         cmd = [
             encodeFilename(self.probe_executable, True),
@@ -292,7 +361,12 @@ def get_metadata_object(self, path, opts=[]):
         cmd += opts
         cmd.append(self._ffmpeg_filename_argument(path))
         self.write_debug(f'ffprobe command line: {shell_quote(cmd)}')
-        stdout, _, _ = Popen.run(cmd, text=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, stdin=subprocess.PIPE)
+        stdout, _, returncode = Popen.run(cmd, text=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, stdin=subprocess.PIPE)
+        if key and returncode == 0:
+            with self._probe_cache_lock:
+                self._probe_cache[key] = stdout
+                if len(self._probe_cache) > self._PROBE_CACHE_SIZE:
+                    self._probe_cache.popitem(last=False)
         return json.loads(stdout)
 
     def get_stream_number(self, path, keys, value):
@@ -332,6 +406,7 @@ def run_ffmpeg_multiple_files(self, input_paths, out_path, opts, **kwargs):
 
     def real_run_ffmpeg(self, input_path_opts, output_path_opts, *, expected_retcodes=(0,)):
         self.check_version()
+        FFmpegStreamCopyChain.flush_files(*(path for path, _ in input_path_opts))
 
         oldest_mtime = min(
             os.stat(encodeFilename(path)).st_mtime for path, _ in input_path_opts if path)
@@ -360,8 +435,9 @@ def make_args(file, args, name, number):
                 for i, (path, opts) in enumerate(path_opts) if path)
 
         self.write_debug('ffmpeg command line: %s' % shell_quote(cmd))
-        _, stderr, returncode = Popen.run(
-            cmd, text=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, stdin=subprocess.PIPE)
+        with self._process_slots:
+            _, stderr, returncode = Popen.run(
+                cmd, text=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, stdin=subprocess.PIPE)
         if returncode not in variadic(expected_retcodes):
             self.write_debug(stderr)
             raise FFmpegPostProcessorError(stderr.strip().splitlines()[-1])
@@ -373,6 +449,44 @@ def make_args(file, args, name, number):
     def run_ffmpeg(self, path, out_path, opts, **kwargs):
         return self.run_ffmpeg_multiple_files([path], out_path, opts, **kwargs)
 
+    @staticmethod
+    def _run_in_parallel(funcs):
+        """
+        Call the independent funcs, which run ffmpeg, at the same time and yield their results in order
+
+        If a call fails, its error is raised in its place, and the calls that have not started are cancelled
+        """
+        funcs = list(funcs)
+        workers = min(len(funcs), os.cpu_count() or 1)
+        if workers <= 1:
+            yield from (func() for func in funcs)
+            return
+        with concurrent.futures.ThreadPoolExecutor(workers, thread_name_prefix='ffmpeg') as executor:
+            futures = [executor.submit(func) for func in funcs]
+            try:
+                for future in futures:
+                    yield future.result()
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    def _stream_copy(self, path, options, inputs=(), *, copy_opts, callback=None, combine=True):
+        """
+        Stream copy the file at path in place, with the additional inputs and output options, then call callback
+
+        The additional inputs are numbered from 1 in the options, which can also be a function that returns
+        them when ffmpeg is run. In a FFmpegStreamCopyChain, the stream copy is deferred, so that it can be
+        combined with those of the following postprocessors into a single ffmpeg run
+        """
+        copy = (self, list(copy_opts), options, list(inputs))
+        chain = FFmpegStreamCopyChain.current()
+        if chain and combine:
+            chain.defer(path, copy, callback)
+            return
+        FFmpegStreamCopyChain.run_copies(path, [copy])
+        if callback:
+            callback()
+
     @staticmethod
     def _ffmpeg_filename_argument(fn):
         # Always use 'file:' because the filename may contain ':' (ffmpeg
@@ -436,6 +550,118 @@ def _concat_spec(cls, in_files, concat_opts=None):
                     yield f'{directive} {opts[directive]}\n'
 
 
+class FFmpegStreamCopyChain:
+    """
+    Combine the stream copies of a file by consecutive postprocessors into a single ffmpeg run
+
+    While a chain is active, the stream copies of FFmpegPostProcessor._stream_copy are deferred.
+    They are run when a postprocessor accesses the file with ffmpeg, or when the chain is flushed.
+    Postprocessors that access the file otherwise must not set _STREAM_COPY_CHAINABLE
+    """
+    _current = contextvars.ContextVar('stream_copy_chain', default=None)
+    # Arguments that refer to an input file by its index
+    _INPUT_ARGS_RE = re.compile(r'-map(?:_metadata|_chapters)?(?::.+)?')
+
+    def __init__(self):
+        self.path, self._copies, self._callbacks = None, [], []
+
+    def __enter__(self):
+        self._token = self._current.set(self)
+        return self
+
+    def __exit__(self, exc_type, *_):
+        try:
+            if exc_type is None:
+                self.flush()
+        finally:
+            self._current.reset(self._token)
+
+    @classmethod
+    def current(cls):
+        return cls._current.get()
+
+    @classmethod
+    def flush_files(cls, *paths):
+        chain = cls.current()
+        if chain and chain.path in paths:
+            chain.flush()
+
+    @property
+    def pending(self):
+        return bool(self._copies)
+
+    def defer(self, path, copy, callback=None):
+        if path != self.path:
+            self.flush()
+            self.path = path
+        self._copies.append(copy)
+        if callback:
+            self._callbacks.append(callback)
+
+    def after_flush(self, func):
+        """Call func once the deferred stream copies have been run"""
+        if self.pending:
+            self._callbacks.append(func)
+        else:
+            func()
+
+    def flush(self):
+        path, copies, callbacks = self.path, self._copies, self._callbacks
+        self.path, self._copies, self._callbacks = None, [], []
+        group = []
+        for copy in copies:
+            if group and not self._can_combine(path, group[0], copy):
+                self.run_copies(path, group)
+                group = []
+            group.append(copy)
+        if group:
+            self.run_copies(path, group)
+        for callback in callbacks:
+            callback()
+
+    @staticmethod
+    def _can_combine(path, first, copy):
+        # The combined run uses the arguments of the first postprocessor
+        def configuration_args(pp):
+            return [pp._configuration_args(pp.basename, keys) for keys in (['_i1', '_i'], ['_o1', '_o', ''])]
+
+        stream_copy_opts = (list(FFmpegPostProcessor.stream_copy_opts()),
+                            list(FFmpegPostProcessor.stream_copy_opts(ext=determine_ext(path))))
+        return (first[1] in stream_copy_opts and copy[1] in stream_copy_opts
+                and configuration_args(first[0]) == configuration_args(copy[0]))
+
+    @classmethod
+    def _shift_inputs(cls, options, offset):
+        options = list(options)
+        for i, arg in enumerate(options[1:], 1):
+            if cls._INPUT_ARGS_RE.fullmatch(options[i - 1]):
+                mobj = re.fullmatch(r'(-?)(\d+)(.*)', arg)
+                if mobj and int(mobj.group(2)):
+                    options[i] = f'{mobj.group(1)}{int(mobj.group(2)) + offset}{mobj.group(3)}'
+        return options
+
+    @classmethod
+    def run_copies(cls, path, copies):
+        """Run the (postprocessor, copy options, options, inputs) stream copies of path with the first postprocessor"""
+        pp = copies[0][0]
+        copy_opts = copies[0][1] if len(copies) == 1 else list(pp.stream_copy_opts(ext=determine_ext(path)))
+        options, inputs = [], []
+        if len(copies) > 1:
+            pp.write_debug(f'Combining the stream copies of {", ".join(copy[0].pp_key() for copy in copies)} '
+                           'into a single ffmpeg run')
+        for _, _, copy_options, copy_inputs in copies:
+            options.extend(cls._shift_inputs(copy_options() if callable(copy_options) else copy_options, len(inputs)))
+            inputs.extend(copy_inputs)
+
+        temp_filename = prepend_extension(path, 'temp')
+        try:
+            pp.run_ffmpeg_multiple_files([path, *inputs], temp_filename, [*copy_opts, *options])
+        except PostProcessingError as e:
+            # The error is reported after the postprocessors that deferred the copies have returned
+            raise PostProcessingError(f'{", ".join(copy[0].pp_key() for copy in copies)}: {e.msg}') from e
+        os.replace(temp_filename, path)
+
+
 class FFmpegExtractAudioPP(FFmpegPostProcessor):
     COMMON_AUDIO_EXTS = MEDIA_EXTENSIONS.common_audio + ('wma', )
     SUPPORTED_EXTS = tuple(ACODECS.keys())
@@ -587,6 +813,7 @@ def _options(target_ext):
 
 class FFmpegEmbedSubtitlePP(FFmpegPostProcessor):
     SUPPORTED_EXTS = ('mp4', 'mov', 'm4a', 'webm', 'mkv', 'mka')
+    _STREAM_COPY_CHAINABLE = True
 
     def __init__(self, downloader=None, already_have_subtitle=False):
         super().__init__(downloader)
@@ -641,10 +868,7 @@ def run(self, info):
         if not sub_langs:
             return [], info
 
-        input_files = [filename] + sub_filenames
-
         opts = [
-            *self.stream_copy_opts(ext=info['ext']),
             # Don't copy the existing subtitles, we may be running the
             # postprocessor a second time
             '-map', '-0:s',
@@ -657,16 +881,15 @@ def run(self, info):
                 opts.extend(['-metadata:s:s:%d' % i, 'handler_name=%s' % name,
                              '-metadata:s:s:%d' % i, 'title=%s' % name])
 
-        temp_filename = prepend_extension(filename, 'temp')
         self.to_screen('Embedding subtitles in "%s"' % filename)
-        self.run_ffmpeg_multiple_files(input_files, temp_filename, opts)
-        os.replace(temp_filename, filename)
+        self._stream_copy(filename, opts, sub_filenames, copy_opts=self.stream_copy_opts(ext=info['ext']))
 
         files_to_delete = [] if self._already_have_subtitle else sub_filenames
         return files_to_delete, info
 
 
 class FFmpegMetadataPP(FFmpegPostProcessor):
+    _STREAM_COPY_CHAINABLE = True
 
     def __init__(self, downloader, add_metadata=True, add_chapters=True, add_infojson='if_exists'):
         FFmpegPostProcessor.__init__(self, downloader)
@@ -693,10 +916,13 @@ def run(self, info):
         if self._add_metadata:
             options.extend(self._get_metadata_opts(info))
 
+        attach_infojson = False
         if self._add_infojson:
             if info['ext'] in ('mkv', 'mka'):
                 infojson_filename = info.get('infojson_filename')
-                options.extend(self._get_infojson_opts(info, infojson_filename))
+                infojson_opts = list(self._get_infojson_opts(info, infojson_filename))
+                options.extend(infojson_opts)
+                attach_infojson = bool(infojson_opts)
                 if not infojson_filename:
                     files_to_delete.append(info.get('infojson_filename'))
             elif self._add_infojson is True:
@@ -706,13 +932,13 @@ def run(self, info):
             self.to_screen('There isn\'t any metadata to add')
             return [], info
 
-        temp_filename = prepend_extension(filename, 'temp')
         self.to_screen('Adding metadata to "%s"' % filename)
-        self.run_ffmpeg_multiple_files(
-            (filename, metadata_filename), temp_filename,
-            itertools.chain(self._options(info['ext']), *options))
-        self._delete_downloaded_files(*files_to_delete)
-        os.replace(temp_filename, filename)
+        self._stream_copy(
+            filename, list(itertools.chain(*options)), filter(None, [metadata_filename]),
+            copy_opts=self._options(info['ext']),
+            callback=functools.partial(self._delete_downloaded_files, *files_to_delete),
+            # The stream number of the info-json is only valid for the current file
+            combine=not attach_infojson)
         return [], info
 
     @staticmethod
@@ -817,27 +1043,174 @@ def _get_infojson_opts(self, info, infofn):
 
 class FFmpegMergerPP(FFmpegPostProcessor):
     SUPPORTED_EXTS = MEDIA_EXTENSIONS.common_video
+    # Size of the reads from the files that are being downloaded, for the streaming merge
+    _STREAM_CHUNK_SIZE = 1024 * 1024
+    # Size of the end of the data sent to ffmpeg that is checked to be unchanged before each read
+    _STREAM_CHECK_SIZE = 4096
 
-    @PostProcessor._restrict_to(images=False)
-    def run(self, info):
-        filename = info['filepath']
-        temp_filename = prepend_extension(filename, 'temp')
+    def __init__(self, downloader=None):
+        FFmpegPostProcessor.__init__(self, downloader)
+        self._stream = None
+
+    def _merge_args(self, info, is_aac):
         args = ['-c', 'copy']
         audio_streams = 0
         for (i, fmt) in enumerate(info['requested_formats']):
             if fmt.get('acodec') != 'none':
                 args.extend(['-map', f'{i}:a:0'])
-                aac_fixup = fmt['protocol'].startswith('m3u8') and self.get_audio_codec(fmt['filepath']) == 'aac'
+                aac_fixup = fmt['protocol'].startswith('m3u8') and is_aac(fmt)
                 if aac_fixup:
                     args.extend([f'-bsf:a:{audio_streams}', 'aac_adtstoasc'])
                 audio_streams += 1
             if fmt.get('vcodec') != 'none':
                 args.extend(['-map', '%u:v:0' % (i)])
-        self.to_screen('Merging formats into "%s"' % filename)
-        self.run_ffmpeg_multiple_files(info['__files_to_merge'], temp_filename, args)
+        return args
+
+    def can_merge_natively(self, info):
+        """Whether the requested formats of info can be merged without ffmpeg"""
+        native_merge = self.get_param('native_merge')
+        if native_merge is False or native_merge is None and self.available:
+            return False
+        return info.get('ext') == 'mp4' and all(
+            fmt.get('container') in ('mp4_dash', 'm4a_dash') for fmt in info['requested_formats'])
+
+    @PostProcessor._restrict_to(images=False)
+    def run(self, info):
+        filename = info['filepath']
+        temp_filename = prepend_extension(filename, 'temp')
+        merged = False
+        if self._stream and self._stream.get('merged'):
+            # The formats were merged while they were being downloaded
+            merged = True
+        elif self.can_merge_natively(info):
+            self.to_screen('Merging formats into "%s"' % filename)
+            try:
+                mux_fragmented_mp4(info['__files_to_merge'], temp_filename)
+                merged = True
+            except Mp4MuxError as e:
+                if not self.available:
+                    raise
+                self.report_warning(f'{e}; Merging with {self.basename} instead')
+        if merged:
+            oldest_mtime = min(os.stat(encodeFilename(path)).st_mtime for path in info['__files_to_merge'])
+            self.try_utime(temp_filename, oldest_mtime, oldest_mtime)
+        else:
+            args = self._merge_args(info, lambda fmt: self.get_audio_codec(fmt['filepath']) == 'aac')
+            self.to_screen('Merging formats into "%s"' % filename)
+            self.run_ffmpeg_multiple_files(info['__files_to_merge'], temp_filename, args)
         os.rename(encodeFilename(temp_filename), encodeFilename(filename))
         return info['__files_to_merge'], info
 
+    def start_streaming(self, info, filename):
+        """
+        Start merging the requested formats into filename while they are being downloaded
+        to their filepath; finish_streaming must be called once the downloads are over.
+        Returns False if this is not possible, and the files must be merged by run instead
+        """
+        # Passing pipes to ffmpeg as additional file descriptors is only possible on POSIX
+        if compat_os_name == 'nt' or self.basename != 'ffmpeg' or self.can_merge_natively(info):
+            return False
+        self.check_version()
+        temp_filename = prepend_extension(filename, 'temp')
+        args = self._merge_args(info, lambda fmt: (fmt.get('acodec') or '').startswith(('mp4a', 'aac')))
+        pipes = [os.pipe() for _ in info['requested_formats']]
+
+        cmd = [encodeFilename(self.executable, True), encodeArgument('-y'),
+               encodeArgument('-loglevel'), encodeArgument('repeat+info')]
+        for i, (read_fd, _) in enumerate(pipes, 1):
+            cmd += [*map(encodeArgument, self._configuration_args(self.basename, [f'_i{i}', '_i'])),
+                    encodeArgument('-i'), encodeArgument(f'pipe:{read_fd}')]
+        cmd += [*map(encodeArgument, args),
+                *map(encodeArgument, self._configuration_args(self.basename, ['_o1', '_o', ''])),
+                encodeFilename(self._ffmpeg_filename_argument(temp_filename), True)]
+        self.write_debug('ffmpeg command line: %s' % shell_quote(cmd))
+        try:
+            proc = Popen(cmd, text=True, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                         stderr=subprocess.PIPE, pass_fds=[read_fd for read_fd, _ in pipes])
+        except OSError as e:
+            for fds in pipes:
+                for fd in fds:
+                    os.close(fd)
+            self.report_warning(f'Unable to merge the formats while downloading: {e}')
+            return False
+        for read_fd, _ in pipes:
+            os.close(read_fd)
+
+        self.to_screen(f'Merging formats into "{filename}" while downloading')
+        self._stream = stream = {
+            'proc': proc,
+            'temp_filename': temp_filename,
+            'done': threading.Event(),
+            'errors': [],
+            # ffmpeg blocks if its output is not read
+            'stderr': collections.deque(maxlen=20),
+        }
+        stream['threads'] = [
+            threading.Thread(target=self._feed_stream, args=(fmt['filepath'], write_fd), daemon=True)
+            for fmt, (_, write_fd) in zip(info['requested_formats'], pipes)]
+        stream['threads'].append(threading.Thread(target=stream['stderr'].extend, args=(proc.stderr,), daemon=True))
+        for thread in stream['threads']:
+            thread.start()
+        return True
+
+    def _feed_stream(self, path, write_fd):
+        # The download is followed in the file itself, so that it can be resumed and retried as usual
+        stream, pos, file_id, tail = self._stream, 0, None, b''
+        try:
+            with open(write_fd, 'wb') as pipe:
+                while True:
+                    done = stream['done'].is_set()
+                    data = None
+                    for filename in (f'{path}.part', path):
+                        try:
+                            with open(encodeFilename(filename), 'rb') as f:
+                                stat = os.fstat(f.fileno())
+                                f.seek(pos - len(tail))
+                                data = f.read(len(tail) + self._STREAM_CHUNK_SIZE)
+                            break
+                        except FileNotFoundError:
+                            continue
+                    if data is not None:
+                        # A download that is restarted from scratch truncates or replaces the file,
+                        # and what was already sent to ffmpeg is not part of the file anymore
+                        if (file_id not in (None, (stat.st_dev, stat.st_ino)) or stat.st_size < pos
+                                or not data.startswith(tail)):
+                            raise OSError(f'"{path}" was restarted while it was being merged')
+                        file_id, data = (stat.st_dev, stat.st_ino), data[len(tail):]
+                    if data:
+                        pipe.write(data)
+                        pos += len(data)
+                        tail = (tail + data)[-self._STREAM_CHECK_SIZE:]
+                    elif done or stream['proc'].poll() is not None:
+                        break
+                    else:
+                        stream['done'].wait(0.1)
+        except OSError as e:
+            stream['errors'].append(e)
+            # The partial merge is discarded, and the files are merged after the download instead
+            stream['proc'].kill()
+
+    def finish_streaming(self, success):
+        """Wait for the merge that was started by start_streaming. Returns whether it succeeded"""
+        stream = self._stream
+        stream['done'].set()
+        if not success:
+            stream['proc'].kill()
+        for thread in stream['threads']:
+            thread.join()
+        stream['proc'].wait()
+        if success and stream['proc'].returncode == 0 and not stream['errors']:
+            stream['merged'] = True
+            return True
+        if os.path.exists(encodeFilename(stream['temp_filename'])):
+            os.remove(encodeFilename(stream['temp_filename']))
+        if success:
+            self.write_debug(''.join(stream['stderr']))
+            error = next(iter(stream['errors']), None) or (stream['stderr'] or ['Unknown error'])[-1].strip()
+            self.report_warning(f'Unable to merge the formats while downloading: {error}; '
+                                'They will be merged after the download instead')
+        return False
+
     def can_merge(self):
         # TODO: figure out merge-capable ffmpeg version
         if self.basename != 'avconv':
@@ -856,13 +1229,15 @@ def can_merge(self):
 
 
 class FFmpegFixupPostProcessor(FFmpegPostProcessor):
-    def _fixup(self, msg, filename, options):
-        temp_filename = prepend_extension(filename, 'temp')
+    _STREAM_COPY_CHAINABLE = True
 
+    def _fixup(self, msg, filename, options):
         self.to_screen(f'{msg} of "{filename}"')
-        self.run_ffmpeg(filename, temp_filename, options)
-
-        os.replace(temp_filename, filename)
+        options, copy_opts = list(options), list(self.stream_copy_opts())
+        if options[:len(copy_opts)] == copy_opts:
+            self._stream_copy(filename, options[len(copy_opts):], copy_opts=copy_opts)
+        else:
+            self._stream_copy(filename, options, copy_opts=[], combine=False)
 
 
 class FFmpegFixupStretchedPP(FFmpegFixupPostProcessor):
@@ -946,6 +1321,7 @@ class FFmpegFixupDuplicateMoovPP(FFmpegCopyStreamPP):
 
 class FFmpegSubtitlesConvertorPP(FFmpegPostProcessor):
     SUPPORTED_EXTS = MEDIA_EXTENSIONS.subtitles
+    _STREAM_COPY_CHAINABLE = True
 
     def __init__(self, downloader=None, format=None):
         super().__init__(downloader)
@@ -961,7 +1337,7 @@ def run(self, info):
             self.to_screen('There aren\'t any subtitles to convert')
             return [], info
         self.to_screen('Converting subtitles')
-        sub_filenames = []
+        sub_filenames, conversions = [], []
         for lang, sub in subs.items():
             if not os.path.exists(sub.get('filepath', '')):
                 self.report_warning(f'Skipping embedding {lang} subtitle because the file is missing')
@@ -1005,8 +1381,12 @@ def run(self, info):
                 else:
                     sub_filenames.append(srt_file)
 
-            self.run_ffmpeg(old_file, new_file, ['-f', new_format])
+            conversions.append((lang, sub['filepath'], old_file, new_file))
 
+        results = self._run_in_parallel(
+            functools.partial(self.run_ffmpeg, old_file, new_file, ['-f', new_format])
+            for _, _, old_file, new_file in conversions)
+        for (lang, original_file, _, new_file), _ in zip(conversions, results):
             with open(new_file, encoding='utf-8') as f:
                 subs[lang] = {
                     'ext': new_ext,
@@ -1015,7 +1395,7 @@ def run(self, info):
                 }
 
             info['__files_to_move'][new_file] = replace_extension(
-                info['__files_to_move'][sub['filepath']], new_ext)
+                info['__files_to_move'][original_file], new_ext)
 
         return sub_filenames, info
 
@@ -1059,9 +1439,12 @@ def run(self, info):
         if self._force_keyframes and len(chapters) > 1:
             in_file = self.force_keyframes(in_file, (c['start_time'] for c in chapters))
         self.to_screen('Splitting video by chapters; %d chapters found' % len(chapters))
+        jobs = []
         for idx, chapter in enumerate(chapters):
             destination, opts = self._ffmpeg_args_for_chapter(idx + 1, chapter, info)
-            self.real_run_ffmpeg([(in_file, opts)], [(destination, self.stream_copy_opts())])
+            jobs.append(functools.partial(
+                self.real_run_ffmpeg, [(in_file, opts)], [(destination, self.stream_copy_opts())]))
+        list(self._run_in_parallel(jobs))
         if in_file != info['filepath']:
             self._delete_downloaded_files(in_file, msg=None)
         return [], info
@@ -1070,6 +1453,7 @@ def run(self, info):
 class FFmpegThumbnailsConvertorPP(FFmpegPostProcessor):
     SUPPORTED_EXTS = MEDIA_EXTENSIONS.thumbnails
     FORMAT_RE = create_mapping_re(SUPPORTED_EXTS)
+    _STREAM_COPY_CHAINABLE = True
 
     def __init__(self, downloader=None, format=None):
         super().__init__(downloader)
@@ -1109,7 +1493,7 @@ def convert_thumbnail(self, thumbnail_filename, target_ext):
         return thumbnail_conv_filename
 
     def run(self, info):
-        files_to_delete = []
+        files_to_delete, conversions = [], []
         has_thumbnail = False
 
         for idx, thumbnail_dict in enumerate(info.get('thumbnails') or []):
@@ -1126,7 +1510,13 @@ def run(self, info):
             if _skip_msg:
                 self.to_screen(f'Not converting thumbnail "{original_thumbnail}"; {_skip_msg}')
                 continue
-            thumbnail_dict['filepath'] = self.convert_thumbnail(original_thumbnail, target_ext)
+            conversions.append((thumbnail_dict, original_thumbnail, target_ext))
+
+        results = self._run_in_parallel(
+            functools.partial(self.convert_thumbnail, original_thumbnail, target_ext)
+            for _, original_thumbnail, target_ext in conversions)
+        for (thumbnail_dict, original_thumbnail, target_ext), thumbnail_filename in zip(conversions, results):
+            thumbnail_dict['filepath'] = thumbnail_filename
             files_to_delete.append(original_thumbnail)
             info['__files_to_move'][thumbnail_dict['filepath']] = replace_extension(
                 info['__files_to_move'][original_thumbnail], target_ext)
@@ -0,0 +1,300 @@
+"""
+Merging of fragmented MP4 files (ISO/IEC 14496-12) without ffmpeg
+
+The tracks of the inputs are combined into a single moov, and their moof/mdat
+fragments are interleaved by decode time. The fragments are copied one at a
+time, so the memory usage does not depend on the size of the files
+"""
+
+import heapq
+import os
+import struct
+
+from ..downloader.ism import box, u32, u64
+from ..utils import PostProcessingError, encodeFilename
+
+# Top-level boxes that are only valid for the input file they are in
+_SKIPPED_BOXES = (b'sidx', b'ssix', b'styp', b'mfra', b'emsg', b'prft', b'free', b'skip')
+_COPY_CHUNK_SIZE = 1024 * 1024
+
+
+class Mp4MuxError(PostProcessingError):
+    pass
+
+
+def iter_boxes(data):
+    """Yield the (type, payload) of the boxes in data"""
+    pos = 0
+    while pos + 8 <= len(data):
+        size, box_type = struct.unpack_from('>I4s', data, pos)
+        header_size = 8
+        if size == 1:
+            size, header_size = u64.unpack_from(data, pos + 8)[0], 16
+        elif size == 0:
+            size = len(data) - pos
+        if size < header_size:
+            raise Mp4MuxError(f'Invalid size of {box_type!r} box')
+        yield box_type, data[pos + header_size:pos + size]
+        pos += size
+
+
+def _find_box(data, *box_sequence):
+    for box_type, payload in iter_boxes(data):
+        if box_type == box_sequence[0]:
+            return payload if len(box_sequence) == 1 else _find_box(payload, *box_sequence[1:])
+
+
+def _read_box_header(f, file_size):
+    pos = f.tell()
+    header = f.read(8)
+    if len(header) < 8:
+        return None
+    size, box_type = struct.unpack('>I4s', header)
+    header_size = 8
+    if size == 1:
+        size, header_size = u64.unpack(f.read(8))[0], 16
+    elif size == 0:
+        size = file_size - pos
+    if size < header_size:
+        raise Mp4MuxError(f'Invalid size of {box_type!r} box')
+    f.seek(pos)
+    return box_type, size, header_size
+
+
+def _full_box_version(payload):
+    return payload[0], int.from_bytes(payload[1:4], 'big')
+
+
+class _Mp4Input:
+    def __init__(self, path):
+        self.path = path
+        self._file = open(encodeFilename(path), 'rb')
+        self._file_size = os.fstat(self._file.fileno()).st_size
+        self.ftyp = self.moov = None
+        while True:
+            header = _read_box_header(self._file, self._file_size)
+            if not header or header[0] == b'moof':
+                break
+            box_type, size, header_size = header
+            if box_type in (b'ftyp', b'moov'):
+                self._file.seek(header_size, 1)
+                setattr(self, box_type.decode(), self._file.read(size - header_size))
+            else:
+                self._file.seek(size, 1)
+        if self.moov is None:
+            raise Mp4MuxError(f'No moov box in "{path}"')
+        if _find_box(self.moov, b'mvex') is None:
+            raise Mp4MuxError(f'"{path}" is not a fragmented MP4 file')
+
+        mvhd = _find_box(self.moov, b'mvhd')
+        version, _ = _full_box_version(mvhd)
+        self.timescale, self.duration = struct.unpack_from('>IQ' if version else '>II', mvhd, 20 if version else 12)
+        self.trex = {u32.unpack_from(trex, 4)[0]: trex for box_type, trex in iter_boxes(_find_box(self.moov, b'mvex'))
+                     if box_type == b'trex'}
+        self.track_timescales = {}
+        for box_type, trak in iter_boxes(self.moov):
+            if box_type == b'trak':
+                tkhd = _find_box(trak, b'tkhd')
+                track_id = u32.unpack_from(tkhd, 20 if tkhd[0] else 12)[0]
+                mdhd = _find_box(trak, b'mdia', b'mdhd')
+                self.track_timescales[track_id] = u32.unpack_from(mdhd, 20 if mdhd[0] else 12)[0]
+        self._decode_times = {}
+
+    def close(self):
+        self._file.close()
+
+    def _fragment_time(self, moof):
+        """Get the decode time of the fragment in seconds, and update the times of its tracks"""
+        start = None
+        for box_type, traf in iter_boxes(moof):
+            if box_type != b'traf':
+                continue
+            tfhd = _find_box(traf, b'tfhd')
+            _, tf_flags = _full_box_version(tfhd)
+            track_id = u32.unpack_from(tfhd, 4)[0]
+            timescale = self.track_timescales.get(track_id) or 1
+            tfdt = _find_box(traf, b'tfdt')
+            if tfdt is not None:
+                self._decode_times[track_id] = (u64 if tfdt[0] else u32).unpack_from(tfdt, 4)[0]
+            decode_time = self._decode_times.get(track_id, 0)
+            start = decode_time / timescale if start is None else min(start, decode_time / timescale)
+
+            # Without tfdt, the decode time is the sum of the previous sample durations
+            pos = 8 + (8 if tf_flags & 0x1 else 0) + (4 if tf_flags & 0x2 else 0)
+            default_duration = (u32.unpack_from(tfhd, pos)[0] if tf_flags & 0x8
+                                else u32.unpack_from(self.trex.get(track_id, bytes(24)), 12)[0])
+            for trun_type, trun in iter_boxes(traf):
+                if trun_type != b'trun':
+                    continue
+                _, flags = _full_box_version(trun)
+                sample_count = u32.unpack_from(trun, 4)[0]
+                if not flags & 0x100:
+                    decode_time += sample_count * default_duration
+                    continue
+                pos = 8 + (4 if flags & 0x1 else 0) + (4 if flags & 0x4 else 0)
+                stride = 4 * bin(flags & 0xF00).count('1')
+                decode_time += sum(u32.unpack_from(trun, pos + i * stride)[0] for i in range(sample_count))
+            self._decode_times[track_id] = decode_time
+        return start or 0
+
+    def fragments(self):
+        """Yield (time, (moof payload, position, size of the moof, size of the fragment)) for each fragment"""
+        f = self._file
+        f.seek(0)
+        while True:
+            header = _read_box_header(f, self._file_size)
+            if not header:
+                return
+            box_type, size, header_size = header
+            if box_type != b'moof':
+                f.seek(size, 1)
+                continue
+            moof_pos = f.tell()
+            f.seek(header_size, 1)
+            moof = f.read(size - header_size)
+            # The fragment is the moof and the boxes that follow it, up to the next fragment
+            end = moof_pos + size
+            f.seek(end)
+            while True:
+                header = _read_box_header(f, self._file_size)
+                if not header or header[0] == b'moof' or header[0] in _SKIPPED_BOXES:
+                    break
+                end += header[1]
+                f.seek(end)
+            yield self._fragment_time(moof), (moof, moof_pos, size, end - moof_pos)
+            f.seek(end)
+
+    def copy(self, out, pos, size):
+        self._file.seek(pos)
+        while size > 0:
+            data = self._file.read(min(size, _COPY_CHUNK_SIZE))
+            if not data:
+                raise Mp4MuxError(f'"{self.path}" is truncated')
+            out.write(data)
+            size -= len(data)
+
+
+def _scale(value, src_timescale, dst_timescale):
+    return value * dst_timescale // src_timescale if src_timescale else value
+
+
+def _rebuild_trak(trak, track_ids, src_timescale, dst_timescale):
+    payload = b''
+    for box_type, data in iter_boxes(trak):
+        if box_type == b'tkhd':
+            version, flags = _full_box_version(data)
+            data = bytearray(data)
+            id_pos, duration_pos = (20, 28) if version else (12, 20)
+            u32.pack_into(data, id_pos, track_ids[u32.unpack_from(data, id_pos)[0]])
+            duration_format = u64 if version else u32
+            duration = duration_format.unpack_from(data, duration_pos)[0]
+            if duration != (1 << (8 * duration_format.size)) - 1:
+                duration_format.pack_into(data, duration_pos, _scale(duration, src_timescale, dst_timescale))
+            data = bytes(data)
+        elif box_type == b'edts':
+            edts = b''
+            for edts_type, edts_data in iter_boxes(data):
+                if edts_type == b'elst':
+                    version, _ = _full_box_version(edts_data)
+                    edts_data = bytearray(edts_data)
+                    entry_format, entry_size = (u64, 20) if version else (u32, 12)
+                    for i in range(u32.unpack_from(edts_data, 4)[0]):
+                        pos = 8 + i * entry_size
+                        entry_format.pack_into(edts_data, pos, _scale(
+                            entry_format.unpack_from(edts_data, pos)[0], src_timescale, dst_timescale))
+                    edts_data = bytes(edts_data)
+                edts += box(edts_type, edts_data)
+            data = edts
+        payload += box(box_type, data)
+    return payload
+
+
+def _rebuild_moof(moof, track_ids, sequence_number, offset_delta):
+    payload = b''
+    for box_type, data in iter_boxes(moof):
+        if box_type == b'mfhd':
+            data = data[:4] + u32.pack(sequence_number)
+        elif box_type == b'traf':
+            traf = b''
+            for traf_type, traf_data in iter_boxes(data):
+                if traf_type == b'tfhd':
+                    _, flags = _full_box_version(traf_data)
+                    traf_data = bytearray(traf_data)
+                    u32.pack_into(traf_data, 4, track_ids[u32.unpack_from(traf_data, 4)[0]])
+                    if flags & 0x1:
+                        # The base data offset is a position in the file
+                        u64.pack_into(traf_data, 8, u64.unpack_from(traf_data, 8)[0] + offset_delta)
+                    traf_data = bytes(traf_data)
+                traf += box(traf_type, traf_data)
+            data = traf
+        payload += box(box_type, data)
+    return box(b'moof', payload)
+
+
+def _build_moov(inputs, track_ids):
+    timescale = inputs[0].timescale
+    mvhd = bytearray(_find_box(inputs[0].moov, b'mvhd'))
+    duration_format, duration_pos = (u64, 24) if mvhd[0] else (u32, 16)
+    duration_format.pack_into(mvhd, duration_pos, max(
+        _scale(mp4.duration, mp4.timescale, timescale) for mp4 in inputs))
+    u32.pack_into(mvhd, len(mvhd) - 4, len(track_ids) + 1)
+
+    traks, mvex, others = b'', b'', b''
+    for i, mp4 in enumerate(inputs):
+        for box_type, data in iter_boxes(mp4.moov):
+            if box_type == b'trak':
+                traks += box(b'trak', _rebuild_trak(data, track_ids[i], mp4.timescale, timescale))
+            elif box_type == b'mvex':
+                for trex_id, trex in mp4.trex.items():
+                    mvex += box(b'trex', trex[:4] + u32.pack(track_ids[i][trex_id]) + trex[8:])
+            elif box_type == b'pssh' or (i == 0 and box_type not in (b'mvhd', b'mvex')):
+                others += box(box_type, data)
+    return box(b'moov', box(b'mvhd', bytes(mvhd)) + traks + box(b'mvex', mvex) + others)
+
+
+def mux_fragmented_mp4(paths, out_path):
+    """Merge the fragmented MP4 files in paths into a single fragmented MP4 file"""
+    inputs = []
+    try:
+        for path in paths:
+            inputs.append(_Mp4Input(path))
+        # The tracks are numbered in the order of the inputs
+        track_ids, next_id = [], 1
+        for mp4 in inputs:
+            track_ids.append({})
+            for track_id in mp4.track_timescales:
+                track_ids[-1][track_id] = next_id
+                next_id += 1
+
+        with open(encodeFilename(out_path), 'wb') as out:
+            out.write(box(b'ftyp', inputs[0].ftyp) if inputs[0].ftyp else box(b'ftyp', b'isom' + u32.pack(0) + b'isomiso6mp41'))
+            out.write(_build_moov(inputs, track_ids))
+
+            # Only the next fragment of every input is kept in memory
+            fragments = [mp4.fragments() for mp4 in inputs]
+            queue = []
+            for i, generator in enumerate(fragments):
+                fragment = next(generator, None)
+                if fragment:
+                    heapq.heappush(queue, (fragment[0], i, fragment[1]))
+            sequence_number = 0
+            while queue:
+                _, i, (moof, moof_pos, moof_size, size) = heapq.heappop(queue)
+                sequence_number += 1
+                moof = _rebuild_moof(moof, track_ids[i], sequence_number, out.tell() - moof_pos)
+                if len(moof) != moof_size:
+                    # The data offsets are relative to the moof
+                    raise Mp4MuxError('Unsupported moof box with a 64-bit size')
+                out.write(moof)
+                inputs[i].copy(out, moof_pos + moof_size, size - moof_size)
+                fragment = next(fragments[i], None)
+                if fragment:
+                    heapq.heappush(queue, (fragment[0], i, fragment[1]))
+    except (struct.error, IndexError, KeyError, TypeError) as e:
+        raise Mp4MuxError(f'Unable to parse the MP4 files: {e}')
+    finally:
+        for mp4 in inputs:
+            mp4.close()
+
+
+__all__ = ['Mp4MuxError', 'mux_fragmented_mp4']
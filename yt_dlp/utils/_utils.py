@@ -6,6 +6,7 @@
 import codecs
 import collections
 import collections.abc
+import concurrent.futures
 import contextlib
 import datetime
 import email.header
@@ -44,6 +45,7 @@
 import urllib.error
 import urllib.parse
 import urllib.request
+import weakref
 import xml.etree.ElementTree
 import zlib
 
@@ -267,16 +269,12 @@ def write_json_file(obj, fn):
     try:
         with tf:
             json.dump(obj, tf, ensure_ascii=False)
-        if sys.platform == 'win32':
-            # Need to remove existing file on Windows, else os.rename raises
-            # WindowsError or FileExistsError.
-            with contextlib.suppress(OSError):
-                os.unlink(fn)
         with contextlib.suppress(OSError):
             mask = os.umask(0)
             os.umask(mask)
             os.chmod(tf.name, 0o666 & ~mask)
-        os.rename(tf.name, fn)
+        # Unlike os.rename, this also replaces an existing file atomically on Windows
+        os.replace(tf.name, fn)
     except Exception:
         with contextlib.suppress(OSError):
             os.remove(tf.name)
@@ -2688,21 +2686,61 @@ def __len__(self):
         # This is only useful for tests
         return len(self.getslice())
 
-    def __init__(self, pagefunc, pagesize, use_cache=True):
+    def __init__(self, pagefunc, pagesize, use_cache=True, *, prefetch=0):
+        """
+        @param prefetch     Number of the following pages that are fetched concurrently
+                            in the background once the pages are requested in sequence.
+                            pagefunc must then be thread-safe
+        """
         self._pagefunc = pagefunc
         self._pagesize = pagesize
         self._pagecount = float('inf')
         self._use_cache = use_cache
         self._cache = {}
+        self._prefetch = prefetch
+        self._pending = {}
+        self._executor = None
+        self._last_page = None
 
     def getpage(self, pagenum):
+        self._prefetch_pages(pagenum)
         page_results = self._cache.get(pagenum)
         if page_results is None:
-            page_results = [] if pagenum > self._pagecount else list(self._pagefunc(pagenum))
+            if pagenum in self._pending:
+                page_results = self._pending.pop(pagenum).result()
+            else:
+                page_results = [] if pagenum > self._pagecount else list(self._pagefunc(pagenum))
         if self._use_cache:
             self._cache[pagenum] = page_results
+        if pagenum + 1 >= self._pagecount:
+            self._stop_prefetch()
         return page_results
 
+    def _prefetch_pages(self, pagenum):
+        # A single page (e.g. for --playlist-items 1) must not request the following ones
+        sequential, self._last_page = pagenum - 1 == self._last_page, pagenum
+        if not self._prefetch or not sequential:
+            return
+        elif not self._executor:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                self._prefetch, thread_name_prefix=f'{type(self).__name__}-prefetch')
+            weakref.finalize(self, self._executor.shutdown, wait=False)
+        for next_page in range(pagenum + 1, pagenum + 1 + self._prefetch):
+            if next_page >= self._pagecount:
+                break
+            elif next_page not in self._cache and next_page not in self._pending:
+                self._pending[next_page] = self._executor.submit(lambda n: list(self._pagefunc(n)), next_page)
+
+    def _stop_prefetch(self):
+        """Discard the pages that are being prefetched once the end of the list is reached"""
+        self._prefetch = 0
+        for future in self._pending.values():
+            future.cancel()
+        self._pending.clear()
+        if self._executor:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
     def getslice(self, start=0, end=None):
         return list(self._getslice(start, end))
 
@@ -2720,7 +2758,12 @@ def __getitem__(self, idx):
 
 
 class OnDemandPagedList(PagedList):
-    """Download pages until a page with less than maximum results"""
+    """
+    Download pages until a page with less than maximum results
+
+    With prefetch, the pages are fetched speculatively, so up to prefetch
+    pages after the last one may be requested
+    """
 
     def _getslice(self, start, end):
         for pagenum in itertools.count(start // self._pagesize):
@@ -2742,7 +2785,10 @@ def _getslice(self, start, end):
                 page_results = self.getpage(pagenum)
             except Exception:
                 self._pagecount = pagenum - 1
+                self._stop_prefetch()
                 raise
+            if len(page_results) < self._pagesize:
+                self._stop_prefetch()
             if startv != 0 or endv is not None:
                 page_results = page_results[startv:endv]
             yield from page_results
@@ -2763,8 +2809,8 @@ def _getslice(self, start, end):
 class InAdvancePagedList(PagedList):
     """PagedList with total number of pages known in advance"""
 
-    def __init__(self, pagefunc, pagecount, pagesize):
-        PagedList.__init__(self, pagefunc, pagesize, True)
+    def __init__(self, pagefunc, pagecount, pagesize, *, prefetch=0):
+        PagedList.__init__(self, pagefunc, pagesize, True, prefetch=prefetch)
         self._pagecount = pagecount
 
     def _getslice(self, start, end):